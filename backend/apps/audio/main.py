@@ -1,3 +1,4 @@
+import asyncio
 import hashlib
 import json
 import logging
@@ -41,6 +42,7 @@ from config import (
     AppConfig,
     CORS_ALLOW_ORIGIN,
 )
+from utils.http import HTTP_CLIENT
 from constants import ERROR_MESSAGES
 from utils.utils import (
     get_current_user,
@@ -157,18 +159,19 @@ async def get_audio_config(user=Depends(get_admin_user)):
 async def update_audio_config(
     form_data: AudioConfigUpdateForm, user=Depends(get_admin_user)
 ):
-    app.state.config.TTS_OPENAI_API_BASE_URL = form_data.tts.OPENAI_API_BASE_URL
-    app.state.config.TTS_OPENAI_API_KEY = form_data.tts.OPENAI_API_KEY
-    app.state.config.TTS_API_KEY = form_data.tts.API_KEY
-    app.state.config.TTS_ENGINE = form_data.tts.ENGINE
-    app.state.config.TTS_MODEL = form_data.tts.MODEL
-    app.state.config.TTS_VOICE = form_data.tts.VOICE
-    app.state.config.TTS_SPLIT_ON = form_data.tts.SPLIT_ON
-
-    app.state.config.STT_OPENAI_API_BASE_URL = form_data.stt.OPENAI_API_BASE_URL
-    app.state.config.STT_OPENAI_API_KEY = form_data.stt.OPENAI_API_KEY
-    app.state.config.STT_ENGINE = form_data.stt.ENGINE
-    app.state.config.STT_MODEL = form_data.stt.MODEL
+    with app.state.config.transaction():
+        app.state.config.TTS_OPENAI_API_BASE_URL = form_data.tts.OPENAI_API_BASE_URL
+        app.state.config.TTS_OPENAI_API_KEY = form_data.tts.OPENAI_API_KEY
+        app.state.config.TTS_API_KEY = form_data.tts.API_KEY
+        app.state.config.TTS_ENGINE = form_data.tts.ENGINE
+        app.state.config.TTS_MODEL = form_data.tts.MODEL
+        app.state.config.TTS_VOICE = form_data.tts.VOICE
+        app.state.config.TTS_SPLIT_ON = form_data.tts.SPLIT_ON
+
+        app.state.config.STT_OPENAI_API_BASE_URL = form_data.stt.OPENAI_API_BASE_URL
+        app.state.config.STT_OPENAI_API_KEY = form_data.stt.OPENAI_API_KEY
+        app.state.config.STT_ENGINE = form_data.stt.ENGINE
+        app.state.config.STT_MODEL = form_data.stt.MODEL
 
     return {
         "tts": {
@@ -215,20 +218,21 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             pass
 
         r = None
+        error_body = b""
         try:
-            r = requests.post(
+            async with HTTP_CLIENT.session.post(
                 url=f"{app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
                 data=body,
                 headers=headers,
-                stream=True,
-            )
-
-            r.raise_for_status()
+            ) as r:
+                if not r.ok:
+                    error_body = await r.read()
+                r.raise_for_status()
 
-            # Save the streaming content to a file
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                # Save the streaming content to a file
+                with open(file_path, "wb") as f:
+                    async for chunk in r.content.iter_chunked(8192):
+                        f.write(chunk)
 
             with open(file_body_path, "w") as f:
                 json.dump(json.loads(body.decode("utf-8")), f)
@@ -241,14 +245,14 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             error_detail = "Open WebUI: Server Connection Error"
             if r is not None:
                 try:
-                    res = r.json()
+                    res = json.loads(error_body)
                     if "error" in res:
                         error_detail = f"External: {res['error']['message']}"
                 except Exception:
                     error_detail = f"External: {e}"
 
             raise HTTPException(
-                status_code=r.status_code if r != None else 500,
+                status_code=r.status if r != None else 500,
                 detail=error_detail,
             )
 
@@ -262,7 +266,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
 
         voice_id = payload.get("voice", "")
 
-        if voice_id not in get_available_voices():
+        if voice_id not in await asyncio.to_thread(get_available_voices):
             raise HTTPException(
                 status_code=400,
                 detail="Invalid voice id",
@@ -282,15 +286,18 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
         }
 
+        r = None
+        error_body = b""
         try:
-            r = requests.post(url, json=data, headers=headers)
-
-            r.raise_for_status()
+            async with HTTP_CLIENT.session.post(url, json=data, headers=headers) as r:
+                if not r.ok:
+                    error_body = await r.read()
+                r.raise_for_status()
 
-            # Save the streaming content to a file
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                # Save the streaming content to a file
+                with open(file_path, "wb") as f:
+                    async for chunk in r.content.iter_chunked(8192):
+                        f.write(chunk)
 
             with open(file_body_path, "w") as f:
                 json.dump(json.loads(body.decode("utf-8")), f)
@@ -303,14 +310,14 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             error_detail = "Open WebUI: Server Connection Error"
             if r is not None:
                 try:
-                    res = r.json()
+                    res = json.loads(error_body)
                     if "error" in res:
                         error_detail = f"External: {res['error']['message']}"
                 except Exception:
                     error_detail = f"External: {e}"
 
             raise HTTPException(
-                status_code=r.status_code if r != None else 500,
+                status_code=r.status if r != None else 500,
                 detail=error_detail,
             )
 
@@ -402,7 +409,7 @@ def transcribe(
 
             r = None
             try:
-                r = requests.post(
+                r = HTTP_CLIENT.sync_session.post(
                     url=f"{app.state.config.STT_OPENAI_API_BASE_URL}/audio/transcriptions",
                     headers=headers,
                     files=files,
@@ -455,7 +462,7 @@ def get_available_models() -> list[dict]:
         }
 
         try:
-            response = requests.get(
+            response = HTTP_CLIENT.sync_session.get(
                 "https://api.elevenlabs.io/v1/models", headers=headers
             )
             response.raise_for_status()
@@ -470,7 +477,7 @@ def get_available_models() -> list[dict]:
 
 @app.get("/models")
 async def get_models(user=Depends(get_verified_user)):
-    return {"models": get_available_models()}
+    return {"models": await asyncio.to_thread(get_available_models)}
 
 
 def get_available_voices() -> dict:
@@ -510,7 +517,9 @@ def get_elevenlabs_voices() -> dict:
     }
     try:
         # TODO: Add retries
-        response = requests.get("https://api.elevenlabs.io/v1/voices", headers=headers)
+        response = HTTP_CLIENT.sync_session.get(
+            "https://api.elevenlabs.io/v1/voices", headers=headers
+        )
         response.raise_for_status()
         voices_data = response.json()
 
@@ -527,4 +536,5 @@ def get_elevenlabs_voices() -> dict:
 
 @app.get("/voices")
 async def get_voices(user=Depends(get_verified_user)):
-    return {"voices": [{"id": k, "name": v} for k, v in get_available_voices().items()]}
+    voices = await asyncio.to_thread(get_available_voices)
+    return {"voices": [{"id": k, "name": v} for k, v in voices.items()]}
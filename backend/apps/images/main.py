@@ -14,7 +14,6 @@ import base64
 import json
 import logging
 import re
-import requests
 import asyncio
 
 from utils.utils import (
@@ -47,6 +46,7 @@ from config import (
     CORS_ALLOW_ORIGIN,
     AppConfig,
 )
+from utils.http import HTTP_CLIENT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["IMAGES"])
@@ -130,22 +130,25 @@ class ConfigForm(BaseModel):
 
 @app.post("/config/update")
 async def update_config(form_data: ConfigForm, user=Depends(get_admin_user)):
-    app.state.config.ENGINE = form_data.engine
-    app.state.config.ENABLED = form_data.enabled
+    with app.state.config.transaction():
+        app.state.config.ENGINE = form_data.engine
+        app.state.config.ENABLED = form_data.enabled
 
-    app.state.config.OPENAI_API_BASE_URL = form_data.openai.OPENAI_API_BASE_URL
-    app.state.config.OPENAI_API_KEY = form_data.openai.OPENAI_API_KEY
+        app.state.config.OPENAI_API_BASE_URL = form_data.openai.OPENAI_API_BASE_URL
+        app.state.config.OPENAI_API_KEY = form_data.openai.OPENAI_API_KEY
 
-    app.state.config.AUTOMATIC1111_BASE_URL = (
-        form_data.automatic1111.AUTOMATIC1111_BASE_URL
-    )
-    app.state.config.AUTOMATIC1111_API_AUTH = (
-        form_data.automatic1111.AUTOMATIC1111_API_AUTH
-    )
+        app.state.config.AUTOMATIC1111_BASE_URL = (
+            form_data.automatic1111.AUTOMATIC1111_BASE_URL
+        )
+        app.state.config.AUTOMATIC1111_API_AUTH = (
+            form_data.automatic1111.AUTOMATIC1111_API_AUTH
+        )
 
-    app.state.config.COMFYUI_BASE_URL = form_data.comfyui.COMFYUI_BASE_URL
-    app.state.config.COMFYUI_WORKFLOW = form_data.comfyui.COMFYUI_WORKFLOW
-    app.state.config.COMFYUI_WORKFLOW_NODES = form_data.comfyui.COMFYUI_WORKFLOW_NODES
+        app.state.config.COMFYUI_BASE_URL = form_data.comfyui.COMFYUI_BASE_URL
+        app.state.config.COMFYUI_WORKFLOW = form_data.comfyui.COMFYUI_WORKFLOW
+        app.state.config.COMFYUI_WORKFLOW_NODES = (
+            form_data.comfyui.COMFYUI_WORKFLOW_NODES
+        )
 
     return {
         "enabled": app.state.config.ENABLED,
@@ -180,7 +183,8 @@ def get_automatic1111_api_auth():
 async def verify_url(user=Depends(get_admin_user)):
     if app.state.config.ENGINE == "automatic1111":
         try:
-            r = requests.get(
+            r = await asyncio.to_thread(
+                HTTP_CLIENT.sync_session.get,
                 url=f"{app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 headers={"authorization": get_automatic1111_api_auth()},
             )
@@ -191,7 +195,10 @@ async def verify_url(user=Depends(get_admin_user)):
             raise HTTPException(status_code=400, detail=ERROR_MESSAGES.INVALID_URL)
     elif app.state.config.ENGINE == "comfyui":
         try:
-            r = requests.get(url=f"{app.state.config.COMFYUI_BASE_URL}/object_info")
+            r = await asyncio.to_thread(
+                HTTP_CLIENT.sync_session.get,
+                url=f"{app.state.config.COMFYUI_BASE_URL}/object_info",
+            )
             r.raise_for_status()
             return True
         except Exception as e:
@@ -205,14 +212,14 @@ def set_image_model(model: str):
     app.state.config.MODEL = model
     if app.state.config.ENGINE in ["", "automatic1111"]:
         api_auth = get_automatic1111_api_auth()
-        r = requests.get(
+        r = HTTP_CLIENT.sync_session.get(
             url=f"{app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
             headers={"authorization": api_auth},
         )
         options = r.json()
         if model != options["sd_model_checkpoint"]:
             options["sd_model_checkpoint"] = model
-            r = requests.post(
+            r = HTTP_CLIENT.sync_session.post(
                 url=f"{app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 json=options,
                 headers={"authorization": api_auth},
@@ -227,7 +234,7 @@ def get_image_model():
         return app.state.config.MODEL if app.state.config.MODEL else ""
     elif app.state.config.ENGINE == "automatic1111" or app.state.config.ENGINE == "":
         try:
-            r = requests.get(
+            r = HTTP_CLIENT.sync_session.get(
                 url=f"{app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/options",
                 headers={"authorization": get_automatic1111_api_auth()},
             )
@@ -255,24 +262,25 @@ async def get_image_config(user=Depends(get_admin_user)):
 
 @app.post("/image/config/update")
 async def update_image_config(form_data: ImageConfigForm, user=Depends(get_admin_user)):
-    app.state.config.MODEL = form_data.MODEL
+    with app.state.config.transaction():
+        app.state.config.MODEL = form_data.MODEL
 
-    pattern = r"^\d+x\d+$"
-    if re.match(pattern, form_data.IMAGE_SIZE):
-        app.state.config.IMAGE_SIZE = form_data.IMAGE_SIZE
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 512x512)."),
-        )
+        pattern = r"^\d+x\d+$"
+        if re.match(pattern, form_data.IMAGE_SIZE):
+            app.state.config.IMAGE_SIZE = form_data.IMAGE_SIZE
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 512x512)."),
+            )
 
-    if form_data.IMAGE_STEPS >= 0:
-        app.state.config.IMAGE_STEPS = form_data.IMAGE_STEPS
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 50)."),
-        )
+        if form_data.IMAGE_STEPS >= 0:
+            app.state.config.IMAGE_STEPS = form_data.IMAGE_STEPS
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=ERROR_MESSAGES.INCORRECT_FORMAT("  (e.g., 50)."),
+            )
 
     return {
         "MODEL": app.state.config.MODEL,
@@ -291,7 +299,9 @@ def get_models(user=Depends(get_verified_user)):
             ]
         elif app.state.config.ENGINE == "comfyui":
             # TODO - get models from comfyui
-            r = requests.get(url=f"{app.state.config.COMFYUI_BASE_URL}/object_info")
+            r = HTTP_CLIENT.sync_session.get(
+                url=f"{app.state.config.COMFYUI_BASE_URL}/object_info"
+            )
             info = r.json()
 
             workflow = json.loads(app.state.config.COMFYUI_WORKFLOW)
@@ -335,7 +345,7 @@ def get_models(user=Depends(get_verified_user)):
         elif (
             app.state.config.ENGINE == "automatic1111" or app.state.config.ENGINE == ""
         ):
-            r = requests.get(
+            r = HTTP_CLIENT.sync_session.get(
                 url=f"{app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/sd-models",
                 headers={"authorization": get_automatic1111_api_auth()},
             )
@@ -394,7 +404,7 @@ def save_b64_image(b64_str):
 def save_url_image(url):
     image_id = str(uuid.uuid4())
     try:
-        r = requests.get(url)
+        r = HTTP_CLIENT.sync_session.get(url)
         r.raise_for_status()
         if r.headers["content-type"].split("/")[0] == "image":
 
@@ -449,7 +459,8 @@ async def image_generations(
                 "response_format": "b64_json",
             }
 
-            r = requests.post(
+            r = await asyncio.to_thread(
+                HTTP_CLIENT.sync_session.post,
                 url=f"{app.state.config.OPENAI_API_BASE_URL}/images/generations",
                 json=data,
                 headers=headers,
@@ -506,7 +517,7 @@ async def image_generations(
             images = []
 
             for image in res["data"]:
-                image_filename = save_url_image(image["url"])
+                image_filename = await asyncio.to_thread(save_url_image, image["url"])
                 images.append({"url": f"/cache/image/generations/{image_filename}"})
                 file_body_path = IMAGE_CACHE_DIR.joinpath(f"{image_filename}.json")
 
@@ -519,7 +530,7 @@ async def image_generations(
             app.state.config.ENGINE == "automatic1111" or app.state.config.ENGINE == ""
         ):
             if form_data.model:
-                set_image_model(form_data.model)
+                await asyncio.to_thread(set_image_model, form_data.model)
 
             data = {
                 "prompt": form_data.prompt,
@@ -534,9 +545,9 @@ async def image_generations(
             if form_data.negative_prompt is not None:
                 data["negative_prompt"] = form_data.negative_prompt
 
-            # Use asyncio.to_thread for the requests.post call
+            # Use asyncio.to_thread for the HTTP_CLIENT.sync_session.post call
             r = await asyncio.to_thread(
-                requests.post,
+                HTTP_CLIENT.sync_session.post,
                 url=f"{app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
                 json=data,
                 headers={"authorization": get_automatic1111_api_auth()},
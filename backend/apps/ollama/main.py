@@ -13,7 +13,6 @@ from pydantic import BaseModel, ConfigDict
 
 import os
 import re
-import random
 import requests
 import json
 import aiohttp
@@ -43,12 +42,24 @@ from config import (
     AppConfig,
     CORS_ALLOW_ORIGIN,
 )
+from env import (
+    OLLAMA_LOAD_BALANCER,
+    OLLAMA_BASE_URL_WEIGHTS,
+    OLLAMA_EJECT_FAILURES,
+    OLLAMA_EJECT_SECONDS,
+    OLLAMA_CHAT_AFFINITY,
+    OLLAMA_AFFINITY_LOAD_FACTOR,
+)
 from utils.misc import (
     calculate_sha256,
     apply_model_params_to_body_ollama,
     apply_model_params_to_body_openai,
     apply_model_system_prompt_to_body,
 )
+from utils.balancer import Balancer, NodeRequest, parse_weights
+from utils.http import HTTP_CLIENT
+from utils.registry import invalidate_models, record_upstream_response
+from utils.singleflight import SINGLEFLIGHT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
@@ -71,10 +82,13 @@ app.state.config.ENABLE_OLLAMA_API = ENABLE_OLLAMA_API
 app.state.config.OLLAMA_BASE_URLS = OLLAMA_BASE_URLS
 app.state.MODELS = {}
 
-
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
+app.state.BALANCER = Balancer(
+    strategy=OLLAMA_LOAD_BALANCER,
+    weights=parse_weights(OLLAMA_BASE_URL_WEIGHTS),
+    eject_failures=OLLAMA_EJECT_FAILURES,
+    eject_seconds=OLLAMA_EJECT_SECONDS,
+    affinity_load_factor=OLLAMA_AFFINITY_LOAD_FACTOR,
+)
 
 
 @app.middleware("http")
@@ -106,6 +120,7 @@ class OllamaConfigForm(BaseModel):
 @app.post("/config/update")
 async def update_config(form_data: OllamaConfigForm, user=Depends(get_admin_user)):
     app.state.config.ENABLE_OLLAMA_API = form_data.enable_ollama_api
+    invalidate_models()
     return {"ENABLE_OLLAMA_API": app.state.config.ENABLE_OLLAMA_API}
 
 
@@ -121,46 +136,63 @@ class UrlUpdateForm(BaseModel):
 @app.post("/urls/update")
 async def update_ollama_api_url(form_data: UrlUpdateForm, user=Depends(get_admin_user)):
     app.state.config.OLLAMA_BASE_URLS = form_data.urls
+    invalidate_models()
 
     log.info(f"app.state.config.OLLAMA_BASE_URLS: {app.state.config.OLLAMA_BASE_URLS}")
     return {"OLLAMA_BASE_URLS": app.state.config.OLLAMA_BASE_URLS}
 
 
+@app.get("/balancer")
+async def get_balancer_stats(user=Depends(get_admin_user)):
+    return app.state.BALANCER.stats(app.state.config.OLLAMA_BASE_URLS)
+
+
 async def fetch_url(url):
-    timeout = aiohttp.ClientTimeout(total=5)
-    try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(url) as response:
+    async def fetch():
+        try:
+            async with HTTP_CLIENT.session.get(
+                url, timeout=HTTP_CLIENT.timeout(5)
+            ) as response:
                 return await response.json()
-    except Exception as e:
-        # Handle connection error here
-        log.error(f"Connection error: {e}")
-        return None
+        except Exception as e:
+            # Handle connection error here
+            log.error(f"Connection error: {e}")
+            return None
+
+    # Concurrent model list and version requests share one upstream call
+    return await SINGLEFLIGHT.do("ollama", url, fetch)
 
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    request: Optional[NodeRequest] = None,
 ):
     if response:
-        response.close()
-    if session:
-        await session.close()
+        response.release()
+    if request:
+        request.finish()
 
 
 async def post_streaming_url(
-    url: str, payload: Union[str, bytes], stream: bool = True, content_type=None
+    url: str,
+    payload: Union[str, bytes],
+    stream: bool = True,
+    content_type=None,
+    base_url: Optional[str] = None,
 ):
+    # Requests to `base_url` are tracked by the balancer until fully read
+    request = app.state.BALANCER.track(base_url) if base_url else None
+
     r = None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-        r = await session.post(
+        r = await HTTP_CLIENT.session.post(
             url,
             data=payload,
             headers={"Content-Type": "application/json"},
+            timeout=HTTP_CLIENT.timeout(AIOHTTP_CLIENT_TIMEOUT),
         )
+        if request:
+            request.responded()
         r.raise_for_status()
 
         if stream:
@@ -172,12 +204,12 @@ async def post_streaming_url(
                 status_code=r.status,
                 headers=headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, request=request
                 ),
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await cleanup_response(r, request)
             return res
 
     except Exception as e:
@@ -189,6 +221,11 @@ async def post_streaming_url(
                     error_detail = f"Ollama: {res['error']}"
             except Exception:
                 error_detail = f"Ollama: {e}"
+            await cleanup_response(r)
+
+        if request:
+            # Only connection errors and server errors count against the node
+            request.finish(error_detail if r is None or r.status >= 500 else None)
 
         raise HTTPException(
             status_code=r.status if r else 500,
@@ -196,6 +233,67 @@ async def post_streaming_url(
         )
 
 
+def select_url_idx(model: str, chat_id: Optional[str] = None) -> int:
+    """
+    The index in OLLAMA_BASE_URLS of the node the balancer picks for `model`,
+    the node the chat went to before if there is one and it isn't overloaded.
+    """
+    url_idxs = app.state.MODELS[model]["urls"]
+    urls = [app.state.config.OLLAMA_BASE_URLS[idx] for idx in url_idxs]
+    key = f"{model}:{chat_id}" if chat_id and OLLAMA_CHAT_AFFINITY else None
+    return url_idxs[app.state.BALANCER.select(urls, key=key)]
+
+
+def post_to_node(url: str, path: str, data: bytes):
+    """POST to the node at `url` from a worker thread, tracked by the balancer."""
+    request = app.state.BALANCER.track(url)
+    try:
+        r = HTTP_CLIENT.sync_session.post(
+            f"{url}{path}", headers={"Content-Type": "application/json"}, data=data
+        )
+    except Exception as e:
+        request.finish(str(e))
+        raise
+
+    request.responded()
+    request.finish(f"{r.status_code} {r.reason}" if r.status_code >= 500 else None)
+    return r
+
+
+async def send_request(method: str, url: str, data: Optional[bytes] = None):
+    """
+    Send a request to an Ollama node on the shared session and return its JSON
+    body (None if empty), or raise an HTTPException with the error Ollama gave.
+    """
+    r = None
+    body = b""
+    try:
+        async with HTTP_CLIENT.session.request(
+            method,
+            url,
+            data=data,
+            headers={"Content-Type": "application/json"} if data is not None else None,
+        ) as r:
+            body = await r.read()
+            r.raise_for_status()
+            return json.loads(body) if body else None
+    except Exception as e:
+        log.exception(e)
+        error_detail = "Open WebUI: Server Connection Error"
+        if r is not None:
+            try:
+                res = json.loads(body)
+                if "error" in res:
+                    error_detail = f"Ollama: {res['error']}"
+            except Exception:
+                error_detail = f"Ollama: {e}"
+
+        raise HTTPException(
+            status_code=r.status if r is not None else 500,
+            detail=error_detail,
+        )
+
+
 def merge_models_lists(model_lists):
     merged_models = {}
 
@@ -221,6 +319,11 @@ async def get_all_models():
         ]
         responses = await asyncio.gather(*tasks)
 
+        for url, response in zip(app.state.config.OLLAMA_BASE_URLS, responses):
+            record_upstream_response(
+                "ollama", url, None if response else "Server Connection Error"
+            )
+
         models = {
             "models": merge_models_lists(
                 map(
@@ -258,28 +361,7 @@ async def get_ollama_tags(
         return models
     else:
         url = app.state.config.OLLAMA_BASE_URLS[url_idx]
-
-        r = None
-        try:
-            r = requests.request(method="GET", url=f"{url}/api/tags")
-            r.raise_for_status()
-
-            return r.json()
-        except Exception as e:
-            log.exception(e)
-            error_detail = "Open WebUI: Server Connection Error"
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "error" in res:
-                        error_detail = f"Ollama: {res['error']}"
-                except Exception:
-                    error_detail = f"Ollama: {e}"
-
-            raise HTTPException(
-                status_code=r.status_code if r else 500,
-                detail=error_detail,
-            )
+        return await send_request("GET", f"{url}/api/tags")
 
 
 @app.get("/api/version")
@@ -311,28 +393,7 @@ async def get_ollama_versions(url_idx: Optional[int] = None):
                 )
         else:
             url = app.state.config.OLLAMA_BASE_URLS[url_idx]
-
-            r = None
-            try:
-                r = requests.request(method="GET", url=f"{url}/api/version")
-                r.raise_for_status()
-
-                return r.json()
-            except Exception as e:
-                log.exception(e)
-                error_detail = "Open WebUI: Server Connection Error"
-                if r is not None:
-                    try:
-                        res = r.json()
-                        if "error" in res:
-                            error_detail = f"Ollama: {res['error']}"
-                    except Exception:
-                        error_detail = f"Ollama: {e}"
-
-                raise HTTPException(
-                    status_code=r.status_code if r else 500,
-                    detail=error_detail,
-                )
+            return await send_request("GET", f"{url}/api/version")
     else:
         return {"version": False}
 
@@ -429,34 +490,14 @@ async def copy_model(
 
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     log.info(f"url: {url}")
-    r = requests.request(
-        method="POST",
-        url=f"{url}/api/copy",
-        headers={"Content-Type": "application/json"},
+    await send_request(
+        "POST",
+        f"{url}/api/copy",
         data=form_data.model_dump_json(exclude_none=True).encode(),
     )
 
-    try:
-        r.raise_for_status()
-
-        log.debug(f"r.text: {r.text}")
-
-        return True
-    except Exception as e:
-        log.exception(e)
-        error_detail = "Open WebUI: Server Connection Error"
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    error_detail = f"Ollama: {res['error']}"
-            except Exception:
-                error_detail = f"Ollama: {e}"
-
-        raise HTTPException(
-            status_code=r.status_code if r else 500,
-            detail=error_detail,
-        )
+    invalidate_models()
+    return True
 
 
 @app.delete("/api/delete")
@@ -478,33 +519,14 @@ async def delete_model(
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     log.info(f"url: {url}")
 
-    r = requests.request(
-        method="DELETE",
-        url=f"{url}/api/delete",
-        headers={"Content-Type": "application/json"},
+    await send_request(
+        "DELETE",
+        f"{url}/api/delete",
         data=form_data.model_dump_json(exclude_none=True).encode(),
     )
-    try:
-        r.raise_for_status()
 
-        log.debug(f"r.text: {r.text}")
-
-        return True
-    except Exception as e:
-        log.exception(e)
-        error_detail = "Open WebUI: Server Connection Error"
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    error_detail = f"Ollama: {res['error']}"
-            except Exception:
-                error_detail = f"Ollama: {e}"
-
-        raise HTTPException(
-            status_code=r.status_code if r else 500,
-            detail=error_detail,
-        )
+    invalidate_models()
+    return True
 
 
 @app.post("/api/show")
@@ -515,35 +537,15 @@ async def show_model_info(form_data: ModelNameForm, user=Depends(get_verified_us
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(app.state.MODELS[form_data.name]["urls"])
+    url_idx = select_url_idx(form_data.name)
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     log.info(f"url: {url}")
 
-    r = requests.request(
-        method="POST",
-        url=f"{url}/api/show",
-        headers={"Content-Type": "application/json"},
+    return await send_request(
+        "POST",
+        f"{url}/api/show",
         data=form_data.model_dump_json(exclude_none=True).encode(),
     )
-    try:
-        r.raise_for_status()
-
-        return r.json()
-    except Exception as e:
-        log.exception(e)
-        error_detail = "Open WebUI: Server Connection Error"
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    error_detail = f"Ollama: {res['error']}"
-            except Exception:
-                error_detail = f"Ollama: {e}"
-
-        raise HTTPException(
-            status_code=r.status_code if r else 500,
-            detail=error_detail,
-        )
 
 
 class GenerateEmbeddingsForm(BaseModel):
@@ -567,7 +569,7 @@ async def generate_embeddings(
             model = f"{model}:latest"
 
         if model in app.state.MODELS:
-            url_idx = random.choice(app.state.MODELS[model]["urls"])
+            url_idx = select_url_idx(model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -577,11 +579,11 @@ async def generate_embeddings(
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     log.info(f"url: {url}")
 
-    r = requests.request(
-        method="POST",
-        url=f"{url}/api/embeddings",
-        headers={"Content-Type": "application/json"},
-        data=form_data.model_dump_json(exclude_none=True).encode(),
+    r = await asyncio.to_thread(
+        post_to_node,
+        url,
+        "/api/embeddings",
+        form_data.model_dump_json(exclude_none=True).encode(),
     )
     try:
         r.raise_for_status()
@@ -617,7 +619,7 @@ def generate_ollama_embeddings(
             model = f"{model}:latest"
 
         if model in app.state.MODELS:
-            url_idx = random.choice(app.state.MODELS[model]["urls"])
+            url_idx = select_url_idx(model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -627,11 +629,8 @@ def generate_ollama_embeddings(
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     log.info(f"url: {url}")
 
-    r = requests.request(
-        method="POST",
-        url=f"{url}/api/embeddings",
-        headers={"Content-Type": "application/json"},
-        data=form_data.model_dump_json(exclude_none=True).encode(),
+    r = post_to_node(
+        url, "/api/embeddings", form_data.model_dump_json(exclude_none=True).encode()
     )
     try:
         r.raise_for_status()
@@ -686,7 +685,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in app.state.MODELS:
-            url_idx = random.choice(app.state.MODELS[model]["urls"])
+            url_idx = select_url_idx(model)
         else:
             raise HTTPException(
                 status_code=400,
@@ -697,7 +696,9 @@ async def generate_completion(
     log.info(f"url: {url}")
 
     return await post_streaming_url(
-        f"{url}/api/generate", form_data.model_dump_json(exclude_none=True).encode()
+        f"{url}/api/generate",
+        form_data.model_dump_json(exclude_none=True).encode(),
+        base_url=url,
     )
 
 
@@ -715,16 +716,17 @@ class GenerateChatCompletionForm(BaseModel):
     template: Optional[str] = None
     stream: Optional[bool] = None
     keep_alive: Optional[Union[int, str]] = None
+    metadata: Optional[dict] = None
 
 
-def get_ollama_url(url_idx: Optional[int], model: str):
+def get_ollama_url(url_idx: Optional[int], model: str, chat_id: Optional[str] = None):
     if url_idx is None:
         if model not in app.state.MODELS:
             raise HTTPException(
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(app.state.MODELS[model]["urls"])
+        url_idx = select_url_idx(model, chat_id)
     url = app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url
 
@@ -741,6 +743,8 @@ async def generate_chat_completion(
     if "metadata" in payload:
         del payload["metadata"]
 
+    chat_id = (form_data.metadata or {}).get("chat_id")
+
     model_id = form_data.model
 
     if app.state.config.ENABLE_MODEL_FILTER:
@@ -750,7 +754,7 @@ async def generate_chat_completion(
                 detail="Model not found",
             )
 
-    model_info = Models.get_model_by_id(model_id)
+    model_info = await Models.get_model_by_id_async(model_id)
 
     if model_info:
         if model_info.base_model_id:
@@ -770,12 +774,15 @@ async def generate_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url = get_ollama_url(url_idx, payload["model"])
+    url = get_ollama_url(url_idx, payload["model"], chat_id)
     log.info(f"url: {url}")
     log.debug(payload)
 
     return await post_streaming_url(
-        f"{url}/api/chat", json.dumps(payload), content_type="application/x-ndjson"
+        f"{url}/api/chat",
+        json.dumps(payload),
+        content_type="application/x-ndjson",
+        base_url=url,
     )
 
 
@@ -811,6 +818,8 @@ async def generate_openai_chat_completion(
     if "metadata" in payload:
         del payload["metadata"]
 
+    chat_id = (form_data.get("metadata") or {}).get("chat_id")
+
     model_id = completion_form.model
 
     if app.state.config.ENABLE_MODEL_FILTER:
@@ -820,7 +829,7 @@ async def generate_openai_chat_completion(
                 detail="Model not found",
             )
 
-    model_info = Models.get_model_by_id(model_id)
+    model_info = await Models.get_model_by_id_async(model_id)
 
     if model_info:
         if model_info.base_model_id:
@@ -835,13 +844,14 @@ async def generate_openai_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url = get_ollama_url(url_idx, payload["model"])
+    url = get_ollama_url(url_idx, payload["model"], chat_id)
     log.info(f"url: {url}")
 
     return await post_streaming_url(
         f"{url}/v1/chat/completions",
         json.dumps(payload),
         stream=payload.get("stream", False),
+        base_url=url,
     )
 
 
@@ -879,40 +889,20 @@ async def get_openai_models(
 
     else:
         url = app.state.config.OLLAMA_BASE_URLS[url_idx]
-        try:
-            r = requests.request(method="GET", url=f"{url}/api/tags")
-            r.raise_for_status()
-
-            models = r.json()
+        models = await send_request("GET", f"{url}/api/tags")
 
-            return {
-                "data": [
-                    {
-                        "id": model["model"],
-                        "object": "model",
-                        "created": int(time.time()),
-                        "owned_by": "openai",
-                    }
-                    for model in models["models"]
-                ],
-                "object": "list",
-            }
-
-        except Exception as e:
-            log.exception(e)
-            error_detail = "Open WebUI: Server Connection Error"
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "error" in res:
-                        error_detail = f"Ollama: {res['error']}"
-                except Exception:
-                    error_detail = f"Ollama: {e}"
-
-            raise HTTPException(
-                status_code=r.status_code if r else 500,
-                detail=error_detail,
-            )
+        return {
+            "data": [
+                {
+                    "id": model["model"],
+                    "object": "model",
+                    "created": int(time.time()),
+                    "owned_by": "openai",
+                }
+                for model in models["models"]
+            ],
+            "object": "list",
+        }
 
 
 class UrlForm(BaseModel):
@@ -951,41 +941,43 @@ async def download_file_stream(
 
     headers = {"Range": f"bytes={current_size}-"} if current_size > 0 else {}
 
-    timeout = aiohttp.ClientTimeout(total=600)  # Set the timeout
-
-    async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-        async with session.get(file_url, headers=headers) as response:
-            total_size = int(response.headers.get("content-length", 0)) + current_size
+    async with HTTP_CLIENT.session.get(
+        file_url, headers=headers, timeout=HTTP_CLIENT.timeout(600)
+    ) as response:
+        total_size = int(response.headers.get("content-length", 0)) + current_size
 
-            with open(file_path, "ab+") as file:
-                async for data in response.content.iter_chunked(chunk_size):
-                    current_size += len(data)
-                    file.write(data)
+        with open(file_path, "ab+") as file:
+            async for data in response.content.iter_chunked(chunk_size):
+                current_size += len(data)
+                file.write(data)
 
-                    done = current_size == total_size
-                    progress = round((current_size / total_size) * 100, 2)
+                done = current_size == total_size
+                progress = round((current_size / total_size) * 100, 2)
 
-                    yield f'data: {{"progress": {progress}, "completed": {current_size}, "total": {total_size}}}\n\n'
+                yield f'data: {{"progress": {progress}, "completed": {current_size}, "total": {total_size}}}\n\n'
 
-                if done:
-                    file.seek(0)
-                    hashed = calculate_sha256(file)
-                    file.seek(0)
+            if done:
+                file.seek(0)
+                hashed = await asyncio.to_thread(calculate_sha256, file)
+                file.seek(0)
 
-                    url = f"{ollama_url}/api/blobs/sha256:{hashed}"
-                    response = requests.post(url, data=file)
+                url = f"{ollama_url}/api/blobs/sha256:{hashed}"
+                async with HTTP_CLIENT.session.post(
+                    url, data=file, timeout=HTTP_CLIENT.timeout(600)
+                ) as response:
+                    ok = response.ok
 
-                    if response.ok:
-                        res = {
-                            "done": done,
-                            "blob": f"sha256:{hashed}",
-                            "name": file_name,
-                        }
-                        os.remove(file_path)
+                if ok:
+                    res = {
+                        "done": done,
+                        "blob": f"sha256:{hashed}",
+                        "name": file_name,
+                    }
+                    os.remove(file_path)
 
-                        yield f"data: {json.dumps(res)}\n\n"
-                    else:
-                        raise "Ollama: Could not create blob, Please try again."
+                    yield f"data: {json.dumps(res)}\n\n"
+                else:
+                    raise "Ollama: Could not create blob, Please try again."
 
 
 # url = "https://huggingface.co/TheBloke/stablelm-zephyr-3b-GGUF/resolve/main/stablelm-zephyr-3b.Q2_K.gguf"
@@ -1069,7 +1061,7 @@ def upload_model(
                     f.seek(0)
 
                     url = f"{ollama_url}/api/blobs/sha256:{hashed}"
-                    response = requests.post(url, data=f)
+                    response = HTTP_CLIENT.sync_session.post(url, data=f)
 
                     if response.ok:
                         res = {
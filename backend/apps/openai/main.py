@@ -2,7 +2,6 @@ from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, FileResponse
 
-import requests
 import aiohttp
 import asyncio
 import json
@@ -21,6 +20,7 @@ from utils.misc import (
     apply_model_params_to_body_openai,
     apply_model_system_prompt_to_body,
 )
+from utils.registry import invalidate_models, record_upstream_response
 
 from config import (
     SRC_LOG_LEVELS,
@@ -34,6 +34,14 @@ from config import (
     AppConfig,
     CORS_ALLOW_ORIGIN,
 )
+from utils.breaker import CircuitBreakers
+from utils.http import HTTP_CLIENT
+from utils.singleflight import SINGLEFLIGHT
+from env import (
+    OPENAI_BREAKER_FAILURES,
+    OPENAI_BREAKER_RECOVERY_SECONDS,
+    OPENAI_FAILOVER_ATTEMPTS,
+)
 from typing import Optional, Literal, overload
 
 
@@ -64,6 +72,11 @@ app.state.config.OPENAI_API_KEYS = OPENAI_API_KEYS
 
 app.state.MODELS = {}
 
+app.state.BREAKERS = CircuitBreakers(
+    failure_threshold=OPENAI_BREAKER_FAILURES,
+    recovery_seconds=OPENAI_BREAKER_RECOVERY_SECONDS,
+)
+
 
 @app.middleware("http")
 async def check_url(request: Request, call_next):
@@ -86,6 +99,7 @@ class OpenAIConfigForm(BaseModel):
 @app.post("/config/update")
 async def update_config(form_data: OpenAIConfigForm, user=Depends(get_admin_user)):
     app.state.config.ENABLE_OPENAI_API = form_data.enable_openai_api
+    invalidate_models()
     return {"ENABLE_OPENAI_API": app.state.config.ENABLE_OPENAI_API}
 
 
@@ -106,9 +120,15 @@ async def get_openai_urls(user=Depends(get_admin_user)):
 async def update_openai_urls(form_data: UrlsUpdateForm, user=Depends(get_admin_user)):
     await get_all_models()
     app.state.config.OPENAI_API_BASE_URLS = form_data.urls
+    invalidate_models()
     return {"OPENAI_API_BASE_URLS": app.state.config.OPENAI_API_BASE_URLS}
 
 
+@app.get("/breakers")
+async def get_breakers(user=Depends(get_admin_user)):
+    return app.state.BREAKERS.stats(app.state.config.OPENAI_API_BASE_URLS)
+
+
 @app.get("/keys")
 async def get_openai_keys(user=Depends(get_admin_user)):
     return {"OPENAI_API_KEYS": app.state.config.OPENAI_API_KEYS}
@@ -117,6 +137,7 @@ async def get_openai_keys(user=Depends(get_admin_user)):
 @app.post("/keys/update")
 async def update_openai_key(form_data: KeysUpdateForm, user=Depends(get_admin_user)):
     app.state.config.OPENAI_API_KEYS = form_data.keys
+    invalidate_models()
     return {"OPENAI_API_KEYS": app.state.config.OPENAI_API_KEYS}
 
 
@@ -144,20 +165,21 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             headers["HTTP-Referer"] = "https://openwebui.com/"
             headers["X-Title"] = "Open WebUI"
         r = None
+        error_body = b""
         try:
-            r = requests.post(
+            async with HTTP_CLIENT.session.post(
                 url=f"{app.state.config.OPENAI_API_BASE_URLS[idx]}/audio/speech",
                 data=body,
                 headers=headers,
-                stream=True,
-            )
-
-            r.raise_for_status()
+            ) as r:
+                if not r.ok:
+                    error_body = await r.read()
+                r.raise_for_status()
 
-            # Save the streaming content to a file
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                # Save the streaming content to a file
+                with open(file_path, "wb") as f:
+                    async for chunk in r.content.iter_chunked(8192):
+                        f.write(chunk)
 
             with open(file_body_path, "w") as f:
                 json.dump(json.loads(body.decode("utf-8")), f)
@@ -170,14 +192,14 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             error_detail = "Open WebUI: Server Connection Error"
             if r is not None:
                 try:
-                    res = r.json()
+                    res = json.loads(error_body)
                     if "error" in res:
                         error_detail = f"External: {res['error']}"
                 except Exception:
                     error_detail = f"External: {e}"
 
             raise HTTPException(
-                status_code=r.status_code if r else 500, detail=error_detail
+                status_code=r.status if r is not None else 500, detail=error_detail
             )
 
     except ValueError:
@@ -185,51 +207,55 @@ async def speech(request: Request, user=Depends(get_verified_user)):
 
 
 async def fetch_url(url, key):
-    timeout = aiohttp.ClientTimeout(total=5)
-    try:
-        headers = {"Authorization": f"Bearer {key}"}
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(url, headers=headers) as response:
+    async def fetch():
+        try:
+            headers = {"Authorization": f"Bearer {key}"}
+            async with HTTP_CLIENT.session.get(
+                url, headers=headers, timeout=HTTP_CLIENT.timeout(5)
+            ) as response:
                 return await response.json()
-    except Exception as e:
-        # Handle connection error here
-        log.error(f"Connection error: {e}")
-        return None
+        except Exception as e:
+            # Handle connection error here
+            log.error(f"Connection error: {e}")
+            return None
 
+    # Concurrent model list requests share one upstream call; the key is hashed
+    return await SINGLEFLIGHT.do("openai", [url, key], fetch)
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
+
+async def cleanup_response(response: Optional[aiohttp.ClientResponse]):
     if response:
-        response.close()
-    if session:
-        await session.close()
+        response.release()
 
 
 def merge_models_lists(model_lists):
     log.debug(f"merge_models_lists {model_lists}")
-    merged_list = []
+    merged_models = {}
 
     for idx, models in enumerate(model_lists):
         if models is not None and "error" not in models:
-            merged_list.extend(
-                [
-                    {
+            for model in models:
+                if (
+                    "api.openai.com" in app.state.config.OPENAI_API_BASE_URLS[idx]
+                    and "gpt" not in model["id"]
+                ):
+                    continue
+
+                # A model served by several connections is listed once, with
+                # every connection in "urlIdxs" in the order they are configured
+                if model["id"] in merged_models:
+                    merged_models[model["id"]]["urlIdxs"].append(idx)
+                else:
+                    merged_models[model["id"]] = {
                         **model,
                         "name": model.get("name", model["id"]),
                         "owned_by": "openai",
                         "openai": model,
                         "urlIdx": idx,
+                        "urlIdxs": [idx],
                     }
-                    for model in models
-                    if "api.openai.com"
-                    not in app.state.config.OPENAI_API_BASE_URLS[idx]
-                    or "gpt" in model["id"]
-                ]
-            )
 
-    return merged_list
+    return list(merged_models.values())
 
 
 def is_openai_api_disabled():
@@ -290,6 +316,13 @@ async def get_all_models(raw=False) -> dict[str, list] | list:
             return response
         return None
 
+    for url, response in zip(app.state.config.OPENAI_API_BASE_URLS, responses):
+        if extract_data(response) is None:
+            error = response.get("error") if isinstance(response, dict) else None
+            record_upstream_response("openai", url, str(error or "No models returned"))
+        else:
+            record_upstream_response("openai", url)
+
     models = {"data": merge_models_lists(map(extract_data, responses))}
 
     log.debug(f"models: {models}")
@@ -322,12 +355,14 @@ async def get_models(url_idx: Optional[int] = None, user=Depends(get_verified_us
         headers["Content-Type"] = "application/json"
 
         r = None
+        body = b""
 
         try:
-            r = requests.request(method="GET", url=f"{url}/models", headers=headers)
-            r.raise_for_status()
+            async with HTTP_CLIENT.session.get(f"{url}/models", headers=headers) as r:
+                body = await r.read()
+                r.raise_for_status()
 
-            response_data = r.json()
+            response_data = json.loads(body)
             if "api.openai.com" in url:
                 response_data["data"] = list(
                     filter(lambda model: "gpt" in model["id"], response_data["data"])
@@ -339,18 +374,88 @@ async def get_models(url_idx: Optional[int] = None, user=Depends(get_verified_us
             error_detail = "Open WebUI: Server Connection Error"
             if r is not None:
                 try:
-                    res = r.json()
+                    res = json.loads(body)
                     if "error" in res:
                         error_detail = f"External: {res['error']}"
                 except Exception:
                     error_detail = f"External: {e}"
 
             raise HTTPException(
-                status_code=r.status_code if r else 500,
+                status_code=r.status if r is not None else 500,
                 detail=error_detail,
             )
 
 
+def get_headers(idx: int) -> dict:
+    headers = {}
+    headers["Authorization"] = f"Bearer {app.state.config.OPENAI_API_KEYS[idx]}"
+    headers["Content-Type"] = "application/json"
+    if "openrouter.ai" in app.state.config.OPENAI_API_BASE_URLS[idx]:
+        headers["HTTP-Referer"] = "https://openwebui.com/"
+        headers["X-Title"] = "Open WebUI"
+    return headers
+
+
+async def post_with_failover(
+    url_idxs: list[int], path: str, payload: str
+) -> aiohttp.ClientResponse:
+    """
+    POST `payload` to the first connection in `url_idxs` that answers. Connections
+    whose circuit is open are skipped; on a connection error, a server error or
+    a 429 the next one is tried, up to OPENAI_FAILOVER_ATTEMPTS requests. Only
+    requests that got no usable response are retried, so a stream is never
+    sent twice. The last error response is returned when every attempt failed.
+    """
+    r = None
+    attempts = 0
+
+    for idx in url_idxs:
+        if attempts >= OPENAI_FAILOVER_ATTEMPTS:
+            break
+
+        url = app.state.config.OPENAI_API_BASE_URLS[idx]
+        breaker = app.state.BREAKERS.get(url)
+        if not breaker.allow():
+            continue
+
+        if r is not None:
+            r.release()
+            r = None
+        if attempts > 0:
+            log.warning(f"Failing over to {url}{path}")
+        attempts += 1
+
+        try:
+            r = await HTTP_CLIENT.session.request(
+                method="POST",
+                url=f"{url}{path}",
+                data=payload,
+                headers=get_headers(idx),
+                timeout=HTTP_CLIENT.timeout(AIOHTTP_CLIENT_TIMEOUT),
+            )
+        except Exception as e:
+            log.warning(f"Request to {url}{path} failed: {e}")
+            breaker.record_failure(str(e) or type(e).__name__)
+            continue
+
+        if r.status >= 500:
+            breaker.record_failure(f"{r.status} {r.reason}")
+        else:
+            breaker.record_success()
+            if r.status != 429:
+                return r
+
+    if r is not None:
+        return r
+
+    if attempts == 0:
+        raise HTTPException(
+            status_code=503,
+            detail="Open WebUI: Every connection serving this model is unavailable",
+        )
+    raise HTTPException(status_code=500, detail="Open WebUI: Server Connection Error")
+
+
 @app.post("/chat/completions")
 @app.post("/chat/completions/{url_idx}")
 async def generate_chat_completion(
@@ -358,14 +463,13 @@ async def generate_chat_completion(
     url_idx: Optional[int] = None,
     user=Depends(get_verified_user),
 ):
-    idx = 0
     payload = {**form_data}
 
     if "metadata" in payload:
         del payload["metadata"]
 
     model_id = form_data.get("model")
-    model_info = Models.get_model_by_id(model_id)
+    model_info = await Models.get_model_by_id_async(model_id)
 
     if model_info:
         if model_info.base_model_id:
@@ -376,7 +480,7 @@ async def generate_chat_completion(
         payload = apply_model_system_prompt_to_body(params, payload, user)
 
     model = app.state.MODELS[payload.get("model")]
-    idx = model["urlIdx"]
+    url_idxs = [url_idx] if url_idx is not None else model["urlIdxs"]
 
     if "pipeline" in model and model.get("pipeline"):
         payload["user"] = {
@@ -391,31 +495,10 @@ async def generate_chat_completion(
 
     log.debug(payload)
 
-    url = app.state.config.OPENAI_API_BASE_URLS[idx]
-    key = app.state.config.OPENAI_API_KEYS[idx]
-
-    headers = {}
-    headers["Authorization"] = f"Bearer {key}"
-    headers["Content-Type"] = "application/json"
-    if "openrouter.ai" in app.state.config.OPENAI_API_BASE_URLS[idx]:
-        headers["HTTP-Referer"] = "https://openwebui.com/"
-        headers["X-Title"] = "Open WebUI"
-
-    r = None
-    session = None
+    r = await post_with_failover(url_idxs, "/chat/completions", payload)
     streaming = False
 
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-        r = await session.request(
-            method="POST",
-            url=f"{url}/chat/completions",
-            data=payload,
-            headers=headers,
-        )
-
         r.raise_for_status()
 
         # Check if response is SSE
@@ -425,9 +508,7 @@ async def generate_chat_completion(
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             response_data = await r.json()
@@ -445,10 +526,8 @@ async def generate_chat_completion(
                 error_detail = f"External: {e}"
         raise HTTPException(status_code=r.status if r else 500, detail=error_detail)
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming and r:
+            r.release()
 
 
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -467,12 +546,10 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     headers["Content-Type"] = "application/json"
 
     r = None
-    session = None
     streaming = False
 
     try:
-        session = aiohttp.ClientSession(trust_env=True)
-        r = await session.request(
+        r = await HTTP_CLIENT.session.request(
             method=request.method,
             url=target_url,
             data=body,
@@ -488,9 +565,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
                 r.content,
                 status_code=r.status,
                 headers=dict(r.headers),
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(cleanup_response, response=r),
             )
         else:
             response_data = await r.json()
@@ -508,7 +583,5 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
                 error_detail = f"External: {e}"
         raise HTTPException(status_code=r.status if r else 500, detail=error_detail)
     finally:
-        if not streaming and session:
-            if r:
-                r.close()
-            await session.close()
+        if not streaming and r:
+            r.release()
@@ -322,29 +322,30 @@ async def update_embedding_config(
         f"Updating embedding model: {app.state.config.RAG_EMBEDDING_MODEL} to {form_data.embedding_model}"
     )
     try:
-        app.state.config.RAG_EMBEDDING_ENGINE = form_data.embedding_engine
-        app.state.config.RAG_EMBEDDING_MODEL = form_data.embedding_model
-
-        if app.state.config.RAG_EMBEDDING_ENGINE in ["ollama", "openai"]:
-            if form_data.openai_config is not None:
-                app.state.config.OPENAI_API_BASE_URL = form_data.openai_config.url
-                app.state.config.OPENAI_API_KEY = form_data.openai_config.key
-                app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE = (
-                    form_data.openai_config.batch_size
-                    if form_data.openai_config.batch_size
-                    else 1
-                )
+        with app.state.config.transaction():
+            app.state.config.RAG_EMBEDDING_ENGINE = form_data.embedding_engine
+            app.state.config.RAG_EMBEDDING_MODEL = form_data.embedding_model
+
+            if app.state.config.RAG_EMBEDDING_ENGINE in ["ollama", "openai"]:
+                if form_data.openai_config is not None:
+                    app.state.config.OPENAI_API_BASE_URL = form_data.openai_config.url
+                    app.state.config.OPENAI_API_KEY = form_data.openai_config.key
+                    app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE = (
+                        form_data.openai_config.batch_size
+                        if form_data.openai_config.batch_size
+                        else 1
+                    )
 
-        update_embedding_model(app.state.config.RAG_EMBEDDING_MODEL)
+            update_embedding_model(app.state.config.RAG_EMBEDDING_MODEL)
 
-        app.state.EMBEDDING_FUNCTION = get_embedding_function(
-            app.state.config.RAG_EMBEDDING_ENGINE,
-            app.state.config.RAG_EMBEDDING_MODEL,
-            app.state.sentence_transformer_ef,
-            app.state.config.OPENAI_API_KEY,
-            app.state.config.OPENAI_API_BASE_URL,
-            app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
-        )
+            app.state.EMBEDDING_FUNCTION = get_embedding_function(
+                app.state.config.RAG_EMBEDDING_ENGINE,
+                app.state.config.RAG_EMBEDDING_MODEL,
+                app.state.sentence_transformer_ef,
+                app.state.config.OPENAI_API_KEY,
+                app.state.config.OPENAI_API_BASE_URL,
+                app.state.config.RAG_EMBEDDING_OPENAI_BATCH_SIZE,
+            )
 
         return {
             "status": True,
@@ -486,53 +487,62 @@ class ConfigUpdateForm(BaseModel):
 
 @app.post("/config/update")
 async def update_rag_config(form_data: ConfigUpdateForm, user=Depends(get_admin_user)):
-    app.state.config.PDF_EXTRACT_IMAGES = (
-        form_data.pdf_extract_images
-        if form_data.pdf_extract_images is not None
-        else app.state.config.PDF_EXTRACT_IMAGES
-    )
+    with app.state.config.transaction():
+        app.state.config.PDF_EXTRACT_IMAGES = (
+            form_data.pdf_extract_images
+            if form_data.pdf_extract_images is not None
+            else app.state.config.PDF_EXTRACT_IMAGES
+        )
 
-    if form_data.file is not None:
-        app.state.config.FILE_MAX_SIZE = form_data.file.max_size
-        app.state.config.FILE_MAX_COUNT = form_data.file.max_count
+        if form_data.file is not None:
+            app.state.config.FILE_MAX_SIZE = form_data.file.max_size
+            app.state.config.FILE_MAX_COUNT = form_data.file.max_count
 
-    if form_data.content_extraction is not None:
-        log.info(f"Updating text settings: {form_data.content_extraction}")
-        app.state.config.CONTENT_EXTRACTION_ENGINE = form_data.content_extraction.engine
-        app.state.config.TIKA_SERVER_URL = form_data.content_extraction.tika_server_url
+        if form_data.content_extraction is not None:
+            log.info(f"Updating text settings: {form_data.content_extraction}")
+            app.state.config.CONTENT_EXTRACTION_ENGINE = (
+                form_data.content_extraction.engine
+            )
+            app.state.config.TIKA_SERVER_URL = (
+                form_data.content_extraction.tika_server_url
+            )
 
-    if form_data.chunk is not None:
-        app.state.config.CHUNK_SIZE = form_data.chunk.chunk_size
-        app.state.config.CHUNK_OVERLAP = form_data.chunk.chunk_overlap
+        if form_data.chunk is not None:
+            app.state.config.CHUNK_SIZE = form_data.chunk.chunk_size
+            app.state.config.CHUNK_OVERLAP = form_data.chunk.chunk_overlap
 
-    if form_data.youtube is not None:
-        app.state.config.YOUTUBE_LOADER_LANGUAGE = form_data.youtube.language
-        app.state.YOUTUBE_LOADER_TRANSLATION = form_data.youtube.translation
+        if form_data.youtube is not None:
+            app.state.config.YOUTUBE_LOADER_LANGUAGE = form_data.youtube.language
+            app.state.YOUTUBE_LOADER_TRANSLATION = form_data.youtube.translation
 
-    if form_data.web is not None:
-        app.state.config.ENABLE_RAG_WEB_LOADER_SSL_VERIFICATION = (
-            form_data.web.web_loader_ssl_verification
-        )
+        if form_data.web is not None:
+            app.state.config.ENABLE_RAG_WEB_LOADER_SSL_VERIFICATION = (
+                form_data.web.web_loader_ssl_verification
+            )
 
-        app.state.config.ENABLE_RAG_WEB_SEARCH = form_data.web.search.enabled
-        app.state.config.RAG_WEB_SEARCH_ENGINE = form_data.web.search.engine
-        app.state.config.SEARXNG_QUERY_URL = form_data.web.search.searxng_query_url
-        app.state.config.GOOGLE_PSE_API_KEY = form_data.web.search.google_pse_api_key
-        app.state.config.GOOGLE_PSE_ENGINE_ID = (
-            form_data.web.search.google_pse_engine_id
-        )
-        app.state.config.BRAVE_SEARCH_API_KEY = (
-            form_data.web.search.brave_search_api_key
-        )
-        app.state.config.SERPSTACK_API_KEY = form_data.web.search.serpstack_api_key
-        app.state.config.SERPSTACK_HTTPS = form_data.web.search.serpstack_https
-        app.state.config.SERPER_API_KEY = form_data.web.search.serper_api_key
-        app.state.config.SERPLY_API_KEY = form_data.web.search.serply_api_key
-        app.state.config.TAVILY_API_KEY = form_data.web.search.tavily_api_key
-        app.state.config.RAG_WEB_SEARCH_RESULT_COUNT = form_data.web.search.result_count
-        app.state.config.RAG_WEB_SEARCH_CONCURRENT_REQUESTS = (
-            form_data.web.search.concurrent_requests
-        )
+            app.state.config.ENABLE_RAG_WEB_SEARCH = form_data.web.search.enabled
+            app.state.config.RAG_WEB_SEARCH_ENGINE = form_data.web.search.engine
+            app.state.config.SEARXNG_QUERY_URL = form_data.web.search.searxng_query_url
+            app.state.config.GOOGLE_PSE_API_KEY = (
+                form_data.web.search.google_pse_api_key
+            )
+            app.state.config.GOOGLE_PSE_ENGINE_ID = (
+                form_data.web.search.google_pse_engine_id
+            )
+            app.state.config.BRAVE_SEARCH_API_KEY = (
+                form_data.web.search.brave_search_api_key
+            )
+            app.state.config.SERPSTACK_API_KEY = form_data.web.search.serpstack_api_key
+            app.state.config.SERPSTACK_HTTPS = form_data.web.search.serpstack_https
+            app.state.config.SERPER_API_KEY = form_data.web.search.serper_api_key
+            app.state.config.SERPLY_API_KEY = form_data.web.search.serply_api_key
+            app.state.config.TAVILY_API_KEY = form_data.web.search.tavily_api_key
+            app.state.config.RAG_WEB_SEARCH_RESULT_COUNT = (
+                form_data.web.search.result_count
+            )
+            app.state.config.RAG_WEB_SEARCH_CONCURRENT_REQUESTS = (
+                form_data.web.search.concurrent_requests
+            )
 
     return {
         "status": True,
@@ -604,14 +614,15 @@ class QuerySettingsForm(BaseModel):
 async def update_query_settings(
     form_data: QuerySettingsForm, user=Depends(get_admin_user)
 ):
-    app.state.config.RAG_TEMPLATE = (
-        form_data.template if form_data.template else RAG_TEMPLATE
-    )
-    app.state.config.TOP_K = form_data.k if form_data.k else 4
-    app.state.config.RELEVANCE_THRESHOLD = form_data.r if form_data.r else 0.0
-    app.state.config.ENABLE_RAG_HYBRID_SEARCH = (
-        form_data.hybrid if form_data.hybrid else False
-    )
+    with app.state.config.transaction():
+        app.state.config.RAG_TEMPLATE = (
+            form_data.template if form_data.template else RAG_TEMPLATE
+        )
+        app.state.config.TOP_K = form_data.k if form_data.k else 4
+        app.state.config.RELEVANCE_THRESHOLD = form_data.r if form_data.r else 0.0
+        app.state.config.ENABLE_RAG_HYBRID_SEARCH = (
+            form_data.hybrid if form_data.hybrid else False
+        )
 
     return {
         "status": True,
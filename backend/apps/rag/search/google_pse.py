@@ -1,10 +1,10 @@
 import json
 import logging
 from typing import Optional
-import requests
 
 from apps.rag.search.main import SearchResult, get_filtered_results
 from config import SRC_LOG_LEVELS
+from utils.http import HTTP_CLIENT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -34,7 +34,9 @@ def search_google_pse(
         "num": count,
     }
 
-    response = requests.request("GET", url, headers=headers, params=params)
+    response = HTTP_CLIENT.sync_session.request(
+        "GET", url, headers=headers, params=params
+    )
     response.raise_for_status()
 
     json_response = response.json()
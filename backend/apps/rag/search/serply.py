@@ -1,11 +1,11 @@
 import json
 import logging
 from typing import Optional
-import requests
 from urllib.parse import urlencode
 
 from apps.rag.search.main import SearchResult, get_filtered_results
 from config import SRC_LOG_LEVELS
+from utils.http import HTTP_CLIENT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -49,7 +49,7 @@ def search_serply(
         "X-Proxy-Location": proxy_location,
     }
 
-    response = requests.request("GET", url, headers=headers)
+    response = HTTP_CLIENT.sync_session.request("GET", url, headers=headers)
     response.raise_for_status()
 
     json_response = response.json()
@@ -1,9 +1,9 @@
 import logging
 
-import requests
 
 from apps.rag.search.main import SearchResult
 from config import SRC_LOG_LEVELS
+from utils.http import HTTP_CLIENT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -22,7 +22,7 @@ def search_tavily(api_key: str, query: str, count: int) -> list[SearchResult]:
     url = "https://api.tavily.com/search"
     data = {"query": query, "api_key": api_key}
 
-    response = requests.post(url, json=data)
+    response = HTTP_CLIENT.sync_session.post(url, json=data)
     response.raise_for_status()
 
     json_response = response.json()
@@ -1,6 +1,5 @@
 import os
 import logging
-import requests
 
 from typing import Union
 
@@ -22,6 +21,7 @@ from typing import Optional
 
 from utils.misc import get_last_user_message, add_or_update_system_message
 from config import SRC_LOG_LEVELS, CHROMA_CLIENT
+from utils.http import HTTP_CLIENT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -380,7 +380,7 @@ def generate_openai_batch_embeddings(
     model: str, texts: list[str], key: str, url: str = "https://api.openai.com/v1"
 ) -> Optional[list[list[float]]]:
     try:
-        r = requests.post(
+        r = HTTP_CLIENT.sync_session.post(
             f"{url}/embeddings",
             headers={
                 "Content-Type": "application/json",
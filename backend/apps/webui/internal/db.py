@@ -1,21 +1,37 @@
 import os
+import asyncio
+import functools
 import logging
-import json
-from contextlib import contextmanager
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
 
 
 from typing import Optional, Any
 from typing_extensions import Self
 
-from sqlalchemy import create_engine, types, Dialect
+from sqlalchemy import create_engine, event, exc, types, Dialect
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.sql.type_api import _T
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 
 from peewee_migrate import Router
 from apps.webui.internal.wrappers import register_connection
-from env import SRC_LOG_LEVELS, BACKEND_DIR, DATABASE_URL
+from utils import codec
+from env import (
+    SRC_LOG_LEVELS,
+    BACKEND_DIR,
+    DATABASE_URL,
+    DATABASE_SQLITE_PRAGMAS,
+    DATABASE_POOL_SIZE,
+    DATABASE_POOL_MAX_OVERFLOW,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["DB"])
@@ -26,21 +42,37 @@ class JSONField(types.TypeDecorator):
     cache_ok = True
 
     def process_bind_param(self, value: Optional[_T], dialect: Dialect) -> Any:
-        return json.dumps(value)
+        return codec.dumps(value)
 
     def process_result_value(self, value: Optional[_T], dialect: Dialect) -> Any:
         if value is not None:
-            return json.loads(value)
+            return codec.loads(value)
 
     def copy(self, **kw: Any) -> Self:
         return JSONField(self.impl.length)
 
     def db_value(self, value):
-        return json.dumps(value)
+        return codec.dumps(value)
 
     def python_value(self, value):
         if value is not None:
-            return json.loads(value)
+            return codec.loads(value)
+
+
+class CompressedText(types.TypeDecorator):
+    """Text that is compressed at rest once it reaches CHAT_COMPRESSION_THRESHOLD."""
+
+    impl = types.Text
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect: Dialect) -> Any:
+        return codec.compress(value)
+
+    def process_result_value(self, value: Optional[str], dialect: Dialect) -> Any:
+        return codec.decompress(value)
+
+    def copy(self, **kw: Any) -> Self:
+        return CompressedText(self.impl.length)
 
 
 # Workaround to handle the peewee migration
@@ -70,13 +102,154 @@ def handle_peewee_migration(DATABASE_URL):
 handle_peewee_migration(DATABASE_URL)
 
 
+####################################
+# Connection Pool
+####################################
+
+
+class PoolMetrics:
+    """
+    Counters for a connection pool, fed by the instrumented pool classes below
+    and reported alongside the pool's live state by `get_pool_status`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_checkout(self, wait_time: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def stats(self) -> dict:
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_time_avg_ms": (
+                self.wait_time_total / self.checkouts * 1000 if self.checkouts else 0.0
+            ),
+            "wait_time_max_ms": self.wait_time_max * 1000,
+        }
+
+
+@functools.cache
+def instrumented_pool(pool_class):
+    # SQLAlchemy has no event for the time spent waiting on a free connection,
+    # so it is measured around the pool's checkout itself.
+    class InstrumentedPool(pool_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.metrics = PoolMetrics()
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                self.metrics.record_timeout()
+                raise
+            self.metrics.record_checkout(time.perf_counter() - start)
+            return connection
+
+        def recreate(self):
+            pool = super().recreate()
+            pool.metrics = self.metrics
+            return pool
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+def is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def get_pool_class(url: str, pool_class):
+    """
+    `pool_class`, instrumented. In-memory SQLite keeps SQLAlchemy's default
+    pool, which shares one connection: every new connection would open
+    another, empty database.
+    """
+    url = make_url(url)
+    if is_memory_sqlite(url):
+        pool_class = url.get_dialect().get_pool_class(url)
+    return instrumented_pool(pool_class)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in DATABASE_SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def setup_engine_events(engine):
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+
+    metrics = getattr(engine.pool, "metrics", None)
+    if metrics is not None:
+        event.listen(engine, "connect", lambda *args: metrics.record_connect())
+
+
+def get_pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "timeout": pool.timeout(),
+            }
+        )
+    if hasattr(pool, "metrics"):
+        status.update(pool.metrics.stats())
+    return status
+
+
+POOL_OPTIONS = {
+    "pool_size": DATABASE_POOL_SIZE,
+    "max_overflow": DATABASE_POOL_MAX_OVERFLOW,
+    "pool_timeout": DATABASE_POOL_TIMEOUT,
+    "pool_recycle": DATABASE_POOL_RECYCLE,
+}
+
+
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 if "sqlite" in SQLALCHEMY_DATABASE_URL:
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=get_pool_class(SQLALCHEMY_DATABASE_URL, QueuePool),
     )
 else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_pre_ping=True,
+        poolclass=get_pool_class(SQLALCHEMY_DATABASE_URL, QueuePool),
+        **POOL_OPTIONS,
+    )
+setup_engine_events(engine)
 
 
 SessionLocal = sessionmaker(
@@ -95,3 +268,81 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+####################################
+# Async Engine
+####################################
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> Optional[str]:
+    scheme, sep, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme)
+    if not sep or driver is None:
+        return None
+
+    if driver == "postgresql+asyncpg":
+        # asyncpg does not understand libpq's sslmode parameter
+        rest = rest.replace("sslmode=", "ssl=")
+    return f"{driver}://{rest}"
+
+
+async_engine = None
+ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+if ASYNC_DATABASE_URL:
+    try:
+        if "sqlite" in ASYNC_DATABASE_URL:
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                poolclass=get_pool_class(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool),
+            )
+        else:
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                pool_pre_ping=True,
+                poolclass=get_pool_class(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool),
+                **POOL_OPTIONS,
+            )
+        setup_engine_events(async_engine.sync_engine)
+    except ImportError as e:
+        log.warning(f"Async database driver unavailable, using threads instead: {e}")
+else:
+    log.info("No async driver for the configured database, using threads instead")
+
+
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine
+    else None
+)
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_async_db = asynccontextmanager(get_async_session)
+
+
+def async_variant(method):
+    """
+    Marks `<name>_async` as the non-blocking counterpart of the `<name>` table
+    method. When no async engine is available the sync method is run in a
+    worker thread instead, so callers can always await the `_async` variant.
+    """
+    sync_name = method.__name__.removesuffix("_async")
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if async_engine is None:
+            return await asyncio.to_thread(getattr(self, sync_name), *args, **kwargs)
+        return await method(self, *args, **kwargs)
+
+    return wrapper
@@ -27,6 +27,7 @@ from utils.misc import (
 )
 
 from utils.tools import get_tools
+from utils import codec
 
 from config import (
     SHOW_ADMIN_DETAILS,
@@ -61,7 +62,7 @@ import logging
 from typing import Iterator, Generator, AsyncGenerator
 from pydantic import BaseModel
 
-app = FastAPI()
+app = FastAPI(default_response_class=codec.JSONResponse)
 
 log = logging.getLogger(__name__)
 
@@ -102,6 +103,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -147,7 +149,7 @@ def get_function_module(pipe_id: str):
 
 
 async def get_pipe_models():
-    pipes = Functions.get_functions_by_type("pipe", active_only=True)
+    pipes = await Functions.get_functions_by_type_async("pipe", active_only=True)
     pipe_models = []
 
     for pipe in pipes:
@@ -271,7 +273,7 @@ def get_function_params(function_module, form_data, user, extra_params=None):
 
 async def generate_function_chat_completion(form_data, user):
     model_id = form_data.get("model")
-    model_info = Models.get_model_by_id(model_id)
+    model_info = await Models.get_model_by_id_async(model_id)
 
     metadata = form_data.pop("metadata", {})
 
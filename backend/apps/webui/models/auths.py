@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Callable, Optional
 import uuid
 import logging
 from sqlalchemy import String, Column, Boolean, Text
@@ -186,12 +186,14 @@ class AuthsTable:
         except Exception:
             return False
 
-    def delete_auth_by_id(self, id: str) -> bool:
+    def delete_auth_by_id(
+        self, id: str, progress: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
         try:
             with get_db() as db:
 
                 # Delete User
-                result = Users.delete_user_by_id(id)
+                result = Users.delete_user_by_id(id, progress=progress)
 
                 if result:
                     db.query(Auth).filter_by(id=id).delete()
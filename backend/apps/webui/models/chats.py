@@ -1,13 +1,55 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Union, Optional
+from typing import Callable, Iterator, Union, Optional
 
-import json
+import base64
+import functools
+import logging
+import re
 import uuid
 import time
 
-from sqlalchemy import Column, String, BigInteger, Boolean, Text
-
-from apps.webui.internal.db import Base, get_db
+from sqlalchemy import (
+    Column,
+    String,
+    BigInteger,
+    Boolean,
+    Text,
+    Index,
+    TextClause,
+    bindparam,
+    delete,
+    func,
+    inspect,
+    literal,
+    select,
+    text,
+    tuple_,
+    type_coerce,
+    update,
+)
+
+from apps.webui.internal.db import (
+    Base,
+    CompressedText,
+    JSONField,
+    engine,
+    get_db,
+    get_async_db,
+    async_variant,
+)
+from apps.webui.models.tags import ChatIdTag
+from utils import codec
+from utils.cache import TTLCache
+
+from env import (
+    CHAT_STORAGE_MODE,
+    CHAT_DELETE_BATCH_SIZE,
+    CHAT_BRANCH_CACHE_SIZE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 
 ####################
@@ -21,7 +63,7 @@ class Chat(Base):
     id = Column(String, primary_key=True)
     user_id = Column(String)
     title = Column(Text)
-    chat = Column(Text)  # Save Chat JSON as Text
+    chat = Column(CompressedText)  # Save Chat JSON as (compressed) Text
 
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
@@ -29,6 +71,31 @@ class Chat(Base):
     share_id = Column(Text, unique=True, nullable=True)
     archived = Column(Boolean, default=False)
 
+    # Whether the history messages live in chat_message rather than in `chat`
+    message_storage = Column(Boolean, default=False)
+
+    __table_args__ = (
+        Index(
+            "chat_user_id_archived_updated_at_id_idx",
+            "user_id",
+            "archived",
+            "updated_at",
+            "id",
+        ),
+    )
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    parent_id = Column(String, nullable=True)
+    message = Column(JSONField)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -76,7 +143,435 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+class ChatSearchResponse(ChatTitleIdResponse):
+    score: float
+    snippet: Optional[str] = None
+
+
+class ChatMessagesResponse(BaseModel):
+    id: str
+    user_id: str
+    title: str
+    chat: dict  # the chat without its messages
+    messages: list[dict]  # a range of the active branch, oldest first
+    total: int  # number of messages on the active branch
+    has_more: bool  # whether earlier messages precede this range
+    updated_at: int
+    created_at: int
+    share_id: Optional[str] = None
+    archived: bool
+
+
+####################
+# Message Storage
+####################
+
+
+def split_chat(chat: dict) -> tuple[dict, Optional[dict]]:
+    """
+    Split a chat into the chat without its messages and the history messages
+    keyed by id. Chats without a message history are not split.
+    """
+    history = chat.get("history")
+    if not isinstance(history, dict) or not isinstance(history.get("messages"), dict):
+        return chat, None
+
+    skeleton = {key: value for key, value in chat.items() if key != "messages"}
+    skeleton["history"] = {
+        key: value for key, value in history.items() if key != "messages"
+    }
+    return skeleton, history["messages"]
+
+
+def get_message_list(messages: dict, message_id: Optional[str]) -> list[dict]:
+    """Walk from `message_id` up to the root, returning the branch in order."""
+    message_list = []
+    while message_id in messages and len(message_list) < len(messages):
+        message = messages[message_id]
+        message_list.append(message)
+        message_id = message.get("parentId")
+    return message_list[::-1]
+
+
+def get_branch_ids(parent_ids: dict[str, Optional[str]], message_id) -> list[str]:
+    """Like `get_message_list`, for a map of message ids to parent ids."""
+    branch_ids = []
+    while message_id in parent_ids and len(branch_ids) < len(parent_ids):
+        branch_ids.append(message_id)
+        message_id = parent_ids[message_id]
+    return branch_ids[::-1]
+
+
+def get_branch_range(
+    branch_ids: list[str], limit: Optional[int], before: Optional[str]
+) -> tuple[int, int]:
+    """
+    The slice of the branch holding the last `limit` messages before the
+    message `before` (or the end of the branch). Raises ValueError if `before`
+    is not on the branch.
+    """
+    end = branch_ids.index(before) if before is not None else len(branch_ids)
+    start = max(end - limit, 0) if limit else 0
+    return start, end
+
+
+def join_chat(skeleton: dict, messages: dict) -> dict:
+    history = {**skeleton.get("history", {}), "messages": messages}
+    return {
+        **skeleton,
+        "history": history,
+        "messages": get_message_list(messages, history.get("currentId")),
+    }
+
+
+def to_chat_model(chat: Chat, messages: Optional[dict] = None) -> ChatModel:
+    model = ChatModel.model_validate(chat)
+    if chat.message_storage:
+        model.chat = codec.dumps(join_chat(codec.loads(chat.chat), messages or {}))
+    return model
+
+
+####################
+# Pagination
+####################
+
+
+def encode_chat_cursor(chat: ChatTitleIdResponse) -> str:
+    return (
+        base64.urlsafe_b64encode(f"{chat.updated_at}:{chat.id}".encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_chat_cursor(cursor: str) -> tuple[int, str]:
+    """Raises ValueError if the cursor was not produced by `encode_chat_cursor`."""
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, id = value.split(":", 1)
+        return int(updated_at), id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def get_next_chat_cursor(
+    chats: list[ChatTitleIdResponse], limit: Optional[int]
+) -> Optional[str]:
+    """The cursor for the page after `chats`, or None if this was the last page."""
+    if limit and len(chats) == limit:
+        return encode_chat_cursor(chats[-1])
+    return None
+
+
+def get_chat_title_id_list_query(
+    user_id: str,
+    archived: Optional[bool] = False,
+    skip: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    tag_name: Optional[str] = None,
+):
+    """
+    Newest first, keyed on (updated_at, id) so that a cursor picks up exactly
+    where the previous page ended. Served by the chat_user_id_archived_updated_at_id
+    index.
+
+    With `tag_name`, only chats carrying that tag are listed. The tag is a
+    semi-join against chatidtag, answered from the chatidtag_user_id_tag_name_chat_id
+    index, so a chat tagged twice is still listed once.
+    """
+    query = select(Chat.id, Chat.title, Chat.updated_at, Chat.created_at).filter_by(
+        user_id=user_id
+    )
+    if archived is not None:
+        query = query.filter_by(archived=archived)
+    if tag_name is not None:
+        query = query.filter(
+            Chat.id.in_(
+                select(ChatIdTag.chat_id).filter_by(user_id=user_id, tag_name=tag_name)
+            )
+        )
+    if cursor:
+        query = query.filter(
+            tuple_(Chat.updated_at, Chat.id) < tuple_(*decode_chat_cursor(cursor))
+        )
+
+    query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+    if limit:
+        query = query.limit(limit)
+    if skip:
+        query = query.offset(skip)
+    return query
+
+
+####################
+# Search
+####################
+
+# SQLite keeps the text in an FTS5 table whose rowid is the stable integer id of
+# chat_search. Postgres keeps it in chat_search itself with a generated,
+# GIN-indexed tsvector. Both are created by the chat search migration.
+CHAT_SEARCH_STATEMENTS = {
+    "sqlite": {
+        "delete": [
+            "DELETE FROM chat_search_fts WHERE rowid IN "
+            "(SELECT id FROM chat_search WHERE chat_id = :chat_id)",
+            "DELETE FROM chat_search WHERE chat_id = :chat_id",
+        ],
+        "delete_by_user": [
+            "DELETE FROM chat_search_fts WHERE rowid IN "
+            "(SELECT id FROM chat_search WHERE user_id = :user_id)",
+            "DELETE FROM chat_search WHERE user_id = :user_id",
+        ],
+        "delete_by_ids": [
+            "DELETE FROM chat_search_fts WHERE rowid IN "
+            "(SELECT id FROM chat_search WHERE chat_id IN :chat_ids)",
+            "DELETE FROM chat_search WHERE chat_id IN :chat_ids",
+        ],
+        "insert": [
+            "INSERT INTO chat_search (chat_id, user_id) VALUES (:chat_id, :user_id)",
+            "INSERT INTO chat_search_fts (rowid, title, content) "
+            "SELECT id, :title, :content FROM chat_search WHERE chat_id = :chat_id",
+        ],
+        "search": """
+            SELECT chat.id, chat.title, chat.updated_at, chat.created_at,
+                -bm25(chat_search_fts, 10.0, 1.0) AS score,
+                snippet(chat_search_fts, 1, '<mark>', '</mark>', '...', 16) AS snippet
+            FROM chat_search_fts
+            JOIN chat_search ON chat_search.id = chat_search_fts.rowid
+            JOIN chat ON chat.id = chat_search.chat_id
+            WHERE chat_search_fts MATCH :query
+                AND chat_search.user_id = :user_id
+                AND (:include_archived OR NOT chat.archived)
+            ORDER BY score DESC
+            LIMIT :limit OFFSET :skip
+        """,
+    },
+    "postgresql": {
+        "delete": ["DELETE FROM chat_search WHERE chat_id = :chat_id"],
+        "delete_by_user": ["DELETE FROM chat_search WHERE user_id = :user_id"],
+        "delete_by_ids": ["DELETE FROM chat_search WHERE chat_id IN :chat_ids"],
+        "insert": [
+            "INSERT INTO chat_search (chat_id, user_id, title, content) "
+            "VALUES (:chat_id, :user_id, :title, :content)"
+        ],
+        "search": """
+            SELECT chat.id, chat.title, chat.updated_at, chat.created_at,
+                ts_rank(chat_search.tsv, query) AS score,
+                ts_headline('simple', chat_search.content, query,
+                    'StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8')
+                    AS snippet
+            FROM chat_search
+            JOIN chat ON chat.id = chat_search.chat_id,
+                websearch_to_tsquery('simple', :query) AS query
+            WHERE chat_search.tsv @@ query
+                AND chat_search.user_id = :user_id
+                AND (:include_archived OR NOT chat.archived)
+            ORDER BY score DESC
+            LIMIT :limit OFFSET :skip
+        """,
+    },
+}
+
+
+def get_chat_search_content(chat: dict) -> str:
+    """The text of every message in the chat, across all branches."""
+    history = chat.get("history", {}).get("messages")
+    if isinstance(history, dict):
+        messages = list(history.values())
+    else:
+        messages = chat.get("messages", [])
+
+    return "\n".join(
+        message["content"]
+        for message in messages
+        if isinstance(message.get("content"), str)
+    )
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards in `value`, for patterns using "\\" as escape."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def get_chat_search_query(query: str, dialect: str) -> Optional[str]:
+    """
+    Turn free text into a query for the dialect's full-text engine. For FTS5
+    every word is quoted, so user input can't be parsed as query syntax, and
+    the last word matches as a prefix while the user is still typing.
+    """
+    if dialect != "sqlite":
+        return query.strip() or None
+
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def get_chat_search_statements(name: str, **params) -> list[tuple[TextClause, dict]]:
+    dialect = get_chat_search_dialect()
+    if dialect is None:
+        return []
+    # List parameters are expanded into IN (...)
+    expanding = [
+        bindparam(key, expanding=True)
+        for key, value in params.items()
+        if isinstance(value, (list, tuple))
+    ]
+    return [
+        (text(statement).bindparams(*expanding), params)
+        for statement in CHAT_SEARCH_STATEMENTS[dialect][name]
+    ]
+
+
+@functools.cache
+def get_chat_search_dialect() -> Optional[str]:
+    """The dialect of the chat search index, or None if there is no index."""
+    if engine.dialect.name in CHAT_SEARCH_STATEMENTS and inspect(engine).has_table(
+        "chat_search"
+    ):
+        return engine.dialect.name
+    return None
+
+
+def get_chat_index_statements(
+    chat_id: str, user_id: str, chat: dict
+) -> list[tuple[TextClause, dict]]:
+    statements = get_chat_search_statements("delete", chat_id=chat_id)
+    if not user_id.startswith("shared-"):
+        statements += get_chat_search_statements(
+            "insert",
+            chat_id=chat_id,
+            user_id=user_id,
+            title=chat.get("title", "New Chat"),
+            content=get_chat_search_content(chat),
+        )
+    return statements
+
+
+# Active branches of recently paged blob chats, keyed on the chat id and the hash
+# of the stored blob so that any write to the chat misses the cache
+CHAT_BRANCH_CACHE = TTLCache(maxsize=CHAT_BRANCH_CACHE_SIZE, ttl=300)
+
+
 class ChatTable:
+    def _store_chat(
+        self, chat_obj: Chat, chat: dict, rows: dict[str, ChatMessage]
+    ) -> tuple[list[ChatMessage], list[str]]:
+        """
+        Write `chat` onto `chat_obj` in the configured storage mode, updating the
+        existing message `rows` in place. Returns the rows to add and the ids of
+        the rows to delete; unchanged messages are left untouched.
+        """
+        skeleton, messages = split_chat(chat)
+        if CHAT_STORAGE_MODE != "message" or messages is None:
+            chat_obj.chat = codec.dumps(chat)
+            chat_obj.message_storage = False
+            return [], list(rows.keys())
+
+        now = int(time.time())
+        new_rows = []
+        for message_id, message in messages.items():
+            row = rows.pop(message_id, None)
+            if row is None:
+                new_rows.append(
+                    ChatMessage(
+                        chat_id=chat_obj.id,
+                        id=message_id,
+                        parent_id=message.get("parentId"),
+                        message=message,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            elif row.message != message:
+                row.parent_id = message.get("parentId")
+                row.message = message
+                row.updated_at = now
+
+        chat_obj.chat = codec.dumps(skeleton)
+        chat_obj.message_storage = True
+        return new_rows, list(rows.keys())
+
+    def _write_chat(self, db, chat_obj: Chat, chat: dict):
+        rows = {}
+        if chat_obj.message_storage:
+            rows = {
+                row.id: row
+                for row in db.query(ChatMessage).filter_by(chat_id=chat_obj.id)
+            }
+
+        new_rows, deleted_ids = self._store_chat(chat_obj, chat, rows)
+        db.add_all(new_rows)
+        if deleted_ids:
+            db.query(ChatMessage).filter(
+                ChatMessage.chat_id == chat_obj.id, ChatMessage.id.in_(deleted_ids)
+            ).delete(synchronize_session=False)
+
+        for statement, params in get_chat_index_statements(
+            chat_obj.id, chat_obj.user_id, chat
+        ):
+            db.execute(statement, params)
+
+    async def _write_chat_async(self, db, chat_obj: Chat, chat: dict):
+        rows = {}
+        if chat_obj.message_storage:
+            rows = {
+                row.id: row
+                for row in await db.scalars(
+                    select(ChatMessage).filter_by(chat_id=chat_obj.id)
+                )
+            }
+
+        new_rows, deleted_ids = self._store_chat(chat_obj, chat, rows)
+        db.add_all(new_rows)
+        if deleted_ids:
+            await db.execute(
+                delete(ChatMessage).where(
+                    ChatMessage.chat_id == chat_obj.id,
+                    ChatMessage.id.in_(deleted_ids),
+                )
+            )
+
+        for statement, params in get_chat_index_statements(
+            chat_obj.id, chat_obj.user_id, chat
+        ):
+            await db.execute(statement, params)
+
+    def _get_messages(self, db, chat_ids: list[str]) -> dict[str, dict]:
+        messages = {chat_id: {} for chat_id in chat_ids}
+        for i in range(0, len(chat_ids), 500):
+            batch = chat_ids[i : i + 500]
+            for row in db.query(ChatMessage).filter(ChatMessage.chat_id.in_(batch)):
+                messages[row.chat_id][row.id] = row.message
+        return messages
+
+    async def _get_messages_async(self, db, chat_ids: list[str]) -> dict[str, dict]:
+        messages = {chat_id: {} for chat_id in chat_ids}
+        for i in range(0, len(chat_ids), 500):
+            batch = chat_ids[i : i + 500]
+            for row in await db.scalars(
+                select(ChatMessage).filter(ChatMessage.chat_id.in_(batch))
+            ):
+                messages[row.chat_id][row.id] = row.message
+        return messages
+
+    def _to_chat_models(self, db, chats) -> list[ChatModel]:
+        chats = list(chats)
+        messages = self._get_messages(
+            db, [chat.id for chat in chats if chat.message_storage]
+        )
+        return [to_chat_model(chat, messages.get(chat.id)) for chat in chats]
+
+    def _to_chat_model(self, db, chat: Chat) -> ChatModel:
+        return self._to_chat_models(db, [chat])[0]
+
+    async def _to_chat_model_async(self, db, chat: Chat) -> ChatModel:
+        messages = {}
+        if chat.message_storage:
+            messages = (await self._get_messages_async(db, [chat.id]))[chat.id]
+        return to_chat_model(chat, messages)
 
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
@@ -91,33 +586,81 @@ class ChatTable:
                         if "title" in form_data.chat
                         else "New Chat"
                     ),
-                    "chat": json.dumps(form_data.chat),
+                    "chat": codec.dumps(form_data.chat),
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
                 }
             )
 
             result = Chat(**chat.model_dump())
+            self._write_chat(db, result, form_data.chat)
             db.add(result)
             db.commit()
-            db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return chat
+
+    @async_variant
+    async def insert_new_chat_async(
+        self, user_id: str, form_data: ChatForm
+    ) -> Optional[ChatModel]:
+        async with get_async_db() as db:
+
+            id = str(uuid.uuid4())
+            chat = ChatModel(
+                **{
+                    "id": id,
+                    "user_id": user_id,
+                    "title": (
+                        form_data.chat["title"]
+                        if "title" in form_data.chat
+                        else "New Chat"
+                    ),
+                    "chat": codec.dumps(form_data.chat),
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+
+            result = Chat(**chat.model_dump())
+            await self._write_chat_async(db, result, form_data.chat)
+            db.add(result)
+            await db.commit()
+            return chat
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
 
                 chat_obj = db.get(Chat, id)
-                chat_obj.chat = json.dumps(chat)
+                self._write_chat(db, chat_obj, chat)
                 chat_obj.title = chat["title"] if "title" in chat else "New Chat"
                 chat_obj.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat_obj)
 
-                return ChatModel.model_validate(chat_obj)
+                return ChatModel.model_validate(chat_obj).model_copy(
+                    update={"chat": codec.dumps(chat)}
+                )
         except Exception as e:
             return None
 
+    @async_variant
+    async def update_chat_by_id_async(self, id: str, chat: dict) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+
+                chat_obj = await db.get(Chat, id)
+                await self._write_chat_async(db, chat_obj, chat)
+                chat_obj.title = chat["title"] if "title" in chat else "New Chat"
+                chat_obj.updated_at = int(time.time())
+                await db.commit()
+                await db.refresh(chat_obj)
+
+                return ChatModel.model_validate(chat_obj).model_copy(
+                    update={"chat": codec.dumps(chat)}
+                )
+        except Exception:
+            return None
+
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
 
@@ -132,7 +675,7 @@ class ChatTable:
                     "id": str(uuid.uuid4()),
                     "user_id": f"shared-{chat_id}",
                     "title": chat.title,
-                    "chat": chat.chat,
+                    "chat": self._to_chat_model(db, chat).chat,
                     "created_at": chat.created_at,
                     "updated_at": int(time.time()),
                 }
@@ -188,7 +731,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -200,7 +743,7 @@ class ChatTable:
                 chat.archived = not chat.archived
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -214,36 +757,32 @@ class ChatTable:
             return False
 
     def get_archived_chat_list_by_user_id(
-        self, user_id: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+        self,
+        user_id: str,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id, archived=True)
-                .order_by(Chat.updated_at.desc())
-                # .limit(limit).offset(skip)
-                .all()
+            query = get_chat_title_id_list_query(
+                user_id, archived=True, skip=skip, limit=limit, cursor=cursor
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [
+                ChatTitleIdResponse.model_validate(chat)
+                for chat in db.execute(query).mappings()
+            ]
 
     def get_chat_list_by_user_id(
         self,
         user_id: str,
         include_archived: bool = False,
-        skip: int = 0,
-        limit: int = 50,
-    ) -> list[ChatModel]:
-        with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
-            if not include_archived:
-                query = query.filter_by(archived=False)
-            all_chats = (
-                query.order_by(Chat.updated_at.desc())
-                # .limit(limit).offset(skip)
-                .all()
-            )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> list[ChatTitleIdResponse]:
+        return self.get_chat_title_id_list_by_user_id(
+            user_id, include_archived, skip=skip, limit=limit, cursor=cursor
+        )
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -251,34 +790,76 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
-            if not include_archived:
-                query = query.filter_by(archived=False)
-
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
+            query = get_chat_title_id_list_query(
+                user_id,
+                archived=None if include_archived else False,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
             )
+            return [
+                ChatTitleIdResponse.model_validate(chat)
+                for chat in db.execute(query).mappings()
+            ]
 
-            if limit:
-                query = query.limit(limit)
-            if skip:
-                query = query.offset(skip)
+    @async_variant
+    async def get_chat_title_id_list_by_user_id_async(
+        self,
+        user_id: str,
+        include_archived: bool = False,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> list[ChatTitleIdResponse]:
+        async with get_async_db() as db:
+            query = get_chat_title_id_list_query(
+                user_id,
+                archived=None if include_archived else False,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+            return [
+                ChatTitleIdResponse.model_validate(chat)
+                for chat in (await db.execute(query)).mappings()
+            ]
 
-            all_chats = query.all()
+    def get_chat_title_id_list_by_tag_name_and_user_id(
+        self,
+        tag_name: str,
+        user_id: str,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> list[ChatTitleIdResponse]:
+        with get_db() as db:
+            query = get_chat_title_id_list_query(
+                user_id, skip=skip, limit=limit, cursor=cursor, tag_name=tag_name
+            )
+            return [
+                ChatTitleIdResponse.model_validate(chat)
+                for chat in db.execute(query).mappings()
+            ]
 
-            # result has to be destrctured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
+    @async_variant
+    async def get_chat_title_id_list_by_tag_name_and_user_id_async(
+        self,
+        tag_name: str,
+        user_id: str,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> list[ChatTitleIdResponse]:
+        async with get_async_db() as db:
+            query = get_chat_title_id_list_query(
+                user_id, skip=skip, limit=limit, cursor=cursor, tag_name=tag_name
+            )
             return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
+                ChatTitleIdResponse.model_validate(chat)
+                for chat in (await db.execute(query)).mappings()
             ]
 
     def get_chat_list_by_chat_ids(
@@ -292,14 +873,24 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
 
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
+        except Exception:
+            return None
+
+    @async_variant
+    async def get_chat_by_id_async(self, id: str) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+
+                chat = await db.get(Chat, id)
+                return await self._to_chat_model_async(db, chat)
         except Exception:
             return None
 
@@ -321,10 +912,100 @@ class ChatTable:
             with get_db() as db:
 
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
+    @async_variant
+    async def get_chat_by_id_and_user_id_async(
+        self, id: str, user_id: str
+    ) -> Optional[ChatModel]:
+        try:
+            async with get_async_db() as db:
+
+                chat = await db.scalar(
+                    select(Chat).filter_by(id=id, user_id=user_id).limit(1)
+                )
+                return await self._to_chat_model_async(db, chat)
+        except Exception:
+            return None
+
+    def _get_blob_branch(self, chat: Chat) -> tuple[dict, list[dict]]:
+        """The chat without its messages and its active branch, for blob storage."""
+        key = (chat.id, hash(chat.chat))
+        branch = CHAT_BRANCH_CACHE.get(key)
+        if branch is None:
+            skeleton, messages = split_chat(codec.loads(chat.chat))
+            if messages is None:
+                messages = skeleton.pop("messages", [])
+            else:
+                messages = get_message_list(
+                    messages, skeleton["history"].get("currentId")
+                )
+            branch = (skeleton, messages)
+            CHAT_BRANCH_CACHE.set(key, branch)
+        return branch
+
+    def get_chat_messages_by_id_and_user_id(
+        self,
+        id: str,
+        user_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+    ) -> Optional[ChatMessagesResponse]:
+        """
+        A range of the chat's active branch: the last `limit` messages before
+        the message `before`, or the latest ones without it. Message-stored
+        chats only read the messages in the range; blob chats are parsed once
+        and their branch is kept in CHAT_BRANCH_CACHE for the following pages.
+
+        Raises ValueError if `before` is not on the active branch.
+        """
+        with get_db() as db:
+            chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
+            if chat is None:
+                return None
+
+            if chat.message_storage:
+                skeleton = codec.loads(chat.chat)
+                parent_ids = dict(
+                    db.execute(
+                        select(ChatMessage.id, ChatMessage.parent_id).filter_by(
+                            chat_id=id
+                        )
+                    ).all()
+                )
+                branch_ids = get_branch_ids(
+                    parent_ids, skeleton.get("history", {}).get("currentId")
+                )
+                start, end = get_branch_range(branch_ids, limit, before)
+
+                range_ids = branch_ids[start:end]
+                rows = {}
+                for i in range(0, len(range_ids), 500):
+                    rows.update(
+                        db.execute(
+                            select(ChatMessage.id, ChatMessage.message).filter(
+                                ChatMessage.chat_id == id,
+                                ChatMessage.id.in_(range_ids[i : i + 500]),
+                            )
+                        ).all()
+                    )
+                messages = [rows[message_id] for message_id in range_ids]
+            else:
+                skeleton, branch = self._get_blob_branch(chat)
+                branch_ids = [message.get("id") for message in branch]
+                start, end = get_branch_range(branch_ids, limit, before)
+                messages = branch[start:end]
+
+            return ChatMessagesResponse(
+                **ChatModel.model_validate(chat).model_dump(exclude={"chat"}),
+                chat=skeleton,
+                messages=messages,
+                total=len(branch_ids),
+                has_more=start > 0,
+            )
+
     def get_chats(self, skip: int = 0, limit: int = 50) -> list[ChatModel]:
         with get_db() as db:
 
@@ -333,7 +1014,24 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def iter_chats(
+        self, user_id: Optional[str] = None, batch_size: int = 100
+    ) -> Iterator[ChatModel]:
+        """
+        Yield chats newest first, holding at most `batch_size` rows in memory.
+        Rows are streamed from a server-side cursor where the driver has one.
+        """
+        with get_db() as db:
+            query = select(Chat).order_by(Chat.updated_at.desc())
+            if user_id is not None:
+                query = query.filter_by(user_id=user_id)
+
+            result = db.execute(query.execution_options(yield_per=batch_size))
+            for partition in result.scalars().partitions():
+                # The identity map holds rows weakly, so yielded batches are freed
+                yield from self._to_chat_models(db, partition)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -343,7 +1041,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -353,13 +1051,18 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
 
                 db.query(Chat).filter_by(id=id).delete()
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
+                for statement, params in get_chat_search_statements(
+                    "delete", chat_id=id
+                ):
+                    db.execute(statement, params)
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -370,41 +1073,319 @@ class ChatTable:
         try:
             with get_db() as db:
 
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
+                    for statement, params in get_chat_search_statements(
+                        "delete", chat_id=id
+                    ):
+                        db.execute(statement, params)
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
         except Exception:
             return False
 
-    def delete_chats_by_user_id(self, user_id: str) -> bool:
+    @async_variant
+    async def delete_chat_by_id_and_user_id_async(self, id: str, user_id: str) -> bool:
         try:
+            async with get_async_db() as db:
 
-            with get_db() as db:
-
-                self.delete_shared_chats_by_user_id(user_id)
-
-                db.query(Chat).filter_by(user_id=user_id).delete()
-                db.commit()
+                result = await db.execute(
+                    delete(Chat).filter_by(id=id, user_id=user_id)
+                )
+                if result.rowcount:
+                    await db.execute(delete(ChatMessage).filter_by(chat_id=id))
+                    for statement, params in get_chat_search_statements(
+                        "delete", chat_id=id
+                    ):
+                        await db.execute(statement, params)
+                await db.execute(delete(Chat).filter_by(user_id=f"shared-{id}"))
+                await db.commit()
 
                 return True
         except Exception:
             return False
 
+    def _delete_chats_by_ids(self, db, ids: list[str]):
+        """Delete the chats with `ids` along with their messages, search entries and shared copies."""
+        db.execute(
+            delete(Chat).filter(Chat.user_id.in_([f"shared-{id}" for id in ids]))
+        )
+        db.execute(delete(ChatMessage).filter(ChatMessage.chat_id.in_(ids)))
+        for statement, params in get_chat_search_statements(
+            "delete_by_ids", chat_ids=ids
+        ):
+            db.execute(statement, params)
+        db.execute(delete(Chat).filter(Chat.id.in_(ids)))
+
+    def count_chats_by_user_id(self, user_id: str) -> int:
+        with get_db() as db:
+            return db.scalar(
+                select(func.count()).select_from(Chat).filter_by(user_id=user_id)
+            )
+
+    def delete_chats_by_user_id(
+        self,
+        user_id: str,
+        batch_size: int = CHAT_DELETE_BATCH_SIZE,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> bool:
+        """
+        Delete every chat of the user, `batch_size` chats per transaction, so a
+        large history never holds the write lock for long. `progress` is called
+        with the number of chats deleted so far and the total after each batch.
+        """
+        try:
+            total = self.count_chats_by_user_id(user_id)
+            deleted = 0
+
+            while True:
+                with get_db() as db:
+                    ids = db.scalars(
+                        select(Chat.id).filter_by(user_id=user_id).limit(batch_size)
+                    ).all()
+                    if not ids:
+                        break
+
+                    self._delete_chats_by_ids(db, ids)
+                    db.commit()
+
+                deleted += len(ids)
+                if progress:
+                    progress(deleted, max(total, deleted))
+
+            return True
+        except Exception as e:
+            log.error(f"delete_chats_by_user_id: {e}")
+            return False
+
     def delete_shared_chats_by_user_id(self, user_id: str) -> bool:
         try:
 
             with get_db() as db:
 
-                chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
-                shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
-
-                db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
+                db.execute(
+                    delete(Chat).filter(
+                        Chat.user_id.in_(
+                            select(literal("shared-") + Chat.id)
+                            .filter_by(user_id=user_id)
+                            .scalar_subquery()
+                        )
+                    )
+                )
                 db.commit()
 
                 return True
         except Exception:
             return False
 
+    @async_variant
+    async def search_chats_by_user_id_async(
+        self,
+        user_id: str,
+        query: str,
+        include_archived: bool = False,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> list[ChatSearchResponse]:
+        async with get_async_db() as db:
+            dialect = get_chat_search_dialect()
+            if dialect is None:
+                # No full-text index on this database, match titles only
+                chats = await db.execute(
+                    get_chat_title_id_list_query(
+                        user_id,
+                        archived=None if include_archived else False,
+                        skip=skip,
+                        limit=limit,
+                    ).filter(Chat.title.ilike(f"%{escape_like(query)}%", escape="\\"))
+                )
+                return [
+                    ChatSearchResponse(**chat, score=0.0) for chat in chats.mappings()
+                ]
+
+            search_query = get_chat_search_query(query, dialect)
+            if search_query is None:
+                return []
+
+            chats = await db.execute(
+                text(CHAT_SEARCH_STATEMENTS[dialect]["search"]),
+                {
+                    "query": search_query,
+                    "user_id": user_id,
+                    "include_archived": include_archived,
+                    "skip": skip,
+                    "limit": limit,
+                },
+            )
+            return [ChatSearchResponse(**chat) for chat in chats.mappings()]
+
+    def search_chats_by_user_id(
+        self,
+        user_id: str,
+        query: str,
+        include_archived: bool = False,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> list[ChatSearchResponse]:
+        with get_db() as db:
+            dialect = get_chat_search_dialect()
+            if dialect is None:
+                chats = db.execute(
+                    get_chat_title_id_list_query(
+                        user_id,
+                        archived=None if include_archived else False,
+                        skip=skip,
+                        limit=limit,
+                    ).filter(Chat.title.ilike(f"%{escape_like(query)}%", escape="\\"))
+                )
+                return [
+                    ChatSearchResponse(**chat, score=0.0) for chat in chats.mappings()
+                ]
+
+            search_query = get_chat_search_query(query, dialect)
+            if search_query is None:
+                return []
+
+            chats = db.execute(
+                text(CHAT_SEARCH_STATEMENTS[dialect]["search"]),
+                {
+                    "query": search_query,
+                    "user_id": user_id,
+                    "include_archived": include_archived,
+                    "skip": skip,
+                    "limit": limit,
+                },
+            )
+            return [ChatSearchResponse(**chat) for chat in chats.mappings()]
+
+    def migrate_chat_storage(self, batch_size: int = 100) -> int:
+        """
+        Convert every chat that is not yet stored in the configured
+        CHAT_STORAGE_MODE, one batch per transaction. Returns the number of
+        chats converted.
+        """
+        if CHAT_STORAGE_MODE == "message":
+            condition = Chat.message_storage.isnot(True)
+        else:
+            condition = Chat.message_storage.is_(True)
+
+        migrated = 0
+        last_id = ""
+        while True:
+            with get_db() as db:
+                chats = (
+                    db.query(Chat)
+                    .filter(condition, Chat.id > last_id)
+                    .filter(~Chat.user_id.startswith("shared-"))
+                    .order_by(Chat.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not chats:
+                    return migrated
+
+                for chat in self._to_chat_models(db, chats):
+                    chat_obj = db.get(Chat, chat.id)
+                    self._write_chat(db, chat_obj, codec.loads(chat.chat))
+                    migrated += chat_obj.message_storage == (
+                        CHAT_STORAGE_MODE == "message"
+                    )
+                db.commit()
+                last_id = chats[-1].id
+
+    def compact_chats(
+        self,
+        batch_size: int = 100,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Rewrite every stored chat blob in the configured CHAT_COMPRESSION,
+        one batch per transaction. Rows already stored that way are left
+        alone. Returns the number of chats rewritten.
+        """
+        # The stored value, bypassing the (de)compression of CompressedText
+        raw = type_coerce(Chat.chat, Text)
+        statement = (
+            update(Chat.__table__)
+            .where(Chat.__table__.c.id == bindparam("b_id"))
+            .values(chat=bindparam("b_chat", type_=Text))
+        )
+
+        total = self.count_chats()
+        compacted = 0
+        done = 0
+        last_id = ""
+        while True:
+            with get_db() as db:
+                rows = db.execute(
+                    select(Chat.id, raw)
+                    .filter(Chat.id > last_id)
+                    .order_by(Chat.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    return compacted
+
+                updates = []
+                for id, value in rows:
+                    # Already stored with the configured method
+                    if codec.is_compressed(value):
+                        if value[1] == codec.COMPRESSION_METHOD:
+                            continue
+
+                    compressed = codec.compress(codec.decompress(value))
+                    if compressed != value:
+                        updates.append({"b_id": id, "b_chat": compressed})
+
+                if updates:
+                    db.execute(statement, updates)
+                db.commit()
+
+            compacted += len(updates)
+            done += len(rows)
+            last_id = rows[-1].id
+            if progress:
+                progress(done, max(total, done))
+
+    def count_chats(self) -> int:
+        with get_db() as db:
+            return db.scalar(select(func.count()).select_from(Chat))
+
+    def get_chat_storage_stats(self) -> dict:
+        """
+        How much space chat blobs take as stored and once decompressed, in
+        characters. Only the compression header of each row is read.
+        """
+        raw = type_coerce(Chat.chat, Text)
+        stats = {
+            "chats": 0,
+            "compressed": 0,
+            "stored_size": 0,
+            "uncompressed_size": 0,
+        }
+
+        with get_db() as db:
+            for prefix, length in db.execute(
+                select(func.substr(raw, 1, 32), func.length(raw)).execution_options(
+                    yield_per=1000
+                )
+            ):
+                stats["chats"] += 1
+                stats["stored_size"] += length or 0
+                if codec.is_compressed(prefix):
+                    stats["compressed"] += 1
+                    stats["uncompressed_size"] += codec.get_uncompressed_length(prefix)
+                else:
+                    stats["uncompressed_size"] += length or 0
+
+        stats["saved_size"] = stats["uncompressed_size"] - stats["stored_size"]
+        stats["ratio"] = (
+            stats["stored_size"] / stats["uncompressed_size"]
+            if stats["uncompressed_size"]
+            else 1.0
+        )
+        return stats
+
 
 Chats = ChatTable()
@@ -3,9 +3,15 @@ from typing import Union, Optional
 import time
 import logging
 
-from sqlalchemy import Column, String, Text, BigInteger, Boolean
-
-from apps.webui.internal.db import JSONField, Base, get_db
+from sqlalchemy import Column, String, Text, BigInteger, Boolean, select
+
+from apps.webui.internal.db import (
+    JSONField,
+    Base,
+    get_db,
+    get_async_db,
+    async_variant,
+)
 from apps.webui.models.users import Users
 
 import json
@@ -125,6 +131,16 @@ class FunctionsTable:
         except Exception:
             return None
 
+    @async_variant
+    async def get_function_by_id_async(self, id: str) -> Optional[FunctionModel]:
+        try:
+            async with get_async_db() as db:
+
+                function = await db.get(Function, id)
+                return FunctionModel.model_validate(function)
+        except Exception:
+            return None
+
     def get_functions(self, active_only=False) -> list[FunctionModel]:
         with get_db() as db:
 
@@ -157,6 +173,21 @@ class FunctionsTable:
                     for function in db.query(Function).filter_by(type=type).all()
                 ]
 
+    @async_variant
+    async def get_functions_by_type_async(
+        self, type: str, active_only=False
+    ) -> list[FunctionModel]:
+        async with get_async_db() as db:
+
+            query = select(Function).filter_by(type=type)
+            if active_only:
+                query = query.filter_by(is_active=True)
+
+            return [
+                FunctionModel.model_validate(function)
+                for function in (await db.scalars(query)).all()
+            ]
+
     def get_global_filter_functions(self) -> list[FunctionModel]:
         with get_db() as db:
 
@@ -167,6 +198,21 @@ class FunctionsTable:
                 .all()
             ]
 
+    @async_variant
+    async def get_global_filter_functions_async(self) -> list[FunctionModel]:
+        async with get_async_db() as db:
+
+            return [
+                FunctionModel.model_validate(function)
+                for function in (
+                    await db.scalars(
+                        select(Function).filter_by(
+                            type="filter", is_active=True, is_global=True
+                        )
+                    )
+                ).all()
+            ]
+
     def get_global_action_functions(self) -> list[FunctionModel]:
         with get_db() as db:
             return [
@@ -176,6 +222,20 @@ class FunctionsTable:
                 .all()
             ]
 
+    @async_variant
+    async def get_global_action_functions_async(self) -> list[FunctionModel]:
+        async with get_async_db() as db:
+            return [
+                FunctionModel.model_validate(function)
+                for function in (
+                    await db.scalars(
+                        select(Function).filter_by(
+                            type="action", is_active=True, is_global=True
+                        )
+                    )
+                ).all()
+            ]
+
     def get_function_valves_by_id(self, id: str) -> Optional[dict]:
         with get_db() as db:
 
@@ -186,6 +246,17 @@ class FunctionsTable:
                 print(f"An error occurred: {e}")
                 return None
 
+    @async_variant
+    async def get_function_valves_by_id_async(self, id: str) -> Optional[dict]:
+        async with get_async_db() as db:
+
+            try:
+                function = await db.get(Function, id)
+                return function.valves if function.valves else {}
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                return None
+
     def update_function_valves_by_id(
         self, id: str, valves: dict
     ) -> Optional[FunctionValves]:
@@ -2,9 +2,15 @@ import logging
 from typing import Optional, List
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import Column, BigInteger, Text
+from sqlalchemy import Column, BigInteger, Text, select
 
-from apps.webui.internal.db import Base, JSONField, get_db
+from apps.webui.internal.db import (
+    Base,
+    JSONField,
+    get_db,
+    get_async_db,
+    async_variant,
+)
 
 from env import SRC_LOG_LEVELS
 
@@ -141,6 +147,14 @@ class ModelsTable:
         with get_db() as db:
             return [ModelModel.model_validate(model) for model in db.query(Model).all()]
 
+    @async_variant
+    async def get_all_models_async(self) -> list[ModelModel]:
+        async with get_async_db() as db:
+            return [
+                ModelModel.model_validate(model)
+                for model in (await db.scalars(select(Model))).all()
+            ]
+
     def get_model_by_id(self, id: str) -> Optional[ModelModel]:
         try:
             with get_db() as db:
@@ -149,6 +163,15 @@ class ModelsTable:
         except Exception:
             return None
 
+    @async_variant
+    async def get_model_by_id_async(self, id: str) -> Optional[ModelModel]:
+        try:
+            async with get_async_db() as db:
+                model = await db.get(Model, id)
+                return ModelModel.model_validate(model)
+        except Exception:
+            return None
+
     def update_model_by_id(self, id: str, model: ModelForm) -> Optional[ModelModel]:
         try:
             with get_db() as db:
@@ -6,9 +6,9 @@ import uuid
 import time
 import logging
 
-from sqlalchemy import String, Column, BigInteger, Text
+from sqlalchemy import String, Column, BigInteger, Text, Index, select
 
-from apps.webui.internal.db import Base, get_db
+from apps.webui.internal.db import Base, get_db, get_async_db, async_variant
 
 from env import SRC_LOG_LEVELS
 
@@ -38,6 +38,15 @@ class ChatIdTag(Base):
     user_id = Column(String)
     timestamp = Column(BigInteger)
 
+    __table_args__ = (
+        Index(
+            "chatidtag_user_id_tag_name_chat_id_idx",
+            "user_id",
+            "tag_name",
+            "chat_id",
+        ),
+    )
+
 
 class TagModel(BaseModel):
     id: str
@@ -157,6 +166,28 @@ class TagTable:
                 )
             ]
 
+    @async_variant
+    async def get_tags_by_user_id_async(self, user_id: str) -> list[TagModel]:
+        async with get_async_db() as db:
+            tag_names = (
+                await db.scalars(
+                    select(ChatIdTag.tag_name)
+                    .filter_by(user_id=user_id)
+                    .order_by(ChatIdTag.timestamp.desc())
+                )
+            ).all()
+
+            return [
+                TagModel.model_validate(tag)
+                for tag in (
+                    await db.scalars(
+                        select(Tag)
+                        .filter_by(user_id=user_id)
+                        .filter(Tag.name.in_(tag_names))
+                    )
+                ).all()
+            ]
+
     def get_tags_by_chat_id_and_user_id(
         self, chat_id: str, user_id: str
     ) -> list[TagModel]:
@@ -182,6 +213,31 @@ class TagTable:
                 )
             ]
 
+    @async_variant
+    async def get_tags_by_chat_id_and_user_id_async(
+        self, chat_id: str, user_id: str
+    ) -> list[TagModel]:
+        async with get_async_db() as db:
+
+            tag_names = (
+                await db.scalars(
+                    select(ChatIdTag.tag_name)
+                    .filter_by(user_id=user_id, chat_id=chat_id)
+                    .order_by(ChatIdTag.timestamp.desc())
+                )
+            ).all()
+
+            return [
+                TagModel.model_validate(tag)
+                for tag in (
+                    await db.scalars(
+                        select(Tag)
+                        .filter_by(user_id=user_id)
+                        .filter(Tag.name.in_(tag_names))
+                    )
+                ).all()
+            ]
+
     def get_chat_ids_by_tag_name_and_user_id(
         self, tag_name: str, user_id: str
     ) -> list[ChatIdTagModel]:
@@ -2,9 +2,15 @@ from pydantic import BaseModel, ConfigDict
 from typing import Optional
 import time
 import logging
-from sqlalchemy import String, Column, BigInteger, Text
-
-from apps.webui.internal.db import Base, JSONField, get_db
+from sqlalchemy import String, Column, BigInteger, Text, select
+
+from apps.webui.internal.db import (
+    Base,
+    JSONField,
+    get_db,
+    get_async_db,
+    async_variant,
+)
 from apps.webui.models.users import Users
 
 import json
@@ -118,10 +124,28 @@ class ToolsTable:
         except Exception:
             return None
 
+    @async_variant
+    async def get_tool_by_id_async(self, id: str) -> Optional[ToolModel]:
+        try:
+            async with get_async_db() as db:
+
+                tool = await db.get(Tool, id)
+                return ToolModel.model_validate(tool)
+        except Exception:
+            return None
+
     def get_tools(self) -> list[ToolModel]:
         with get_db() as db:
             return [ToolModel.model_validate(tool) for tool in db.query(Tool).all()]
 
+    @async_variant
+    async def get_tools_async(self) -> list[ToolModel]:
+        async with get_async_db() as db:
+            return [
+                ToolModel.model_validate(tool)
+                for tool in (await db.scalars(select(Tool))).all()
+            ]
+
     def get_tool_valves_by_id(self, id: str) -> Optional[dict]:
         try:
             with get_db() as db:
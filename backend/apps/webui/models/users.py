@@ -1,11 +1,34 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Callable, Optional
 import time
+import hashlib
+import hmac
+import logging
+import threading
+
+from sqlalchemy import String, Column, BigInteger, Text, case, or_, select
+
+from apps.webui.internal.db import (
+    Base,
+    JSONField,
+    get_db,
+    get_async_db,
+    async_variant,
+)
+from apps.webui.models.chats import Chats
+from utils.cache import TTLCache
 
-from sqlalchemy import String, Column, BigInteger, Text
+from env import (
+    SRC_LOG_LEVELS,
+    WEBUI_SECRET_KEY,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+    USER_LAST_ACTIVE_GRANULARITY,
+)
 
-from apps.webui.internal.db import Base, JSONField, get_db
-from apps.webui.models.chats import Chats
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 ####################
 # User DB Schema
@@ -26,6 +49,7 @@ class User(Base):
     created_at = Column(BigInteger)
 
     api_key = Column(String, nullable=True, unique=True)
+    api_key_hash = Column(String, nullable=True, unique=True, index=True)
     settings = Column(JSONField, nullable=True)
     info = Column(JSONField, nullable=True)
 
@@ -75,7 +99,42 @@ class UserUpdateForm(BaseModel):
     password: Optional[str] = None
 
 
+####################
+# User Cache
+####################
+
+# Maps auth tokens (JWTs and API keys) to the user they resolve to, so that
+# authenticated requests can skip the database. Entries are dropped whenever
+# the user is mutated.
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# Remembers API keys that matched no user, so that clients retrying with an
+# unknown or revoked key don't reach the database either.
+invalid_api_key_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def hash_api_key(api_key: str) -> str:
+    return hmac.new(
+        WEBUI_SECRET_KEY.encode(), api_key.encode(), hashlib.sha256
+    ).hexdigest()
+
+
 class UsersTable:
+    def __init__(self):
+        # Write-behind buffer for last_active_at, flushed by flush_last_active()
+        self._last_active_lock = threading.Lock()
+        self._pending_last_active: dict[str, int] = {}
+        self._recorded_last_active: dict[str, int] = {}
+
+    def invalidate_user_cache(self, id: str) -> int:
+        return user_cache.invalidate(lambda _, user: user.id == id)
+
+    def _merge_pending_last_active(self, user: UserModel) -> UserModel:
+        last_active_at = self._pending_last_active.get(user.id)
+        if last_active_at is not None and last_active_at > user.last_active_at:
+            user.last_active_at = last_active_at
+        return user
+
     def insert_new_user(
         self,
         id: str,
@@ -112,14 +171,35 @@ class UsersTable:
         try:
             with get_db() as db:
                 user = db.query(User).filter_by(id=id).first()
-                return UserModel.model_validate(user)
+                return self._merge_pending_last_active(UserModel.model_validate(user))
         except Exception as e:
             return None
 
+    @async_variant
+    async def get_user_by_id_async(self, id: str) -> Optional[UserModel]:
+        try:
+            async with get_async_db() as db:
+                user = await db.get(User, id)
+                return self._merge_pending_last_active(UserModel.model_validate(user))
+        except Exception:
+            return None
+
     def get_user_by_api_key(self, api_key: str) -> Optional[UserModel]:
+        api_key_hash = hash_api_key(api_key)
         try:
             with get_db() as db:
-                user = db.query(User).filter_by(api_key=api_key).first()
+                # Rows written before api_key_hash existed, or hashed with a
+                # previous secret key, are matched on the plain key and re-hashed.
+                user = (
+                    db.query(User)
+                    .filter(
+                        or_(User.api_key_hash == api_key_hash, User.api_key == api_key)
+                    )
+                    .first()
+                )
+                if user and user.api_key_hash != api_key_hash:
+                    user.api_key_hash = api_key_hash
+                    db.commit()
                 return UserModel.model_validate(user)
         except Exception:
             return None
@@ -128,7 +208,7 @@ class UsersTable:
         try:
             with get_db() as db:
                 user = db.query(User).filter_by(email=email).first()
-                return UserModel.model_validate(user)
+                return self._merge_pending_last_active(UserModel.model_validate(user))
         except Exception:
             return None
 
@@ -147,7 +227,19 @@ class UsersTable:
                 # .offset(skip).limit(limit)
                 .all()
             )
-            return [UserModel.model_validate(user) for user in users]
+            return [
+                self._merge_pending_last_active(UserModel.model_validate(user))
+                for user in users
+            ]
+
+    @async_variant
+    async def get_users_async(self, skip: int = 0, limit: int = 50) -> list[UserModel]:
+        async with get_async_db() as db:
+            users = (await db.scalars(select(User))).all()
+            return [
+                self._merge_pending_last_active(UserModel.model_validate(user))
+                for user in users
+            ]
 
     def get_num_users(self) -> Optional[int]:
         with get_db() as db:
@@ -166,6 +258,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"role": role})
                 db.commit()
+                self.invalidate_user_cache(id)
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
@@ -180,24 +273,59 @@ class UsersTable:
                     {"profile_image_url": profile_image_url}
                 )
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
         except Exception:
             return None
 
-    def update_user_last_active_by_id(self, id: str) -> Optional[UserModel]:
+    def update_user_last_active_by_id(self, id: str) -> bool:
+        """
+        Records that the user was just seen. The timestamp is buffered in memory
+        and written by flush_last_active(), unless write-behind is disabled.
+        """
+        now = int(time.time())
+        with self._last_active_lock:
+            recorded = self._recorded_last_active.get(id)
+            if recorded is not None and now - recorded < USER_LAST_ACTIVE_GRANULARITY:
+                return False
+
+            self._recorded_last_active[id] = now
+            self._pending_last_active[id] = now
+
+        if USER_LAST_ACTIVE_FLUSH_INTERVAL <= 0:
+            self.flush_last_active()
+        return True
+
+    def flush_last_active(self) -> int:
+        """Writes all buffered last_active_at timestamps, returns the number of users."""
+        with self._last_active_lock:
+            pending = self._pending_last_active
+            self._pending_last_active = {}
+
+        if not pending:
+            return 0
+
         try:
             with get_db() as db:
-                db.query(User).filter_by(id=id).update(
-                    {"last_active_at": int(time.time())}
-                )
+                ids = list(pending)
+                for i in range(0, len(ids), 500):
+                    batch = {id: pending[id] for id in ids[i : i + 500]}
+                    db.query(User).filter(User.id.in_(batch)).update(
+                        {"last_active_at": case(batch, value=User.id)},
+                        synchronize_session=False,
+                    )
                 db.commit()
+            return len(pending)
+        except Exception as e:
+            log.exception(f"Failed to flush last_active_at: {e}")
 
-                user = db.query(User).filter_by(id=id).first()
-                return UserModel.model_validate(user)
-        except Exception:
-            return None
+            # Re-queue, keeping any newer timestamp recorded in the meantime
+            with self._last_active_lock:
+                for id, last_active_at in pending.items():
+                    self._pending_last_active.setdefault(id, last_active_at)
+            return 0
 
     def update_user_oauth_sub_by_id(
         self, id: str, oauth_sub: str
@@ -206,6 +334,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update({"oauth_sub": oauth_sub})
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -217,6 +346,7 @@ class UsersTable:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
+                self.invalidate_user_cache(id)
 
                 user = db.query(User).filter_by(id=id).first()
                 return UserModel.model_validate(user)
@@ -224,16 +354,23 @@ class UsersTable:
         except Exception as e:
             return None
 
-    def delete_user_by_id(self, id: str) -> bool:
+    def delete_user_by_id(
+        self, id: str, progress: Optional[Callable[[int, int], None]] = None
+    ) -> bool:
         try:
             # Delete User Chats
-            result = Chats.delete_chats_by_user_id(id)
+            result = Chats.delete_chats_by_user_id(id, progress=progress)
 
             if result:
                 with get_db() as db:
                     # Delete User
                     db.query(User).filter_by(id=id).delete()
                     db.commit()
+                    self.invalidate_user_cache(id)
+
+                with self._last_active_lock:
+                    self._pending_last_active.pop(id, None)
+                    self._recorded_last_active.pop(id, None)
 
                 return True
             else:
@@ -244,8 +381,20 @@ class UsersTable:
     def update_user_api_key_by_id(self, id: str, api_key: str) -> str:
         try:
             with get_db() as db:
-                result = db.query(User).filter_by(id=id).update({"api_key": api_key})
+                result = (
+                    db.query(User)
+                    .filter_by(id=id)
+                    .update(
+                        {
+                            "api_key": api_key,
+                            "api_key_hash": hash_api_key(api_key) if api_key else None,
+                        }
+                    )
+                )
                 db.commit()
+                self.invalidate_user_cache(id)
+                if api_key:
+                    invalid_api_key_cache.pop(api_key)
                 return True if result == 1 else False
         except Exception:
             return False
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 
 from fastapi import Request, UploadFile, File
@@ -21,7 +22,7 @@ from apps.webui.models.auths import (
     Auths,
     ApiKey,
 )
-from apps.webui.models.users import Users
+from apps.webui.models.users import Users, user_cache, invalid_api_key_cache
 
 from utils.utils import (
     get_password_hash,
@@ -241,7 +242,8 @@ async def signup(request: Request, response: Response, form_data: SignupForm):
             )
 
             if request.app.state.config.WEBHOOK_URL:
-                post_webhook(
+                await asyncio.to_thread(
+                    post_webhook,
                     request.app.state.config.WEBHOOK_URL,
                     WEBHOOK_MESSAGES.USER_SIGNUP(user.name),
                     {
@@ -372,22 +374,23 @@ class AdminConfig(BaseModel):
 async def update_admin_config(
     request: Request, form_data: AdminConfig, user=Depends(get_admin_user)
 ):
-    request.app.state.config.SHOW_ADMIN_DETAILS = form_data.SHOW_ADMIN_DETAILS
-    request.app.state.config.ENABLE_SIGNUP = form_data.ENABLE_SIGNUP
+    with request.app.state.config.transaction():
+        request.app.state.config.SHOW_ADMIN_DETAILS = form_data.SHOW_ADMIN_DETAILS
+        request.app.state.config.ENABLE_SIGNUP = form_data.ENABLE_SIGNUP
 
-    if form_data.DEFAULT_USER_ROLE in ["pending", "user", "admin"]:
-        request.app.state.config.DEFAULT_USER_ROLE = form_data.DEFAULT_USER_ROLE
+        if form_data.DEFAULT_USER_ROLE in ["pending", "user", "admin"]:
+            request.app.state.config.DEFAULT_USER_ROLE = form_data.DEFAULT_USER_ROLE
 
-    pattern = r"^(-1|0|(-?\d+(\.\d+)?)(ms|s|m|h|d|w))$"
+        pattern = r"^(-1|0|(-?\d+(\.\d+)?)(ms|s|m|h|d|w))$"
 
-    # Check if the input string matches the pattern
-    if re.match(pattern, form_data.JWT_EXPIRES_IN):
-        request.app.state.config.JWT_EXPIRES_IN = form_data.JWT_EXPIRES_IN
+        # Check if the input string matches the pattern
+        if re.match(pattern, form_data.JWT_EXPIRES_IN):
+            request.app.state.config.JWT_EXPIRES_IN = form_data.JWT_EXPIRES_IN
 
-    request.app.state.config.ENABLE_COMMUNITY_SHARING = (
-        form_data.ENABLE_COMMUNITY_SHARING
-    )
-    request.app.state.config.ENABLE_MESSAGE_RATING = form_data.ENABLE_MESSAGE_RATING
+        request.app.state.config.ENABLE_COMMUNITY_SHARING = (
+            form_data.ENABLE_COMMUNITY_SHARING
+        )
+        request.app.state.config.ENABLE_MESSAGE_RATING = form_data.ENABLE_MESSAGE_RATING
 
     return {
         "SHOW_ADMIN_DETAILS": request.app.state.config.SHOW_ADMIN_DETAILS,
@@ -399,6 +402,19 @@ async def update_admin_config(
     }
 
 
+############################
+# GetAuthCacheStats
+############################
+
+
+@router.get("/admin/cache")
+async def get_auth_cache_stats(user=Depends(get_admin_user)):
+    return {
+        "users": user_cache.stats(),
+        "invalid_api_keys": invalid_api_key_cache.stats(),
+    }
+
+
 ############################
 # API Key
 ############################
@@ -1,11 +1,15 @@
-from fastapi import Depends, Request, HTTPException, status
+from fastapi import Depends, Query, Request, Response, HTTPException, status
 from datetime import datetime, timedelta
-from typing import Union, Optional
+from typing import Iterator, Union, Optional
 from utils.utils import get_verified_user, get_admin_user
+from utils import codec
+from utils.jobs import Jobs, JobModel
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import json
+import asyncio
 import logging
+import zlib
 
 from apps.webui.models.users import Users
 from apps.webui.models.chats import (
@@ -14,7 +18,10 @@ from apps.webui.models.chats import (
     ChatTitleForm,
     ChatForm,
     ChatTitleIdResponse,
+    ChatSearchResponse,
+    ChatMessagesResponse,
     Chats,
+    get_next_chat_cursor,
 )
 
 
@@ -29,6 +36,7 @@ from apps.webui.models.tags import (
 from constants import ERROR_MESSAGES
 
 from config import SRC_LOG_LEVELS, ENABLE_ADMIN_EXPORT, ENABLE_ADMIN_CHAT_ACCESS
+from env import CHAT_STORAGE_MODE, CHAT_COMPRESSION
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -40,18 +48,66 @@ router = APIRouter()
 ############################
 
 
+def set_next_chat_cursor(
+    response: Response, chats: list[ChatTitleIdResponse], limit: Optional[int]
+):
+    # The body stays a plain list, the cursor for the next page is a header
+    next_cursor = get_next_chat_cursor(chats, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+
+def get_cursor_limit(cursor: Optional[str], limit: Optional[int]) -> Optional[int]:
+    if cursor is not None and not limit:
+        return 60
+    return limit
+
+
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    response: Response,
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
 ):
+    skip = None
     if page is not None:
         limit = 60
         skip = (page - 1) * limit
+    limit = get_cursor_limit(cursor, limit)
 
-        return Chats.get_chat_title_id_list_by_user_id(user.id, skip=skip, limit=limit)
-    else:
-        return Chats.get_chat_title_id_list_by_user_id(user.id)
+    try:
+        chats = await Chats.get_chat_title_id_list_by_user_id_async(
+            user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+    set_next_chat_cursor(response, chats, limit)
+    return chats
+
+
+############################
+# SearchChats
+############################
+
+
+@router.get("/search", response_model=list[ChatSearchResponse])
+async def search_user_chats(
+    query: str,
+    user=Depends(get_verified_user),
+    include_archived: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+):
+    return await Chats.search_chats_by_user_id_async(
+        user.id, query, include_archived=include_archived, skip=skip, limit=limit
+    )
 
 
 ############################
@@ -71,7 +127,7 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    result = Chats.delete_chats_by_user_id(user.id)
+    result = await asyncio.to_thread(Chats.delete_chats_by_user_id, user.id)
     return result
 
 
@@ -83,18 +139,31 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 @router.get("/list/user/{user_id}", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_user_id(
     user_id: str,
+    response: Response,
     user=Depends(get_admin_user),
-    skip: int = 0,
-    limit: int = 50,
+    skip: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
     if not ENABLE_ADMIN_CHAT_ACCESS:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, skip=skip, limit=limit
-    )
+
+    limit = get_cursor_limit(cursor, limit)
+    try:
+        chats = Chats.get_chat_list_by_user_id(
+            user_id, include_archived=True, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+    set_next_chat_cursor(response, chats, limit)
+    return chats
 
 
 ############################
@@ -105,8 +174,8 @@ async def get_user_chat_list_by_user_id(
 @router.post("/new", response_model=Optional[ChatResponse])
 async def create_new_chat(form_data: ChatForm, user=Depends(get_verified_user)):
     try:
-        chat = Chats.insert_new_chat(user.id, form_data)
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        chat = await Chats.insert_new_chat_async(user.id, form_data)
+        return ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -119,14 +188,72 @@ async def create_new_chat(form_data: ChatForm, user=Depends(get_verified_user)):
 ############################
 
 
+def stream_chats_as_ndjson(
+    chats: Iterator[ChatModel], compress: bool = False
+) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None  # gzip framing
+
+    buffer = []
+    size = 0
+    for chat in chats:
+        # chat.chat is already JSON, so it is spliced in rather than re-encoded
+        fields = codec.dumps(chat.model_dump(exclude={"chat"}))
+        line = f'{fields[:-1]}, "chat": {chat.chat}}}\n'.encode()
+        buffer.append(line)
+        size += len(line)
+
+        if size >= 64 * 1024:
+            chunk = b"".join(buffer)
+            buffer, size = [], 0
+            yield compressor.compress(chunk) if compressor else chunk
+
+    chunk = b"".join(buffer)
+    if compressor:
+        yield compressor.compress(chunk) + compressor.flush()
+    elif chunk:
+        yield chunk
+
+
+def get_chats_export_response(
+    chats: Iterator[ChatModel], compress: bool
+) -> StreamingResponse:
+    filename = "chats.ndjson.gz" if compress else "chats.ndjson"
+    return StreamingResponse(
+        stream_chats_as_ndjson(chats, compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 @router.get("/all", response_model=list[ChatResponse])
-async def get_user_chats(user=Depends(get_verified_user)):
+async def get_user_chats(
+    user=Depends(get_verified_user), ndjson: bool = False, compress: bool = False
+):
+    if ndjson:
+        return get_chats_export_response(Chats.iter_chats(user.id), compress)
+
     return [
-        ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
         for chat in Chats.get_chats_by_user_id(user.id)
     ]
 
 
+############################
+# CompactChatStorage
+############################
+
+
+@router.post("/storage/compact", response_model=JobModel)
+async def compact_chat_storage(user=Depends(get_admin_user)):
+    return Jobs.start("compact_chats", Chats.compact_chats)
+
+
+@router.get("/storage/stats", response_model=dict)
+async def get_chat_storage_stats(user=Depends(get_admin_user)):
+    stats = await asyncio.to_thread(Chats.get_chat_storage_stats)
+    return {"compression": CHAT_COMPRESSION, **stats}
+
+
 ############################
 # GetArchivedChats
 ############################
@@ -135,7 +262,7 @@ async def get_user_chats(user=Depends(get_verified_user)):
 @router.get("/all/archived", response_model=list[ChatResponse])
 async def get_user_archived_chats(user=Depends(get_verified_user)):
     return [
-        ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
         for chat in Chats.get_archived_chats_by_user_id(user.id)
     ]
 
@@ -146,18 +273,35 @@ async def get_user_archived_chats(user=Depends(get_verified_user)):
 
 
 @router.get("/all/db", response_model=list[ChatResponse])
-async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
+async def get_all_user_chats_in_db(
+    user=Depends(get_admin_user), ndjson: bool = False, compress: bool = False
+):
     if not ENABLE_ADMIN_EXPORT:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
+
+    if ndjson:
+        return get_chats_export_response(Chats.iter_chats(), compress)
+
     return [
-        ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
         for chat in Chats.get_chats()
     ]
 
 
+############################
+# MigrateChatStorage
+############################
+
+
+@router.post("/storage/migrate", response_model=dict)
+async def migrate_chat_storage(user=Depends(get_admin_user)):
+    migrated = await asyncio.to_thread(Chats.migrate_chat_storage)
+    return {"mode": CHAT_STORAGE_MODE, "migrated": migrated}
+
+
 ############################
 # GetArchivedChats
 ############################
@@ -165,9 +309,25 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
 
 @router.get("/archived", response_model=list[ChatTitleIdResponse])
 async def get_archived_session_user_chat_list(
-    user=Depends(get_verified_user), skip: int = 0, limit: int = 50
+    response: Response,
+    user=Depends(get_verified_user),
+    skip: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
-    return Chats.get_archived_chat_list_by_user_id(user.id, skip, limit)
+    limit = get_cursor_limit(cursor, limit)
+    try:
+        chats = Chats.get_archived_chat_list_by_user_id(
+            user.id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+    set_next_chat_cursor(response, chats, limit)
+    return chats
 
 
 ############################
@@ -195,10 +355,10 @@ async def get_shared_chat_by_id(share_id: str, user=Depends(get_verified_user)):
     if user.role == "user" or (user.role == "admin" and not ENABLE_ADMIN_CHAT_ACCESS):
         chat = Chats.get_chat_by_share_id(share_id)
     elif user.role == "admin" and ENABLE_ADMIN_CHAT_ACCESS:
-        chat = Chats.get_chat_by_id(share_id)
+        chat = await Chats.get_chat_by_id_async(share_id)
 
     if chat:
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
@@ -213,26 +373,36 @@ async def get_shared_chat_by_id(share_id: str, user=Depends(get_verified_user)):
 class TagNameForm(BaseModel):
     name: str
     skip: Optional[int] = 0
-    limit: Optional[int] = 50
+    # Every chat with the tag unless a limit or a cursor is given
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
 
 
 @router.post("/tags", response_model=list[ChatTitleIdResponse])
 async def get_user_chat_list_by_tag_name(
-    form_data: TagNameForm, user=Depends(get_verified_user)
+    form_data: TagNameForm, response: Response, user=Depends(get_verified_user)
 ):
+    limit = get_cursor_limit(form_data.cursor, form_data.limit)
 
-    chat_ids = [
-        chat_id_tag.chat_id
-        for chat_id_tag in Tags.get_chat_ids_by_tag_name_and_user_id(
-            form_data.name, user.id
+    try:
+        chats = await Chats.get_chat_title_id_list_by_tag_name_and_user_id_async(
+            form_data.name,
+            user.id,
+            skip=form_data.skip,
+            limit=limit,
+            cursor=form_data.cursor,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
         )
-    ]
-
-    chats = Chats.get_chat_list_by_chat_ids(chat_ids, form_data.skip, form_data.limit)
 
-    if len(chats) == 0:
+    # Only an empty first page means the tag is no longer used
+    if len(chats) == 0 and not form_data.skip and not form_data.cursor:
         Tags.delete_tag_by_tag_name_and_user_id(form_data.name, user.id)
 
+    set_next_chat_cursor(response, chats, limit)
     return chats
 
 
@@ -244,7 +414,7 @@ async def get_user_chat_list_by_tag_name(
 @router.get("/tags/all", response_model=list[TagModel])
 async def get_all_tags(user=Depends(get_verified_user)):
     try:
-        tags = Tags.get_tags_by_user_id(user.id)
+        tags = await Tags.get_tags_by_user_id_async(user.id)
         return tags
     except Exception as e:
         log.exception(e)
@@ -260,10 +430,48 @@ async def get_all_tags(user=Depends(get_verified_user)):
 
 @router.get("/{id}", response_model=Optional[ChatResponse])
 async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(id, user.id)
 
     if chat:
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
+        )
+
+
+############################
+# GetChatMessagesById
+############################
+
+
+@router.get("/{id}/messages", response_model=ChatMessagesResponse)
+async def get_chat_messages_by_id(
+    id: str,
+    user=Depends(get_verified_user),
+    limit: Optional[int] = Query(50, ge=0),
+    before: Optional[str] = None,
+):
+    """
+    The chat with the latest `limit` messages of its active branch. Pass the
+    id of the oldest message received as `before` to load earlier ones.
+    """
+    try:
+        chat = await asyncio.to_thread(
+            Chats.get_chat_messages_by_id_and_user_id,
+            id,
+            user.id,
+            limit=limit,
+            before=before,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+    if chat:
+        return chat
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
@@ -279,12 +487,12 @@ async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
 async def update_chat_by_id(
     id: str, form_data: ChatForm, user=Depends(get_verified_user)
 ):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(id, user.id)
     if chat:
-        updated_chat = {**json.loads(chat.chat), **form_data.chat}
+        updated_chat = {**codec.loads(chat.chat), **form_data.chat}
 
-        chat = Chats.update_chat_by_id(id, updated_chat)
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        chat = await Chats.update_chat_by_id_async(id, updated_chat)
+        return ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -310,7 +518,7 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
                 detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
             )
 
-        result = Chats.delete_chat_by_id_and_user_id(id, user.id)
+        result = await Chats.delete_chat_by_id_and_user_id_async(id, user.id)
         return result
 
 
@@ -321,10 +529,10 @@ async def delete_chat_by_id(request: Request, id: str, user=Depends(get_verified
 
 @router.get("/{id}/clone", response_model=Optional[ChatResponse])
 async def clone_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(id, user.id)
     if chat:
 
-        chat_body = json.loads(chat.chat)
+        chat_body = codec.loads(chat.chat)
         updated_chat = {
             **chat_body,
             "originalChatId": chat.id,
@@ -332,8 +540,10 @@ async def clone_chat_by_id(id: str, user=Depends(get_verified_user)):
             "title": f"Clone of {chat.title}",
         }
 
-        chat = Chats.insert_new_chat(user.id, ChatForm(**{"chat": updated_chat}))
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        chat = await Chats.insert_new_chat_async(
+            user.id, ChatForm(**{"chat": updated_chat})
+        )
+        return ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.DEFAULT()
@@ -347,10 +557,10 @@ async def clone_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.get("/{id}/archive", response_model=Optional[ChatResponse])
 async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(id, user.id)
     if chat:
         chat = Chats.toggle_chat_archive_by_id(id)
-        return ChatResponse(**{**chat.model_dump(), "chat": json.loads(chat.chat)})
+        return ChatResponse(**{**chat.model_dump(), "chat": codec.loads(chat.chat)})
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.DEFAULT()
@@ -364,12 +574,12 @@ async def archive_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.post("/{id}/share", response_model=Optional[ChatResponse])
 async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(id, user.id)
     if chat:
         if chat.share_id:
             shared_chat = Chats.update_shared_chat_by_chat_id(chat.id)
             return ChatResponse(
-                **{**shared_chat.model_dump(), "chat": json.loads(shared_chat.chat)}
+                **{**shared_chat.model_dump(), "chat": codec.loads(shared_chat.chat)}
             )
 
         shared_chat = Chats.insert_shared_chat_by_chat_id(chat.id)
@@ -380,7 +590,7 @@ async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
             )
 
         return ChatResponse(
-            **{**shared_chat.model_dump(), "chat": json.loads(shared_chat.chat)}
+            **{**shared_chat.model_dump(), "chat": codec.loads(shared_chat.chat)}
         )
     else:
         raise HTTPException(
@@ -396,7 +606,7 @@ async def share_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.delete("/{id}/share", response_model=Optional[bool])
 async def delete_shared_chat_by_id(id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    chat = await Chats.get_chat_by_id_and_user_id_async(id, user.id)
     if chat:
         if not chat.share_id:
             return False
@@ -419,7 +629,7 @@ async def delete_shared_chat_by_id(id: str, user=Depends(get_verified_user)):
 
 @router.get("/{id}/tags", response_model=list[TagModel])
 async def get_chat_tags_by_id(id: str, user=Depends(get_verified_user)):
-    tags = Tags.get_tags_by_chat_id_and_user_id(id, user.id)
+    tags = await Tags.get_tags_by_chat_id_and_user_id_async(id, user.id)
 
     if tags != None:
         return tags
@@ -438,7 +648,7 @@ async def get_chat_tags_by_id(id: str, user=Depends(get_verified_user)):
 async def add_chat_tag_by_id(
     id: str, form_data: ChatIdTagForm, user=Depends(get_verified_user)
 ):
-    tags = Tags.get_tags_by_chat_id_and_user_id(id, user.id)
+    tags = await Tags.get_tags_by_chat_id_and_user_id_async(id, user.id)
 
     if form_data.tag_name not in tags:
         tag = Tags.add_tag_to_chat(user.id, form_data)
@@ -14,6 +14,7 @@ from apps.webui.models.functions import (
 )
 from apps.webui.utils import load_function_module_by_id
 from utils.utils import get_verified_user, get_admin_user
+from utils.registry import invalidate_models
 from constants import ERROR_MESSAGES
 
 from importlib import util
@@ -78,6 +79,7 @@ async def create_new_function(
             FUNCTIONS[form_data.id] = function_module
 
             function = Functions.insert_new_function(user.id, function_type, form_data)
+            invalidate_models()
 
             function_cache_dir = Path(CACHE_DIR) / "functions" / form_data.id
             function_cache_dir.mkdir(parents=True, exist_ok=True)
@@ -132,6 +134,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         function = Functions.update_function_by_id(
             id, {"is_active": not function.is_active}
         )
+        invalidate_models()
 
         if function:
             return function
@@ -159,6 +162,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         function = Functions.update_function_by_id(
             id, {"is_global": not function.is_global}
         )
+        invalidate_models()
 
         if function:
             return function
@@ -199,6 +203,7 @@ async def update_function_by_id(
         print(updated)
 
         function = Functions.update_function_by_id(id, updated)
+        invalidate_models()
 
         if function:
             return function
@@ -227,6 +232,7 @@ async def delete_function_by_id(
     result = Functions.delete_function_by_id(id)
 
     if result:
+        invalidate_models()
         FUNCTIONS = request.app.state.FUNCTIONS
         if id in FUNCTIONS:
             del FUNCTIONS[id]
@@ -318,6 +324,7 @@ async def update_function_valves_by_id(
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 valves = Valves(**form_data)
                 Functions.update_function_valves_by_id(id, valves.model_dump())
+                invalidate_models()
                 return valves.model_dump()
             except Exception as e:
                 print(e)
@@ -5,6 +5,7 @@ from typing import Union, Optional
 
 from fastapi import APIRouter
 from pydantic import BaseModel
+import asyncio
 import logging
 
 from apps.webui.models.memories import Memories, MemoryModel
@@ -22,7 +23,11 @@ router = APIRouter()
 
 @router.get("/ef")
 async def get_embeddings(request: Request):
-    return {"result": request.app.state.EMBEDDING_FUNCTION("hello world")}
+    return {
+        "result": await asyncio.to_thread(
+            request.app.state.EMBEDDING_FUNCTION, "hello world"
+        )
+    }
 
 
 ############################
@@ -55,7 +60,9 @@ async def add_memory(
     user=Depends(get_verified_user),
 ):
     memory = Memories.insert_new_memory(user.id, form_data.content)
-    memory_embedding = request.app.state.EMBEDDING_FUNCTION(memory.content)
+    memory_embedding = await asyncio.to_thread(
+        request.app.state.EMBEDDING_FUNCTION, memory.content
+    )
 
     collection = CHROMA_CLIENT.get_or_create_collection(name=f"user-memory-{user.id}")
     collection.upsert(
@@ -82,7 +89,9 @@ class QueryMemoryForm(BaseModel):
 async def query_memory(
     request: Request, form_data: QueryMemoryForm, user=Depends(get_verified_user)
 ):
-    query_embedding = request.app.state.EMBEDDING_FUNCTION(form_data.content)
+    query_embedding = await asyncio.to_thread(
+        request.app.state.EMBEDDING_FUNCTION, form_data.content
+    )
     collection = CHROMA_CLIENT.get_or_create_collection(name=f"user-memory-{user.id}")
 
     results = collection.query(
@@ -105,7 +114,9 @@ async def reset_memory_from_vector_db(
 
     memories = Memories.get_memories_by_user_id(user.id)
     for memory in memories:
-        memory_embedding = request.app.state.EMBEDDING_FUNCTION(memory.content)
+        memory_embedding = await asyncio.to_thread(
+            request.app.state.EMBEDDING_FUNCTION, memory.content
+        )
         collection.upsert(
             documents=[memory.content],
             ids=[memory.id],
@@ -150,7 +161,9 @@ async def update_memory_by_id(
         raise HTTPException(status_code=404, detail="Memory not found")
 
     if form_data.content is not None:
-        memory_embedding = request.app.state.EMBEDDING_FUNCTION(form_data.content)
+        memory_embedding = await asyncio.to_thread(
+            request.app.state.EMBEDDING_FUNCTION, form_data.content
+        )
         collection = CHROMA_CLIENT.get_or_create_collection(
             name=f"user-memory-{user.id}"
         )
@@ -9,6 +9,7 @@ import json
 from apps.webui.models.models import Models, ModelModel, ModelForm, ModelResponse
 
 from utils.utils import get_verified_user, get_admin_user
+from utils.registry import invalidate_models
 from constants import ERROR_MESSAGES
 
 router = APIRouter()
@@ -20,7 +21,7 @@ router = APIRouter()
 
 @router.get("/", response_model=list[ModelResponse])
 async def get_models(user=Depends(get_verified_user)):
-    return Models.get_all_models()
+    return await Models.get_all_models_async()
 
 
 ############################
@@ -43,6 +44,7 @@ async def add_new_model(
         model = Models.insert_new_model(form_data, user.id)
 
         if model:
+            invalidate_models()
             return model
         else:
             raise HTTPException(
@@ -58,7 +60,7 @@ async def add_new_model(
 
 @router.get("/", response_model=Optional[ModelModel])
 async def get_model_by_id(id: str, user=Depends(get_verified_user)):
-    model = Models.get_model_by_id(id)
+    model = await Models.get_model_by_id_async(id)
 
     if model:
         return model
@@ -81,14 +83,16 @@ async def update_model_by_id(
     form_data: ModelForm,
     user=Depends(get_admin_user),
 ):
-    model = Models.get_model_by_id(id)
+    model = await Models.get_model_by_id_async(id)
     if model:
         model = Models.update_model_by_id(id, form_data)
+        invalidate_models()
         return model
     else:
         if form_data.id in request.app.state.MODELS:
             model = Models.insert_new_model(form_data, user.id)
             if model:
+                invalidate_models()
                 return model
             else:
                 raise HTTPException(
@@ -110,4 +114,5 @@ async def update_model_by_id(
 @router.delete("/delete", response_model=bool)
 async def delete_model_by_id(id: str, user=Depends(get_admin_user)):
     result = Models.delete_model_by_id(id)
+    invalidate_models()
     return result
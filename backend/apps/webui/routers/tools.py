@@ -29,7 +29,7 @@ router = APIRouter()
 
 @router.get("/", response_model=list[ToolResponse])
 async def get_toolkits(user=Depends(get_verified_user)):
-    toolkits = [toolkit for toolkit in Tools.get_tools()]
+    toolkits = [toolkit for toolkit in await Tools.get_tools_async()]
     return toolkits
 
 
@@ -40,7 +40,7 @@ async def get_toolkits(user=Depends(get_verified_user)):
 
 @router.get("/export", response_model=list[ToolModel])
 async def get_toolkits(user=Depends(get_admin_user)):
-    toolkits = [toolkit for toolkit in Tools.get_tools()]
+    toolkits = [toolkit for toolkit in await Tools.get_tools_async()]
     return toolkits
 
 
@@ -5,6 +5,7 @@ from typing import Union, Optional
 
 from fastapi import APIRouter
 from pydantic import BaseModel
+import asyncio
 import time
 import uuid
 import logging
@@ -25,6 +26,7 @@ from utils.utils import (
     get_current_user,
     get_admin_user,
 )
+from utils.jobs import Jobs, JobModel
 from constants import ERROR_MESSAGES
 
 from config import SRC_LOG_LEVELS
@@ -178,7 +180,7 @@ async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
     # If it is, get the user_id from the chat
     if user_id.startswith("shared-"):
         chat_id = user_id.replace("shared-", "")
-        chat = Chats.get_chat_by_id(chat_id)
+        chat = await Chats.get_chat_by_id_async(chat_id)
         if chat:
             user_id = chat.user_id
         else:
@@ -187,7 +189,7 @@ async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
                 detail=ERROR_MESSAGES.USER_NOT_FOUND,
             )
 
-    user = Users.get_user_by_id(user_id)
+    user = await Users.get_user_by_id_async(user_id)
 
     if user:
         return UserResponse(name=user.name, profile_image_url=user.profile_image_url)
@@ -209,7 +211,7 @@ async def update_user_by_id(
     form_data: UserUpdateForm,
     session_user=Depends(get_admin_user),
 ):
-    user = Users.get_user_by_id(user_id)
+    user = await Users.get_user_by_id_async(user_id)
 
     if user:
         if form_data.email.lower() != user.email:
@@ -257,7 +259,7 @@ async def update_user_by_id(
 @router.delete("/{user_id}", response_model=bool)
 async def delete_user_by_id(user_id: str, user=Depends(get_admin_user)):
     if user.id != user_id:
-        result = Auths.delete_auth_by_id(user_id)
+        result = await asyncio.to_thread(Auths.delete_auth_by_id, user_id)
 
         if result:
             return True
@@ -271,3 +273,24 @@ async def delete_user_by_id(user_id: str, user=Depends(get_admin_user)):
         status_code=status.HTTP_403_FORBIDDEN,
         detail=ERROR_MESSAGES.ACTION_PROHIBITED,
     )
+
+
+@router.delete("/{user_id}/background", response_model=JobModel)
+async def delete_user_by_id_in_background(user_id: str, user=Depends(get_admin_user)):
+    """
+    Delete the user in batches on a worker thread. Poll the returned job at
+    /utils/jobs/{id} for progress.
+    """
+    if user.id == user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ERROR_MESSAGES.ACTION_PROHIBITED,
+        )
+
+    if Users.get_user_by_id(user_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.USER_NOT_FOUND,
+        )
+
+    return Jobs.start(f"delete_user:{user_id}", Auths.delete_auth_by_id, user_id)
@@ -14,8 +14,10 @@ import black
 
 from utils.utils import get_admin_user
 from utils.misc import calculate_sha256, get_gravatar_url
+from utils.jobs import Jobs, JobModel
 
 from config import OLLAMA_BASE_URLS, DATA_DIR, UPLOAD_DIR, ENABLE_ADMIN_EXPORT
+from env import DATABASE_PROFILE, DATABASE_SQLITE_PRAGMAS
 from constants import ERROR_MESSAGES
 
 
@@ -140,6 +142,35 @@ async def download_db(user=Depends(get_admin_user)):
     )
 
 
+@router.get("/db/pool")
+async def get_db_pool_status(user=Depends(get_admin_user)):
+    from apps.webui.internal.db import engine, async_engine, get_pool_status
+
+    return {
+        "profile": DATABASE_PROFILE,
+        "dialect": engine.name,
+        "sqlite_pragmas": DATABASE_SQLITE_PRAGMAS if engine.name == "sqlite" else {},
+        "sync": get_pool_status(engine),
+        "async": get_pool_status(async_engine.sync_engine) if async_engine else None,
+    }
+
+
+@router.get("/jobs", response_model=list[JobModel])
+async def get_jobs(user=Depends(get_admin_user)):
+    return Jobs.get_jobs()
+
+
+@router.get("/jobs/{id}", response_model=JobModel)
+async def get_job_by_id(id: str, user=Depends(get_admin_user)):
+    job = Jobs.get_job_by_id(id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
+
+
 @router.get("/litellm/config")
 async def download_litellm_config_yaml(user=Depends(get_admin_user)):
     return FileResponse(
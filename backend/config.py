@@ -1,9 +1,10 @@
-from sqlalchemy import create_engine, Column, Integer, DateTime, JSON, func
+from sqlalchemy import create_engine, Column, Integer, DateTime, JSON, func, select
 from contextlib import contextmanager
 
 
 import os
 import sys
+import functools
 import logging
 import importlib.metadata
 import pkgutil
@@ -27,6 +28,7 @@ import shutil
 from apps.webui.internal.db import Base, get_db
 
 from constants import ERROR_MESSAGES
+from utils.registry import invalidate_models
 
 from env import (
     ENV,
@@ -51,6 +53,10 @@ from env import (
     WEBUI_SECRET_KEY,
     WEBUI_SESSION_COOKIE_SAME_SITE,
     WEBUI_SESSION_COOKIE_SECURE,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+    CONFIG_POLL_INTERVAL,
+    REDIS_URL,
+    CONFIG_REDIS_CHANNEL,
     log,
 )
 
@@ -100,16 +106,48 @@ def load_json_config():
 
 
 def save_to_db(data):
+    global CONFIG_VERSION
+
     with get_db() as db:
-        existing_config = db.query(Config).first()
+        existing_config = db.query(Config).order_by(Config.id.desc()).first()
         if not existing_config:
-            new_config = Config(data=data, version=0)
-            db.add(new_config)
+            existing_config = Config(data=data, version=0)
+            db.add(existing_config)
         else:
             existing_config.data = data
+            # Incremented in SQL so that concurrent writers never share a version
+            existing_config.version = Config.version + 1
             existing_config.updated_at = datetime.now()
             db.add(existing_config)
+
+            # Only the latest entry is ever read, drop any older ones
+            db.query(Config).filter(Config.id < existing_config.id).delete()
         db.commit()
+        db.refresh(existing_config)
+        CONFIG_VERSION = existing_config.version
+
+    publish_config_version(CONFIG_VERSION)
+
+
+def get_config_version() -> Optional[int]:
+    with get_db() as db:
+        return db.scalar(select(Config.version).order_by(Config.id.desc()).limit(1))
+
+
+def publish_config_version(version: int):
+    if not REDIS_URL:
+        return
+    try:
+        get_redis().publish(CONFIG_REDIS_CHANNEL, str(version))
+    except Exception as e:
+        log.warning(f"Could not publish config version {version}: {e}")
+
+
+@functools.cache
+def get_redis():
+    import redis
+
+    return redis.Redis.from_url(REDIS_URL)
 
 
 # When initializing, check if config.json exists and migrate it to the database
@@ -180,13 +218,20 @@ DEFAULT_CONFIG = {
 }
 
 
-def get_config():
+def get_config_entry() -> tuple[Optional[int], dict]:
+    """The version and the data of the latest config entry."""
     with get_db() as db:
         config_entry = db.query(Config).order_by(Config.id.desc()).first()
-        return config_entry.data if config_entry else DEFAULT_CONFIG
+        if config_entry:
+            return config_entry.version, config_entry.data
+        return None, DEFAULT_CONFIG
 
 
-CONFIG_DATA = get_config()
+def get_config():
+    return get_config_entry()[1]
+
+
+CONFIG_VERSION, CONFIG_DATA = get_config_entry()
 
 
 def get_config_value(config_path: str):
@@ -202,6 +247,10 @@ def get_config_value(config_path: str):
 
 T = TypeVar("T")
 
+# Every PersistentConfig, so that they can be reloaded when another worker
+# changes the config
+PERSISTENT_CONFIGS: list["PersistentConfig"] = []
+
 
 class PersistentConfig(Generic[T]):
     def __init__(self, env_name: str, config_path: str, env_value: T):
@@ -214,6 +263,7 @@ class PersistentConfig(Generic[T]):
             self.value = self.config_value
         else:
             self.value = env_value
+        PERSISTENT_CONFIGS.append(self)
 
     def __str__(self):
         return str(self.value)
@@ -231,8 +281,8 @@ class PersistentConfig(Generic[T]):
             )
         return super().__getattribute__(item)
 
-    def save(self):
-        log.info(f"Saving '{self.env_name}' to the database")
+    def update(self):
+        """Write the value into CONFIG_DATA without persisting it."""
         path_parts = self.config_path.split(".")
         sub_config = CONFIG_DATA
         for key in path_parts[:-1]:
@@ -240,19 +290,82 @@ class PersistentConfig(Generic[T]):
                 sub_config[key] = {}
             sub_config = sub_config[key]
         sub_config[path_parts[-1]] = self.value
+
+    def save(self):
+        log.info(f"Saving '{self.env_name}' to the database")
+        self.update()
         save_to_db(CONFIG_DATA)
         self.config_value = self.value
 
 
+def load_changed_config() -> Optional[tuple[int, dict]]:
+    """
+    The latest config entry if another worker has saved a newer version than
+    the one loaded here, otherwise None. Only the version is read until then.
+    """
+    version = get_config_version()
+    if version is None or version == CONFIG_VERSION:
+        return None
+    return get_config_entry()
+
+
+# Values the merged model list is built from
+MODEL_SOURCE_CONFIGS = {
+    "ENABLE_OLLAMA_API",
+    "OLLAMA_BASE_URLS",
+    "ENABLE_OPENAI_API",
+    "OPENAI_API_BASE_URLS",
+    "OPENAI_API_KEYS",
+}
+
+
+def apply_config(version: int, data: dict) -> list[str]:
+    """
+    Replace CONFIG_DATA with `data` and refresh every PersistentConfig stored
+    in it. Returns the names of the values that changed. Meant to run on the
+    event loop, like the assignments to AppConfig, so it never interleaves
+    with a transaction.
+    """
+    global CONFIG_VERSION
+
+    if version == CONFIG_VERSION:
+        return []
+
+    CONFIG_DATA.clear()
+    CONFIG_DATA.update(data)
+    CONFIG_VERSION = version
+
+    changed = []
+    for config in PERSISTENT_CONFIGS:
+        value = get_config_value(config.config_path)
+        if value is not None and value != config.value:
+            config.value = value
+            config.config_value = value
+            changed.append(config.env_name)
+
+    if changed:
+        log.info(f"Reloaded {', '.join(changed)} from config version {version}")
+    if MODEL_SOURCE_CONFIGS.intersection(changed):
+        invalidate_models()
+    return changed
+
+
 class AppConfig:
     _state: dict[str, PersistentConfig]
+    # The values replaced inside the current transaction, by key
+    _changes: Optional[dict]
 
     def __init__(self):
         super().__setattr__("_state", {})
+        super().__setattr__("_changes", None)
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
+        elif self._changes is not None:
+            self._changes.setdefault(key, self._state[key].value)
+            self._state[key].value = value
+            self._state[key].update()
         else:
             self._state[key].value = value
             self._state[key].save()
@@ -260,6 +373,40 @@ class AppConfig:
     def __getattr__(self, key):
         return self._state[key].value
 
+    @contextmanager
+    def transaction(self):
+        """
+        Persist every assignment made inside the block with a single write
+        once it exits, or restore the previous values if it raises:
+
+            with app.state.config.transaction():
+                app.state.config.TOP_K = 5
+                app.state.config.CHUNK_SIZE = 1000
+
+        Nested transactions join the outer one. Don't await inside the block,
+        assignments from other requests would join it as well.
+        """
+        if self._changes is not None:
+            yield self
+            return
+
+        super().__setattr__("_changes", {})
+        try:
+            yield self
+            if self._changes:
+                log.info(f"Saving {', '.join(self._changes)} to the database")
+                save_to_db(CONFIG_DATA)
+        except BaseException:
+            for key, value in self._changes.items():
+                self._state[key].value = value
+                self._state[key].update()
+            raise
+        else:
+            for key in self._changes:
+                self._state[key].config_value = self._state[key].value
+        finally:
+            super().__setattr__("_changes", None)
+
 
 ####################################
 # WEBUI_AUTH (Required for security)
@@ -70,6 +70,7 @@ class ERROR_MESSAGES(str, Enum):
     RATE_LIMIT_EXCEEDED = "API rate limit exceeded"
 
     MODEL_NOT_FOUND = lambda name="": f"Model '{name}' was not found"
+    MODEL_BUSY = lambda name="": f"Model '{name}' is busy, please try again in a moment"
     OPENAI_NOT_FOUND = lambda name="": "OpenAI API was not found"
     OLLAMA_NOT_FOUND = "WebUI could not connect to Ollama"
     CREATE_API_KEY_ERROR = "Oops! Something went wrong while creating your API key. Please try again later. If the issue persists, contact support for assistance."
@@ -77,6 +78,9 @@ class ERROR_MESSAGES(str, Enum):
     EMPTY_CONTENT = "The content provided is empty. Please ensure that there is text or data present before proceeding."
 
     DB_NOT_SQLITE = "This feature is only available when running with SQLite databases."
+    INVALID_CURSOR = (
+        "The pagination cursor is invalid. Please reload the list and try again."
+    )
 
     INVALID_URL = (
         "Oops! The URL you provided is invalid. Please double-check and try again."
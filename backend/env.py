@@ -215,6 +215,44 @@ DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{DATA_DIR}/webui.db")
 if "postgres://" in DATABASE_URL:
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://")
 
+# "default" keeps the driver defaults, "performance" tunes SQLite for concurrent
+# writers and sizes the connection pool for busier deployments.
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "default").lower()
+_PERFORMANCE_PROFILE = DATABASE_PROFILE == "performance"
+
+DATABASE_SQLITE_PRAGMAS = {
+    name: value
+    for name, value in {
+        "journal_mode": os.environ.get(
+            "DATABASE_SQLITE_JOURNAL_MODE", "WAL" if _PERFORMANCE_PROFILE else ""
+        ),
+        "synchronous": os.environ.get(
+            "DATABASE_SQLITE_SYNCHRONOUS", "NORMAL" if _PERFORMANCE_PROFILE else ""
+        ),
+        "mmap_size": os.environ.get(
+            "DATABASE_SQLITE_MMAP_SIZE",
+            str(256 * 1024 * 1024) if _PERFORMANCE_PROFILE else "",
+        ),
+        # Negative values are KiB, i.e. -64000 is a 64MB page cache
+        "cache_size": os.environ.get(
+            "DATABASE_SQLITE_CACHE_SIZE", "-64000" if _PERFORMANCE_PROFILE else ""
+        ),
+        "busy_timeout": os.environ.get(
+            "DATABASE_SQLITE_BUSY_TIMEOUT", "5000" if _PERFORMANCE_PROFILE else ""
+        ),
+    }.items()
+    if value
+}
+
+DATABASE_POOL_SIZE = int(
+    os.environ.get("DATABASE_POOL_SIZE", "20" if _PERFORMANCE_PROFILE else "5")
+)
+DATABASE_POOL_MAX_OVERFLOW = int(os.environ.get("DATABASE_POOL_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = int(os.environ.get("DATABASE_POOL_TIMEOUT", "30"))
+DATABASE_POOL_RECYCLE = int(
+    os.environ.get("DATABASE_POOL_RECYCLE", "1800" if _PERFORMANCE_PROFILE else "-1")
+)
+
 
 ####################################
 # WEBUI_AUTH (Required for security)
@@ -250,3 +288,175 @@ WEBUI_SESSION_COOKIE_SECURE = os.environ.get(
 
 if WEBUI_AUTH and WEBUI_SECRET_KEY == "":
     raise ValueError(ERROR_MESSAGES.ENV_VAR_NOT_FOUND)
+
+####################################
+# USER_CACHE
+####################################
+
+# Authenticated users are cached in-process, keyed by their token.
+# Set USER_CACHE_SIZE to 0 to disable the cache.
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "1000"))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "30"))
+
+####################################
+# USER_LAST_ACTIVE
+####################################
+
+# last_active_at is buffered in memory and written in bulk every
+# USER_LAST_ACTIVE_FLUSH_INTERVAL seconds (0 writes on every request).
+# A user's timestamp is only bumped once per USER_LAST_ACTIVE_GRANULARITY seconds.
+USER_LAST_ACTIVE_FLUSH_INTERVAL = int(
+    os.environ.get("USER_LAST_ACTIVE_FLUSH_INTERVAL", "30")
+)
+USER_LAST_ACTIVE_GRANULARITY = int(os.environ.get("USER_LAST_ACTIVE_GRANULARITY", "60"))
+
+####################################
+# CONFIG_SYNC
+####################################
+
+# Every worker checks the version of the stored config every
+# CONFIG_POLL_INTERVAL seconds (0 disables it) and reloads it when another
+# worker has changed it. With REDIS_URL set, changes are also announced on
+# CONFIG_REDIS_CHANNEL so that workers reload right away.
+CONFIG_POLL_INTERVAL = float(os.environ.get("CONFIG_POLL_INTERVAL", "5"))
+REDIS_URL = os.environ.get("REDIS_URL", "")
+CONFIG_REDIS_CHANNEL = os.environ.get("CONFIG_REDIS_CHANNEL", "open-webui:config")
+
+####################################
+# CHAT_STORAGE_MODE
+####################################
+
+# "blob" keeps a whole conversation in the chat row. "message" stores each
+# message in its own chat_message row so saving a chat only writes the messages
+# that changed. Chats are converted to the active mode when they are next saved.
+CHAT_STORAGE_MODE = os.environ.get("CHAT_STORAGE_MODE", "blob").lower()
+
+# Bulk chat deletion (all chats of a user, account removal) commits in batches
+# of this many chats so the write lock is only ever held briefly.
+CHAT_DELETE_BATCH_SIZE = int(os.environ.get("CHAT_DELETE_BATCH_SIZE", "200"))
+
+# Paging through a long chat stored as a single blob keeps the active branch of
+# this many recently read chats in memory, so later pages skip parsing the blob.
+CHAT_BRANCH_CACHE_SIZE = int(os.environ.get("CHAT_BRANCH_CACHE_SIZE", "16"))
+
+####################################
+# CHAT_COMPRESSION
+####################################
+
+# "none" (the default), "zlib" or "zstd" (requires zstandard). Chat blobs of at
+# least CHAT_COMPRESSION_THRESHOLD characters are compressed when written;
+# compressed and plain rows are both read regardless of this setting. Versions
+# without compression can't read compressed rows, so turning it on is one-way
+# unless the rows are rewritten with it off.
+CHAT_COMPRESSION = os.environ.get("CHAT_COMPRESSION", "none").lower()
+CHAT_COMPRESSION_THRESHOLD = int(os.environ.get("CHAT_COMPRESSION_THRESHOLD", "4096"))
+
+####################################
+# JSON_CODEC
+####################################
+
+# "orjson" (the default, when it is installed) or "json" for the stdlib encoder.
+# Used for JSON columns, chat blobs and API responses.
+JSON_CODEC = os.environ.get("JSON_CODEC", "orjson").lower()
+
+####################################
+# MODELS_CACHE
+####################################
+
+# The merged model list is rebuilt from the upstreams at most every
+# MODELS_CACHE_TTL seconds. For MODELS_CACHE_MAX_STALE seconds after that the
+# previous list is still served while it is rebuilt in the background.
+MODELS_CACHE_TTL = float(os.environ.get("MODELS_CACHE_TTL", "60"))
+MODELS_CACHE_MAX_STALE = float(os.environ.get("MODELS_CACHE_MAX_STALE", "600"))
+
+####################################
+# HTTP_CLIENT
+####################################
+
+# All upstream requests share one pool of keep-alive connections: at most
+# AIOHTTP_POOL_SIZE in total and AIOHTTP_POOL_SIZE_PER_HOST per host (0 for no
+# limit). Idle connections are kept for AIOHTTP_KEEPALIVE_TIMEOUT seconds and
+# resolved hosts for AIOHTTP_DNS_CACHE_TTL seconds. Connecting to an upstream
+# fails after AIOHTTP_CONNECT_TIMEOUT seconds, whatever the request timeout.
+AIOHTTP_POOL_SIZE = int(os.environ.get("AIOHTTP_POOL_SIZE", "100"))
+AIOHTTP_POOL_SIZE_PER_HOST = int(os.environ.get("AIOHTTP_POOL_SIZE_PER_HOST", "50"))
+AIOHTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("AIOHTTP_KEEPALIVE_TIMEOUT", "30"))
+AIOHTTP_DNS_CACHE_TTL = int(os.environ.get("AIOHTTP_DNS_CACHE_TTL", "300"))
+AIOHTTP_CONNECT_TIMEOUT = float(os.environ.get("AIOHTTP_CONNECT_TIMEOUT", "10"))
+
+####################################
+# OLLAMA_LOAD_BALANCER
+####################################
+
+# How a request for a model available on several OLLAMA_BASE_URLS picks one:
+# "least_outstanding" (fewest requests in flight), "ewma" (lowest recent time
+# to first byte, scaled by the requests in flight), "weighted" (random, by
+# OLLAMA_BASE_URL_WEIGHTS such as "http://a:11434=3;http://b:11434=1") or
+# "random". A node failing OLLAMA_EJECT_FAILURES requests in a row is skipped
+# for OLLAMA_EJECT_SECONDS.
+OLLAMA_LOAD_BALANCER = os.environ.get("OLLAMA_LOAD_BALANCER", "least_outstanding")
+OLLAMA_BASE_URL_WEIGHTS = os.environ.get("OLLAMA_BASE_URL_WEIGHTS", "")
+OLLAMA_EJECT_FAILURES = int(os.environ.get("OLLAMA_EJECT_FAILURES", "3"))
+OLLAMA_EJECT_SECONDS = float(os.environ.get("OLLAMA_EJECT_SECONDS", "30"))
+
+# With OLLAMA_CHAT_AFFINITY, the turns of a chat are sent to the same node as
+# long as it is healthy, so it can reuse the prompt it already processed. This
+# replaces OLLAMA_LOAD_BALANCER for chats: they are spread by hashing, in
+# proportion to OLLAMA_BASE_URL_WEIGHTS. A node with more than
+# OLLAMA_AFFINITY_LOAD_FACTOR times its share of the requests in flight sends
+# the chat to the next node in its order instead.
+OLLAMA_CHAT_AFFINITY = os.environ.get("OLLAMA_CHAT_AFFINITY", "False").lower() == "true"
+OLLAMA_AFFINITY_LOAD_FACTOR = max(
+    float(os.environ.get("OLLAMA_AFFINITY_LOAD_FACTOR", "1.25")), 1.0
+)
+
+####################################
+# OPENAI_FAILOVER
+####################################
+
+# Each of the OPENAI_API_BASE_URLS has a circuit breaker: after
+# OPENAI_BREAKER_FAILURES connection errors or server errors in a row, requests
+# to it fail fast for OPENAI_BREAKER_RECOVERY_SECONDS before one is tried again.
+# A model served by several connections is tried on each of them in order, up
+# to OPENAI_FAILOVER_ATTEMPTS times, as long as no response has started.
+OPENAI_BREAKER_FAILURES = int(os.environ.get("OPENAI_BREAKER_FAILURES", "5"))
+OPENAI_BREAKER_RECOVERY_SECONDS = float(
+    os.environ.get("OPENAI_BREAKER_RECOVERY_SECONDS", "30")
+)
+OPENAI_FAILOVER_ATTEMPTS = int(os.environ.get("OPENAI_FAILOVER_ATTEMPTS", "3"))
+
+####################################
+# ADMISSION_CONTROL
+####################################
+
+# At most ADMISSION_MAX_PER_MODEL chat completions run at once for a model and
+# ADMISSION_MAX_PER_BACKEND for a backend (an Ollama deployment, an OpenAI
+# connection or functions), 0 for no limit. Other requests wait up to
+# ADMISSION_QUEUE_TIMEOUT seconds in a queue shared fairly between users,
+# holding at most ADMISSION_MAX_QUEUE requests, and then get a 429.
+ADMISSION_MAX_PER_MODEL = int(os.environ.get("ADMISSION_MAX_PER_MODEL", "0"))
+ADMISSION_MAX_PER_BACKEND = int(os.environ.get("ADMISSION_MAX_PER_BACKEND", "0"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "60"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "200"))
+
+####################################
+# REQUEST_COALESCING
+####################################
+
+# Concurrent identical non-streaming upstream calls (task completions such as
+# titles, and model list fetches) share a single request and its result.
+ENABLE_REQUEST_COALESCING = (
+    os.environ.get("ENABLE_REQUEST_COALESCING", "True").lower() == "true"
+)
+
+####################################
+# TASK_CACHE
+####################################
+
+# Title, emoji and search query completions are cached by task, task model and
+# prompt for TASK_CACHE_TTL seconds: the last TASK_CACHE_SIZE in memory (0 to
+# disable) and, if TASK_CACHE_DISK_SIZE_MB is not 0, up to that many MB of
+# them under CACHE_DIR, shared between workers and kept across restarts.
+TASK_CACHE_SIZE = int(os.environ.get("TASK_CACHE_SIZE", "512"))
+TASK_CACHE_TTL = float(os.environ.get("TASK_CACHE_TTL", "3600"))
+TASK_CACHE_DISK_SIZE_MB = float(os.environ.get("TASK_CACHE_DISK_SIZE_MB", "0"))
@@ -1,5 +1,6 @@
 import base64
 import uuid
+import asyncio
 from contextlib import asynccontextmanager
 from authlib.integrations.starlette_client import OAuth
 from authlib.oidc.core import UserInfo
@@ -9,11 +10,10 @@ import os
 import sys
 import logging
 import aiohttp
-import requests
 import mimetypes
 import shutil
 import inspect
-from typing import Optional
+from typing import Callable, Optional
 
 from fastapi import FastAPI, Request, Depends, status, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
@@ -24,6 +24,7 @@ from sqlalchemy import text
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.sessions import SessionMiddleware
+from starlette.background import BackgroundTasks
 from starlette.responses import StreamingResponse, Response, RedirectResponse
 
 
@@ -47,7 +48,7 @@ from apps.webui.main import (
     get_pipe_models,
     generate_function_chat_completion,
 )
-from apps.webui.internal.db import Session
+from apps.webui.internal.db import Session, async_engine
 
 
 from pydantic import BaseModel
@@ -120,12 +121,30 @@ from config import (
     WEBUI_SESSION_COOKIE_SAME_SITE,
     WEBUI_SESSION_COOKIE_SECURE,
     ENABLE_ADMIN_CHAT_ACCESS,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
+    CONFIG_POLL_INTERVAL,
+    REDIS_URL,
+    CONFIG_REDIS_CHANNEL,
     AppConfig,
+    load_changed_config,
+    apply_config,
     CORS_ALLOW_ORIGIN,
 )
+from utils.http import HTTP_CLIENT
+from utils.admission import ADMISSION, AdmissionRejected, AdmissionTicket
+from utils.singleflight import SINGLEFLIGHT
+from utils.task_cache import (
+    cache_task_response,
+    clear_task_cache,
+    get_cached_task_response,
+    get_task_cache_key,
+    get_task_cache_stats,
+)
 
 from constants import ERROR_MESSAGES, WEBHOOK_MESSAGES, TASKS
 from utils.webhook import post_webhook
+from utils.registry import MODELS_CACHE, get_registry_stats, merge_custom_models
+from utils import codec
 
 if SAFE_MODE:
     print("SAFE MODE ENABLED")
@@ -165,14 +184,77 @@ https://github.com/open-webui/open-webui
 )
 
 
+async def flush_user_last_active_periodically():
+    while True:
+        await asyncio.sleep(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(Users.flush_last_active)
+        except Exception as e:
+            log.exception(e)
+
+
+async def reload_changed_config():
+    entry = await asyncio.to_thread(load_changed_config)
+    if entry:
+        apply_config(*entry)
+
+
+async def poll_config_periodically():
+    while True:
+        await asyncio.sleep(CONFIG_POLL_INTERVAL)
+        try:
+            await reload_changed_config()
+        except Exception as e:
+            log.exception(e)
+
+
+async def subscribe_config_changes():
+    import redis.asyncio as redis
+
+    while True:
+        try:
+            client = redis.Redis.from_url(REDIS_URL)
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(CONFIG_REDIS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await reload_changed_config()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"Config subscription to {REDIS_URL} failed: {e}")
+            await asyncio.sleep(5)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     run_migrations()
+    await HTTP_CLIENT.start()
+
+    tasks = []
+    if USER_LAST_ACTIVE_FLUSH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(flush_user_last_active_periodically()))
+    if CONFIG_POLL_INTERVAL > 0:
+        tasks.append(asyncio.create_task(poll_config_periodically()))
+    if REDIS_URL:
+        tasks.append(asyncio.create_task(subscribe_config_changes()))
+
     yield
 
+    for task in tasks:
+        task.cancel()
+    Users.flush_last_active()
+    await HTTP_CLIENT.close()
+
+    if async_engine:
+        await async_engine.dispose()
+
 
 app = FastAPI(
-    docs_url="/docs" if ENV == "dev" else None, redoc_url=None, lifespan=lifespan
+    docs_url="/docs" if ENV == "dev" else None,
+    redoc_url=None,
+    lifespan=lifespan,
+    default_response_class=codec.JSONResponse,
 )
 
 app.state.config = AppConfig()
@@ -229,38 +311,43 @@ def get_task_model_id(default_model_id):
     return task_model_id
 
 
-def get_filter_function_ids(model):
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
+async def get_filter_function_ids(model):
+    async def get_priority(function_id):
+        function = await Functions.get_function_by_id_async(function_id)
         if function is not None and hasattr(function, "valves"):
             # TODO: Fix FunctionModel
             return (function.valves if function.valves else {}).get("priority", 0)
         return 0
 
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
+    filter_ids = [
+        function.id for function in await Functions.get_global_filter_functions_async()
+    ]
     if "info" in model and "meta" in model["info"]:
         filter_ids.extend(model["info"]["meta"].get("filterIds", []))
         filter_ids = list(set(filter_ids))
 
     enabled_filter_ids = [
         function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
+        for function in await Functions.get_functions_by_type_async(
+            "filter", active_only=True
+        )
     ]
 
     filter_ids = [
         filter_id for filter_id in filter_ids if filter_id in enabled_filter_ids
     ]
 
-    filter_ids.sort(key=get_priority)
+    priorities = {filter_id: await get_priority(filter_id) for filter_id in filter_ids}
+    filter_ids.sort(key=lambda filter_id: priorities[filter_id])
     return filter_ids
 
 
 async def chat_completion_filter_functions_handler(body, model, extra_params):
     skip_files = None
 
-    filter_ids = get_filter_function_ids(model)
+    filter_ids = await get_filter_function_ids(model)
     for filter_id in filter_ids:
-        filter = Functions.get_function_by_id(filter_id)
+        filter = await Functions.get_function_by_id_async(filter_id)
         if not filter:
             continue
 
@@ -275,7 +362,7 @@ async def chat_completion_filter_functions_handler(body, model, extra_params):
             skip_files = function_module.file_handler
 
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
+            valves = await Functions.get_function_valves_by_id_async(filter_id)
             function_module.valves = function_module.Valves(
                 **(valves if valves else {})
             )
@@ -399,7 +486,7 @@ async def chat_completion_tools_handler(
     )
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         raise e
 
@@ -460,7 +547,8 @@ async def chat_completion_files_handler(body) -> tuple[dict, dict[str, list]]:
     citations = []
 
     if files := body.get("metadata", {}).get("files", None):
-        contexts, citations = get_rag_context(
+        contexts, citations = await asyncio.to_thread(
+            get_rag_context,
             files=files,
             messages=body["messages"],
             embedding_function=rag_app.state.EMBEDDING_FUNCTION,
@@ -486,7 +574,7 @@ async def get_body_and_model_and_user(request):
     # Read the original request body
     body = await request.body()
     body_str = body.decode("utf-8")
-    body = json.loads(body_str) if body_str else {}
+    body = codec.loads(body_str) if body_str else {}
 
     model_id = body["model"]
     if model_id not in app.state.MODELS:
@@ -599,7 +687,7 @@ class ChatCompletionMiddleware(BaseHTTPMiddleware):
         if len(citations) > 0:
             data_items.append({"citations": citations})
 
-        modified_body_bytes = json.dumps(body).encode("utf-8")
+        modified_body_bytes = codec.dumpb(body)
         # Replace the request body with the modified one
         request._body = modified_body_bytes
         # Set custom header to ensure content-length matches new body length
@@ -623,7 +711,7 @@ class ChatCompletionMiddleware(BaseHTTPMiddleware):
 
         async def stream_wrapper(original_generator, data_items):
             for item in data_items:
-                yield wrap_item(json.dumps(item))
+                yield wrap_item(codec.dumps(item))
 
             async for data in original_generator:
                 yield data
@@ -662,7 +750,7 @@ def get_sorted_filters(model_id):
     return sorted_filters
 
 
-def filter_pipeline(payload, user):
+async def filter_pipeline(payload, user):
     user = {"id": user.id, "email": user.email, "name": user.name, "role": user.role}
     model_id = payload["model"]
     sorted_filters = get_sorted_filters(model_id)
@@ -674,6 +762,7 @@ def filter_pipeline(payload, user):
 
     for filter in sorted_filters:
         r = None
+        res = None
         try:
             urlIdx = filter["urlIdx"]
 
@@ -684,25 +773,23 @@ def filter_pipeline(payload, user):
                 continue
 
             headers = {"Authorization": f"Bearer {key}"}
-            r = requests.post(
+            async with HTTP_CLIENT.session.post(
                 f"{url}/{filter['id']}/filter/inlet",
                 headers=headers,
                 json={
                     "user": user,
                     "body": payload,
                 },
-            )
-
-            r.raise_for_status()
-            payload = r.json()
+            ) as r:
+                res = await r.json(content_type=None)
+                r.raise_for_status()
+                payload = res
         except Exception as e:
             # Handle connection error here
             print(f"Connection error: {e}")
 
-            if r is not None:
-                res = r.json()
-                if "detail" in res:
-                    raise Exception(r.status_code, res["detail"])
+            if r is not None and isinstance(res, dict) and "detail" in res:
+                raise Exception(r.status, res["detail"])
 
     return payload
 
@@ -719,7 +806,7 @@ class PipelineMiddleware(BaseHTTPMiddleware):
         # Decode body to string
         body_str = body.decode("utf-8")
         # Parse string to JSON
-        data = json.loads(body_str) if body_str else {}
+        data = codec.loads(body_str) if body_str else {}
 
         user = get_current_user(
             request,
@@ -727,14 +814,14 @@ class PipelineMiddleware(BaseHTTPMiddleware):
         )
 
         try:
-            data = filter_pipeline(data, user)
+            data = await filter_pipeline(data, user)
         except Exception as e:
             return JSONResponse(
                 status_code=e.args[0],
                 content={"detail": e.args[1]},
             )
 
-        modified_body_bytes = json.dumps(data).encode("utf-8")
+        modified_body_bytes = codec.dumpb(data)
         # Replace the request body with the modified one
         request._body = modified_body_bytes
         # Set custom header to ensure content-length matches new body length
@@ -807,8 +894,12 @@ app.mount("/api/v1", webui_app)
 webui_app.state.EMBEDDING_FUNCTION = rag_app.state.EMBEDDING_FUNCTION
 
 
-async def get_all_models():
-    # TODO: Optimize this function
+async def get_all_models(refresh: bool = False):
+    """The merged model list, rebuilt at most every MODELS_CACHE_TTL seconds."""
+    return await MODELS_CACHE.get(build_all_models, force=refresh)
+
+
+async def build_all_models():
     pipe_models = []
     openai_models = []
     ollama_models = []
@@ -835,117 +926,75 @@ async def get_all_models():
 
     models = pipe_models + openai_models + ollama_models
 
+    # Every action a model can use is active, so one query covers them all
+    enabled_actions = {
+        function.id: function
+        for function in await Functions.get_functions_by_type_async(
+            "action", active_only=True
+        )
+    }
     global_action_ids = [
-        function.id for function in Functions.get_global_action_functions()
-    ]
-    enabled_action_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("action", active_only=True)
+        action.id for action in enabled_actions.values() if action.is_global
     ]
 
-    custom_models = Models.get_all_models()
-    for custom_model in custom_models:
-        if custom_model.base_model_id is None:
-            for model in models:
-                if (
-                    custom_model.id == model["id"]
-                    or custom_model.id == model["id"].split(":")[0]
-                ):
-                    model["name"] = custom_model.name
-                    model["info"] = custom_model.model_dump()
-
-                    action_ids = []
-                    if "info" in model and "meta" in model["info"]:
-                        action_ids.extend(model["info"]["meta"].get("actionIds", []))
-
-                    model["action_ids"] = action_ids
+    custom_models = await Models.get_all_models_async()
+    merge_custom_models(models, custom_models)
+
+    # The entries an action adds are the same for every model that uses it
+    action_entries = {}
+
+    def get_action_entries(action_id: str) -> list[dict]:
+        if action_id in action_entries:
+            return action_entries[action_id]
+
+        action = enabled_actions[action_id]
+        if action_id in webui_app.state.FUNCTIONS:
+            function_module = webui_app.state.FUNCTIONS[action_id]
         else:
-            owned_by = "openai"
-            pipe = None
-            action_ids = []
-
-            for model in models:
-                if (
-                    custom_model.base_model_id == model["id"]
-                    or custom_model.base_model_id == model["id"].split(":")[0]
-                ):
-                    owned_by = model["owned_by"]
-                    if "pipe" in model:
-                        pipe = model["pipe"]
-
-                    if "info" in model and "meta" in model["info"]:
-                        action_ids.extend(model["info"]["meta"].get("actionIds", []))
-                    break
-
-            models.append(
+            function_module, _, _ = load_function_module_by_id(action_id)
+            webui_app.state.FUNCTIONS[action_id] = function_module
+
+        __webui__ = False
+        if hasattr(function_module, "__webui__"):
+            __webui__ = function_module.__webui__
+
+        if hasattr(function_module, "actions"):
+            actions = function_module.actions
+            entries = [
                 {
-                    "id": custom_model.id,
-                    "name": custom_model.name,
-                    "object": "model",
-                    "created": custom_model.created_at,
-                    "owned_by": owned_by,
-                    "info": custom_model.model_dump(),
-                    "preset": True,
-                    **({"pipe": pipe} if pipe is not None else {}),
-                    "action_ids": action_ids,
+                    "id": f"{action_id}.{_action['id']}",
+                    "name": _action.get("name", f"{action.name} ({_action['id']})"),
+                    "description": action.meta.description,
+                    "icon_url": _action.get(
+                        "icon_url", action.meta.manifest.get("icon_url", None)
+                    ),
+                    **({"__webui__": __webui__} if __webui__ else {}),
                 }
-            )
+                for _action in actions
+            ]
+        else:
+            entries = [
+                {
+                    "id": action_id,
+                    "name": action.name,
+                    "description": action.meta.description,
+                    "icon_url": action.meta.manifest.get("icon_url", None),
+                    **({"__webui__": __webui__} if __webui__ else {}),
+                }
+            ]
+
+        action_entries[action_id] = entries
+        return entries
 
     for model in models:
-        action_ids = []
-        if "action_ids" in model:
-            action_ids = model["action_ids"]
-            del model["action_ids"]
-
-        action_ids = action_ids + global_action_ids
-        action_ids = list(set(action_ids))
-        action_ids = [
-            action_id for action_id in action_ids if action_id in enabled_action_ids
-        ]
+        action_ids = model.pop("action_ids", [])
+        action_ids = set(action_ids + global_action_ids)
 
         model["actions"] = []
         for action_id in action_ids:
-            action = Functions.get_function_by_id(action_id)
-            if action is None:
-                raise Exception(f"Action not found: {action_id}")
-
-            if action_id in webui_app.state.FUNCTIONS:
-                function_module = webui_app.state.FUNCTIONS[action_id]
-            else:
-                function_module, _, _ = load_function_module_by_id(action_id)
-                webui_app.state.FUNCTIONS[action_id] = function_module
-
-            __webui__ = False
-            if hasattr(function_module, "__webui__"):
-                __webui__ = function_module.__webui__
-
-            if hasattr(function_module, "actions"):
-                actions = function_module.actions
+            if action_id in enabled_actions:
                 model["actions"].extend(
-                    [
-                        {
-                            "id": f"{action_id}.{_action['id']}",
-                            "name": _action.get(
-                                "name", f"{action.name} ({_action['id']})"
-                            ),
-                            "description": action.meta.description,
-                            "icon_url": _action.get(
-                                "icon_url", action.meta.manifest.get("icon_url", None)
-                            ),
-                            **({"__webui__": __webui__} if __webui__ else {}),
-                        }
-                        for _action in actions
-                    ]
-                )
-            else:
-                model["actions"].append(
-                    {
-                        "id": action_id,
-                        "name": action.name,
-                        "description": action.meta.description,
-                        "icon_url": action.meta.manifest.get("icon_url", None),
-                        **({"__webui__": __webui__} if __webui__ else {}),
-                    }
+                    {**entry} for entry in get_action_entries(action_id)
                 )
 
     app.state.MODELS = {model["id"]: model for model in models}
@@ -955,8 +1004,8 @@ async def get_all_models():
 
 
 @app.get("/api/models")
-async def get_models(user=Depends(get_verified_user)):
-    models = await get_all_models()
+async def get_models(user=Depends(get_verified_user), refresh: bool = False):
+    models = await get_all_models(refresh=refresh and user.role == "admin")
 
     # Filter out filter pipelines
     models = [
@@ -978,6 +1027,105 @@ async def get_models(user=Depends(get_verified_user)):
     return {"data": models}
 
 
+@app.get("/api/models/registry")
+async def get_models_registry(user=Depends(get_admin_user)):
+    return get_registry_stats()
+
+
+@app.get("/api/http/pool")
+async def get_http_pool_stats(user=Depends(get_admin_user)):
+    return HTTP_CLIENT.stats()
+
+
+@app.get("/api/admission")
+async def get_admission_stats(user=Depends(get_admin_user)):
+    return ADMISSION.stats()
+
+
+@app.get("/api/singleflight")
+async def get_singleflight_stats(user=Depends(get_admin_user)):
+    return SINGLEFLIGHT.stats()
+
+
+async def admit_chat_completion(form_data: dict, model: dict, user) -> AdmissionTicket:
+    """
+    Wait for the model and its backend to have room for the request, telling
+    the chat its place in the queue, or raise a 429.
+    """
+    info = model.get("info") or {}
+    model_id = info.get("base_model_id") or model["id"]
+    if model.get("pipe"):
+        backend = "functions"
+    elif model["owned_by"] == "ollama":
+        backend = "ollama"
+    else:
+        backend = f"openai:{model.get('urlIdx', 0)}"
+
+    metadata = form_data.get("metadata") or {}
+    on_wait = None
+    if metadata.get("session_id"):
+        __event_emitter__ = get_event_emitter(metadata)
+
+        async def on_wait(position: int, eta: Optional[int]):
+            await __event_emitter__(
+                {
+                    "type": "status",
+                    "data": {
+                        "description": f"Waiting in queue, position {position}"
+                        + (f", about {eta}s" if eta is not None else ""),
+                        "done": False,
+                        "queue": {"position": position, "eta": eta},
+                    },
+                }
+            )
+
+    try:
+        ticket = await ADMISSION.admit(user.id, model_id, backend, on_wait=on_wait)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ERROR_MESSAGES.MODEL_BUSY(model["id"]),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    if on_wait is not None and ticket.waited > 0:
+        await __event_emitter__(
+            {
+                "type": "status",
+                "data": {
+                    "description": f"Waited {round(ticket.waited)}s in queue",
+                    "done": True,
+                },
+            }
+        )
+    return ticket
+
+
+def release_after_response(response, release: Callable):
+    """Call `release` once a streaming response has been sent, or right away."""
+    if not isinstance(response, StreamingResponse):
+        release()
+        return response
+
+    body_iterator = response.body_iterator
+
+    async def iterate():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            release()
+
+    response.body_iterator = iterate()
+    # In case the body is never iterated, e.g. the client went away first
+    background = BackgroundTasks()
+    if response.background is not None:
+        background.add_task(response.background)
+    background.add_task(release)
+    response.background = background
+    return response
+
+
 @app.post("/api/chat/completions")
 async def generate_chat_completions(form_data: dict, user=Depends(get_verified_user)):
     model_id = form_data["model"]
@@ -996,12 +1144,19 @@ async def generate_chat_completions(form_data: dict, user=Depends(get_verified_u
             )
 
     model = app.state.MODELS[model_id]
-    if model.get("pipe"):
-        return await generate_function_chat_completion(form_data, user=user)
-    if model["owned_by"] == "ollama":
-        return await generate_ollama_chat_completion(form_data, user=user)
-    else:
-        return await generate_openai_chat_completion(form_data, user=user)
+    ticket = await admit_chat_completion(form_data, model, user)
+    try:
+        if model.get("pipe"):
+            response = await generate_function_chat_completion(form_data, user=user)
+        elif model["owned_by"] == "ollama":
+            response = await generate_ollama_chat_completion(form_data, user=user)
+        else:
+            response = await generate_openai_chat_completion(form_data, user=user)
+    except BaseException:
+        ticket.release()
+        raise
+
+    return release_after_response(response, ticket.release)
 
 
 @app.post("/api/chat/completed")
@@ -1021,6 +1176,7 @@ async def chat_completed(form_data: dict, user=Depends(get_verified_user)):
 
     for filter in sorted_filters:
         r = None
+        res = None
         try:
             urlIdx = filter["urlIdx"]
 
@@ -1029,7 +1185,7 @@ async def chat_completed(form_data: dict, user=Depends(get_verified_user)):
 
             if key != "":
                 headers = {"Authorization": f"Bearer {key}"}
-                r = requests.post(
+                async with HTTP_CLIENT.session.post(
                     f"{url}/{filter['id']}/filter/outlet",
                     headers=headers,
                     json={
@@ -1041,27 +1197,19 @@ async def chat_completed(form_data: dict, user=Depends(get_verified_user)):
                         },
                         "body": data,
                     },
-                )
-
-                r.raise_for_status()
-                data = r.json()
+                ) as r:
+                    res = await r.json(content_type=None)
+                    r.raise_for_status()
+                    data = res
         except Exception as e:
             # Handle connection error here
             print(f"Connection error: {e}")
 
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "detail" in res:
-                        return JSONResponse(
-                            status_code=r.status_code,
-                            content=res,
-                        )
-                except Exception:
-                    pass
-
-            else:
-                pass
+            if r is not None and isinstance(res, dict) and "detail" in res:
+                return JSONResponse(
+                    status_code=r.status,
+                    content=res,
+                )
 
     __event_emitter__ = get_event_emitter(
         {
@@ -1079,31 +1227,9 @@ async def chat_completed(form_data: dict, user=Depends(get_verified_user)):
         }
     )
 
-    def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None and hasattr(function, "valves"):
-            # TODO: Fix FunctionModel to include vavles
-            return (function.valves if function.valves else {}).get("priority", 0)
-        return 0
-
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
-    if "info" in model and "meta" in model["info"]:
-        filter_ids.extend(model["info"]["meta"].get("filterIds", []))
-        filter_ids = list(set(filter_ids))
-
-    enabled_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
-    filter_ids = [
-        filter_id for filter_id in filter_ids if filter_id in enabled_filter_ids
-    ]
-
-    # Sort filter_ids by priority, using the get_priority function
-    filter_ids.sort(key=get_priority)
-
+    filter_ids = await get_filter_function_ids(model)
     for filter_id in filter_ids:
-        filter = Functions.get_function_by_id(filter_id)
+        filter = await Functions.get_function_by_id_async(filter_id)
         if not filter:
             continue
 
@@ -1114,7 +1240,7 @@ async def chat_completed(form_data: dict, user=Depends(get_verified_user)):
             webui_app.state.FUNCTIONS[filter_id] = function_module
 
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
+            valves = await Functions.get_function_valves_by_id_async(filter_id)
             function_module.valves = function_module.Valves(
                 **(valves if valves else {})
             )
@@ -1183,7 +1309,7 @@ async def chat_action(action_id: str, form_data: dict, user=Depends(get_verified
     else:
         sub_action_id = None
 
-    action = Functions.get_function_by_id(action_id)
+    action = await Functions.get_function_by_id_async(action_id)
     if not action:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1221,7 +1347,7 @@ async def chat_action(action_id: str, form_data: dict, user=Depends(get_verified
         webui_app.state.FUNCTIONS[action_id] = function_module
 
     if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-        valves = Functions.get_function_valves_by_id(action_id)
+        valves = await Functions.get_function_valves_by_id_async(action_id)
         function_module.valves = function_module.Valves(**(valves if valves else {}))
 
     if hasattr(function_module, "action"):
@@ -1313,20 +1439,21 @@ class TaskConfigForm(BaseModel):
 
 @app.post("/api/task/config/update")
 async def update_task_config(form_data: TaskConfigForm, user=Depends(get_admin_user)):
-    app.state.config.TASK_MODEL = form_data.TASK_MODEL
-    app.state.config.TASK_MODEL_EXTERNAL = form_data.TASK_MODEL_EXTERNAL
-    app.state.config.TITLE_GENERATION_PROMPT_TEMPLATE = (
-        form_data.TITLE_GENERATION_PROMPT_TEMPLATE
-    )
-    app.state.config.SEARCH_QUERY_GENERATION_PROMPT_TEMPLATE = (
-        form_data.SEARCH_QUERY_GENERATION_PROMPT_TEMPLATE
-    )
-    app.state.config.SEARCH_QUERY_PROMPT_LENGTH_THRESHOLD = (
-        form_data.SEARCH_QUERY_PROMPT_LENGTH_THRESHOLD
-    )
-    app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE = (
-        form_data.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE
-    )
+    with app.state.config.transaction():
+        app.state.config.TASK_MODEL = form_data.TASK_MODEL
+        app.state.config.TASK_MODEL_EXTERNAL = form_data.TASK_MODEL_EXTERNAL
+        app.state.config.TITLE_GENERATION_PROMPT_TEMPLATE = (
+            form_data.TITLE_GENERATION_PROMPT_TEMPLATE
+        )
+        app.state.config.SEARCH_QUERY_GENERATION_PROMPT_TEMPLATE = (
+            form_data.SEARCH_QUERY_GENERATION_PROMPT_TEMPLATE
+        )
+        app.state.config.SEARCH_QUERY_PROMPT_LENGTH_THRESHOLD = (
+            form_data.SEARCH_QUERY_PROMPT_LENGTH_THRESHOLD
+        )
+        app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE = (
+            form_data.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE
+        )
 
     return {
         "TASK_MODEL": app.state.config.TASK_MODEL,
@@ -1338,6 +1465,44 @@ async def update_task_config(form_data: TaskConfigForm, user=Depends(get_admin_u
     }
 
 
+@app.get("/api/task/cache")
+async def get_task_cache(user=Depends(get_admin_user)):
+    return get_task_cache_stats()
+
+
+@app.delete("/api/task/cache")
+async def delete_task_cache(user=Depends(get_admin_user)):
+    clear_task_cache()
+    return True
+
+
+async def generate_task_completion(payload: dict, user):
+    """
+    Generate a task completion, from the task cache if it is a cached task,
+    sharing the upstream call with identical ones in flight for the same
+    user, e.g. a retry or the same chat in another tab.
+    """
+    if payload.get("stream", False):
+        return await generate_chat_completions(form_data=payload, user=user)
+
+    key = get_task_cache_key(payload)
+    if key is not None:
+        response = await get_cached_task_response(key)
+        if response is not None:
+            return response
+
+    response = await SINGLEFLIGHT.do(
+        "task",
+        {"user_id": user.id, "payload": payload},
+        lambda: generate_chat_completions(form_data=payload, user=user),
+        shareable=lambda response: not isinstance(response, StreamingResponse),
+    )
+
+    if key is not None:
+        await cache_task_response(key, response)
+    return response
+
+
 @app.post("/api/task/title/completions")
 async def generate_title(form_data: dict, user=Depends(get_verified_user)):
     print("generate_title")
@@ -1378,7 +1543,7 @@ async def generate_title(form_data: dict, user=Depends(get_verified_user)):
     log.debug(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         return JSONResponse(
             status_code=e.args[0],
@@ -1388,7 +1553,7 @@ async def generate_title(form_data: dict, user=Depends(get_verified_user)):
     if "chat_id" in payload:
         del payload["chat_id"]
 
-    return await generate_chat_completions(form_data=payload, user=user)
+    return await generate_task_completion(payload, user)
 
 
 @app.post("/api/task/query/completions")
@@ -1431,7 +1596,7 @@ async def generate_search_query(form_data: dict, user=Depends(get_verified_user)
     print(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         return JSONResponse(
             status_code=e.args[0],
@@ -1441,7 +1606,7 @@ async def generate_search_query(form_data: dict, user=Depends(get_verified_user)
     if "chat_id" in payload:
         del payload["chat_id"]
 
-    return await generate_chat_completions(form_data=payload, user=user)
+    return await generate_task_completion(payload, user)
 
 
 @app.post("/api/task/emoji/completions")
@@ -1488,7 +1653,7 @@ Message: """{{prompt}}"""
     log.debug(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         return JSONResponse(
             status_code=e.args[0],
@@ -1498,7 +1663,7 @@ Message: """{{prompt}}"""
     if "chat_id" in payload:
         del payload["chat_id"]
 
-    return await generate_chat_completions(form_data=payload, user=user)
+    return await generate_task_completion(payload, user)
 
 
 @app.post("/api/task/moa/completions")
@@ -1540,7 +1705,7 @@ Responses from models: {{responses}}"""
     log.debug(payload)
 
     try:
-        payload = filter_pipeline(payload, user)
+        payload = await filter_pipeline(payload, user)
     except Exception as e:
         return JSONResponse(
             status_code=e.args[0],
@@ -1550,7 +1715,7 @@ Responses from models: {{responses}}"""
     if "chat_id" in payload:
         del payload["chat_id"]
 
-    return await generate_chat_completions(form_data=payload, user=user)
+    return await generate_task_completion(payload, user)
 
 
 ##################################
@@ -1614,7 +1779,12 @@ async def upload_pipeline(
 
         with open(file_path, "rb") as f:
             files = {"file": f}
-            r = requests.post(f"{url}/pipelines/upload", headers=headers, files=files)
+            r = await asyncio.to_thread(
+                HTTP_CLIENT.sync_session.post,
+                f"{url}/pipelines/upload",
+                headers=headers,
+                files=files,
+            )
 
         r.raise_for_status()
         data = r.json()
@@ -1660,8 +1830,11 @@ async def add_pipeline(form_data: AddPipelineForm, user=Depends(get_admin_user))
         key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
 
         headers = {"Authorization": f"Bearer {key}"}
-        r = requests.post(
-            f"{url}/pipelines/add", headers=headers, json={"url": form_data.url}
+        r = await asyncio.to_thread(
+            HTTP_CLIENT.sync_session.post,
+            f"{url}/pipelines/add",
+            headers=headers,
+            json={"url": form_data.url},
         )
 
         r.raise_for_status()
@@ -1702,8 +1875,11 @@ async def delete_pipeline(form_data: DeletePipelineForm, user=Depends(get_admin_
         key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
 
         headers = {"Authorization": f"Bearer {key}"}
-        r = requests.delete(
-            f"{url}/pipelines/delete", headers=headers, json={"id": form_data.id}
+        r = await asyncio.to_thread(
+            HTTP_CLIENT.sync_session.delete,
+            f"{url}/pipelines/delete",
+            headers=headers,
+            json={"id": form_data.id},
         )
 
         r.raise_for_status()
@@ -1737,7 +1913,9 @@ async def get_pipelines(urlIdx: Optional[int] = None, user=Depends(get_admin_use
         key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
 
         headers = {"Authorization": f"Bearer {key}"}
-        r = requests.get(f"{url}/pipelines", headers=headers)
+        r = await asyncio.to_thread(
+            HTTP_CLIENT.sync_session.get, f"{url}/pipelines", headers=headers
+        )
 
         r.raise_for_status()
         data = r.json()
@@ -1774,7 +1952,9 @@ async def get_pipeline_valves(
         key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
 
         headers = {"Authorization": f"Bearer {key}"}
-        r = requests.get(f"{url}/{pipeline_id}/valves", headers=headers)
+        r = await asyncio.to_thread(
+            HTTP_CLIENT.sync_session.get, f"{url}/{pipeline_id}/valves", headers=headers
+        )
 
         r.raise_for_status()
         data = r.json()
@@ -1812,7 +1992,11 @@ async def get_pipeline_valves_spec(
         key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
 
         headers = {"Authorization": f"Bearer {key}"}
-        r = requests.get(f"{url}/{pipeline_id}/valves/spec", headers=headers)
+        r = await asyncio.to_thread(
+            HTTP_CLIENT.sync_session.get,
+            f"{url}/{pipeline_id}/valves/spec",
+            headers=headers,
+        )
 
         r.raise_for_status()
         data = r.json()
@@ -1850,7 +2034,8 @@ async def update_pipeline_valves(
         key = openai_app.state.config.OPENAI_API_KEYS[urlIdx]
 
         headers = {"Authorization": f"Bearer {key}"}
-        r = requests.post(
+        r = await asyncio.to_thread(
+            HTTP_CLIENT.sync_session.post,
             f"{url}/{pipeline_id}/valves/update",
             headers=headers,
             json={**form_data},
@@ -1968,8 +2153,9 @@ class ModelFilterConfigForm(BaseModel):
 async def update_model_filter_config(
     form_data: ModelFilterConfigForm, user=Depends(get_admin_user)
 ):
-    app.state.config.ENABLE_MODEL_FILTER = form_data.enabled
-    app.state.config.MODEL_FILTER_LIST = form_data.models
+    with app.state.config.transaction():
+        app.state.config.ENABLE_MODEL_FILTER = form_data.enabled
+        app.state.config.MODEL_FILTER_LIST = form_data.models
 
     return {
         "enabled": app.state.config.ENABLE_MODEL_FILTER,
@@ -2013,15 +2199,14 @@ async def get_app_changelog():
 @app.get("/api/version/updates")
 async def get_app_latest_release_version():
     try:
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            async with session.get(
-                "https://api.github.com/repos/open-webui/open-webui/releases/latest"
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                latest_version = data["tag_name"]
-
-                return {"current": VERSION, "latest": latest_version[1:]}
+        async with HTTP_CLIENT.session.get(
+            "https://api.github.com/repos/open-webui/open-webui/releases/latest"
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            latest_version = data["tag_name"]
+
+            return {"current": VERSION, "latest": latest_version[1:]}
     except aiohttp.ClientError:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -2127,17 +2312,18 @@ async def oauth_callback(provider: str, request: Request, response: Response):
             if picture_url:
                 # Download the profile image into a base64 string
                 try:
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(picture_url) as resp:
-                            picture = await resp.read()
-                            base64_encoded_picture = base64.b64encode(picture).decode(
-                                "utf-8"
-                            )
-                            guessed_mime_type = mimetypes.guess_type(picture_url)[0]
-                            if guessed_mime_type is None:
-                                # assume JPG, browsers are tolerant enough of image formats
-                                guessed_mime_type = "image/jpeg"
-                            picture_url = f"data:{guessed_mime_type};base64,{base64_encoded_picture}"
+                    async with HTTP_CLIENT.session.get(picture_url) as resp:
+                        picture = await resp.read()
+                        base64_encoded_picture = base64.b64encode(picture).decode(
+                            "utf-8"
+                        )
+                        guessed_mime_type = mimetypes.guess_type(picture_url)[0]
+                        if guessed_mime_type is None:
+                            # assume JPG, browsers are tolerant enough of image formats
+                            guessed_mime_type = "image/jpeg"
+                        picture_url = (
+                            f"data:{guessed_mime_type};base64,{base64_encoded_picture}"
+                        )
                 except Exception as e:
                     log.error(f"Error downloading profile image '{picture_url}': {e}")
                     picture_url = ""
@@ -2161,7 +2347,8 @@ async def oauth_callback(provider: str, request: Request, response: Response):
             )
 
             if webui_app.state.config.WEBHOOK_URL:
-                post_webhook(
+                await asyncio.to_thread(
+                    post_webhook,
                     webui_app.state.config.WEBHOOK_URL,
                     WEBHOOK_MESSAGES.USER_SIGNUP(user.name),
                     {
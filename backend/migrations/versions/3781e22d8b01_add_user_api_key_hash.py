@@ -0,0 +1,59 @@
+"""Add user api_key_hash
+
+Revision ID: 3781e22d8b01
+Revises: ca81bd47c050
+Create Date: 2026-10-17 10:12:43.518213
+
+"""
+
+import hashlib
+import hmac
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import apps.webui.internal.db
+from env import WEBUI_SECRET_KEY
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3781e22d8b01"
+down_revision: Union[str, None] = "ca81bd47c050"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# A copy of the hash at the time of this revision, so later changes to the
+# application code don't change what it does
+def hash_api_key(api_key: str) -> str:
+    return hmac.new(
+        WEBUI_SECRET_KEY.encode(), api_key.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def upgrade():
+    op.add_column("user", sa.Column("api_key_hash", sa.String(), nullable=True))
+    op.create_index("ix_user_api_key_hash", "user", ["api_key_hash"], unique=True)
+
+    # Backfill the hash of existing API keys
+    user = sa.table(
+        "user",
+        sa.column("id", sa.String),
+        sa.column("api_key", sa.String),
+        sa.column("api_key_hash", sa.String),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(user.c.id, user.c.api_key).where(user.c.api_key.isnot(None))
+    ).fetchall()
+    for id, api_key in rows:
+        conn.execute(
+            user.update()
+            .where(user.c.id == id)
+            .values(api_key_hash=hash_api_key(api_key))
+        )
+
+
+def downgrade():
+    op.drop_index("ix_user_api_key_hash", table_name="user")
+    op.drop_column("user", "api_key_hash")
@@ -0,0 +1,32 @@
+"""Add chat list index
+
+Revision ID: 5d2f0a7c1e34
+Revises: b4a1c8e2d9f0
+Create Date: 2026-10-17 11:48:09.310562
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import apps.webui.internal.db
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2f0a7c1e34"
+down_revision: Union[str, None] = "b4a1c8e2d9f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_index(
+        "chat_user_id_archived_updated_at_id_idx",
+        "chat",
+        ["user_id", "archived", "updated_at", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("chat_user_id_archived_updated_at_id_idx", table_name="chat")
@@ -0,0 +1,160 @@
+"""Add chat search index
+
+Revision ID: 9c3e5f7a2b61
+Revises: 5d2f0a7c1e34
+Create Date: 2026-10-17 12:34:50.118734
+
+"""
+
+import json
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import apps.webui.internal.db
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3e5f7a2b61"
+down_revision: Union[str, None] = "5d2f0a7c1e34"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copies of the helpers and statements at the time of this revision, so later
+# changes to the application code don't change what it does
+
+INSERT_STATEMENTS = {
+    "sqlite": [
+        "INSERT INTO chat_search (chat_id, user_id) VALUES (:chat_id, :user_id)",
+        "INSERT INTO chat_search_fts (rowid, title, content) "
+        "SELECT id, :title, :content FROM chat_search WHERE chat_id = :chat_id",
+    ],
+    "postgresql": [
+        "INSERT INTO chat_search (chat_id, user_id, title, content) "
+        "VALUES (:chat_id, :user_id, :title, :content)"
+    ],
+}
+
+
+def get_message_list(messages: dict, message_id: Optional[str]) -> list[dict]:
+    message_list = []
+    while message_id in messages and len(message_list) < len(messages):
+        message = messages[message_id]
+        message_list.append(message)
+        message_id = message.get("parentId")
+    return message_list[::-1]
+
+
+def join_chat(skeleton: dict, messages: dict) -> dict:
+    history = {**skeleton.get("history", {}), "messages": messages}
+    return {
+        **skeleton,
+        "history": history,
+        "messages": get_message_list(messages, history.get("currentId")),
+    }
+
+
+def get_chat_search_content(chat: dict) -> str:
+    history = chat.get("history", {}).get("messages")
+    if isinstance(history, dict):
+        messages = list(history.values())
+    else:
+        messages = chat.get("messages", [])
+
+    return "\n".join(
+        message["content"]
+        for message in messages
+        if isinstance(message.get("content"), str)
+    )
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        op.create_table(
+            "chat_search",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("chat_id", sa.String(), nullable=False, unique=True),
+            sa.Column("user_id", sa.String(), nullable=False, index=True),
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE chat_search_fts USING fts5("
+            "title, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif dialect == "postgresql":
+        op.create_table(
+            "chat_search",
+            sa.Column("chat_id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), nullable=False, index=True),
+            sa.Column("title", sa.Text(), nullable=True),
+            sa.Column("content", sa.Text(), nullable=True),
+        )
+        op.execute(
+            "ALTER TABLE chat_search ADD COLUMN tsv tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple'::regconfig, coalesce(content, '')), 'B')"
+            ") STORED"
+        )
+        op.create_index(
+            "ix_chat_search_tsv", "chat_search", ["tsv"], postgresql_using="gin"
+        )
+    else:
+        return
+
+    # Index the existing chats
+    chat = sa.table(
+        "chat",
+        sa.column("id", sa.String),
+        sa.column("user_id", sa.String),
+        sa.column("chat", apps.webui.internal.db.CompressedText),
+        sa.column("message_storage", sa.Boolean),
+    )
+    chat_message = sa.table(
+        "chat_message",
+        sa.column("chat_id", sa.String),
+        sa.column("id", sa.String),
+        sa.column("message", sa.Text),
+    )
+    insert = [sa.text(statement) for statement in INSERT_STATEMENTS[dialect]]
+
+    rows = conn.execute(
+        sa.select(chat.c.id, chat.c.user_id, chat.c.chat, chat.c.message_storage)
+        .where(sa.not_(chat.c.user_id.startswith("shared-")))
+        .execution_options(yield_per=500)
+    )
+    for id, user_id, data, message_storage in rows:
+        data = json.loads(data) if data else {}
+        if message_storage:
+            messages = {
+                message_id: json.loads(message)
+                for message_id, message in conn.execute(
+                    sa.select(chat_message.c.id, chat_message.c.message).where(
+                        chat_message.c.chat_id == id
+                    )
+                )
+            }
+            data = join_chat(data, messages)
+
+        for statement in insert:
+            conn.execute(
+                statement,
+                {
+                    "chat_id": id,
+                    "user_id": user_id,
+                    "title": data.get("title", "New Chat"),
+                    "content": get_chat_search_content(data),
+                },
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        op.execute("DROP TABLE chat_search_fts")
+        op.drop_table("chat_search")
+    elif dialect == "postgresql":
+        op.drop_table("chat_search")
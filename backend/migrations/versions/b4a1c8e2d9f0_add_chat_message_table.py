@@ -0,0 +1,93 @@
+"""Add chat_message table
+
+Revision ID: b4a1c8e2d9f0
+Revises: 3781e22d8b01
+Create Date: 2026-10-17 11:05:21.904417
+
+"""
+
+import json
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import apps.webui.internal.db
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4a1c8e2d9f0"
+down_revision: Union[str, None] = "3781e22d8b01"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copies of the helpers at the time of this revision, so later changes to the
+# application code don't change what it does
+
+
+def get_message_list(messages: dict, message_id: Optional[str]) -> list[dict]:
+    message_list = []
+    while message_id in messages and len(message_list) < len(messages):
+        message = messages[message_id]
+        message_list.append(message)
+        message_id = message.get("parentId")
+    return message_list[::-1]
+
+
+def join_chat(skeleton: dict, messages: dict) -> dict:
+    history = {**skeleton.get("history", {}), "messages": messages}
+    return {
+        **skeleton,
+        "history": history,
+        "messages": get_message_list(messages, history.get("currentId")),
+    }
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.String(), primary_key=True),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("parent_id", sa.String(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+    op.add_column("chat", sa.Column("message_storage", sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    # Fold messages back into the chat blobs before dropping their table
+    chat = sa.table(
+        "chat",
+        sa.column("id", sa.String),
+        sa.column("chat", apps.webui.internal.db.CompressedText),
+        sa.column("message_storage", sa.Boolean),
+    )
+    chat_message = sa.table(
+        "chat_message",
+        sa.column("chat_id", sa.String),
+        sa.column("id", sa.String),
+        sa.column("message", sa.Text),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(chat.c.id, chat.c.chat).where(chat.c.message_storage.is_(True))
+    ).fetchall()
+    for id, data in rows:
+        messages = {
+            message_id: json.loads(message)
+            for message_id, message in conn.execute(
+                sa.select(chat_message.c.id, chat_message.c.message).where(
+                    chat_message.c.chat_id == id
+                )
+            )
+        }
+        conn.execute(
+            chat.update()
+            .where(chat.c.id == id)
+            .values(chat=json.dumps(join_chat(json.loads(data), messages)))
+        )
+
+    op.drop_column("chat", "message_storage")
+    op.drop_table("chat_message")
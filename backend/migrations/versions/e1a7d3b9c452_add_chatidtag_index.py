@@ -0,0 +1,32 @@
+"""Add chatidtag index
+
+Revision ID: e1a7d3b9c452
+Revises: 9c3e5f7a2b61
+Create Date: 2026-10-17 13:02:41.118273
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import apps.webui.internal.db
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a7d3b9c452"
+down_revision: Union[str, None] = "9c3e5f7a2b61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_index(
+        "chatidtag_user_id_tag_name_chat_id_idx",
+        "chatidtag",
+        ["user_id", "tag_name", "chat_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("chatidtag_user_id_tag_name_chat_id_idx", table_name="chatidtag")
@@ -236,3 +236,242 @@ class TestChats(AbstractPostgresTest):
 
         chat = self.chats.get_chat_by_id(chat_id)
         assert chat.share_id is None
+
+    def test_message_storage_round_trip(self, monkeypatch):
+        import apps.webui.models.chats as chats_model
+        from apps.webui.internal.db import Session
+        from apps.webui.models.chats import ChatMessage
+
+        monkeypatch.setattr(chats_model, "CHAT_STORAGE_MODE", "message")
+        messages = {
+            "1": {"id": "1", "parentId": None, "role": "user", "content": "hello"},
+            "2": {"id": "2", "parentId": "1", "role": "assistant", "content": "hi"},
+            "3": {"id": "3", "parentId": "2", "role": "user", "content": "bye"},
+        }
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/new"),
+                json={
+                    "chat": {
+                        "title": "Stored chat",
+                        "history": {"currentId": "3", "messages": messages},
+                    }
+                },
+            )
+        assert response.status_code == 200
+        chat_id = response.json()["id"]
+
+        rows = Session.query(ChatMessage.id, ChatMessage.message).filter_by(
+            chat_id=chat_id
+        )
+        assert dict(rows.all()) == messages
+        Session.commit()
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url(f"/{chat_id}"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["chat"]["history"] == {"currentId": "3", "messages": messages}
+        assert data["chat"]["messages"] == [messages["1"], messages["2"], messages["3"]]
+
+        # Edit a message, drop another and branch off with a new one
+        messages = {
+            "1": messages["1"],
+            "2": {**messages["2"], "content": "hello there"},
+            "4": {"id": "4", "parentId": "2", "role": "user", "content": "again"},
+        }
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{chat_id}"),
+                json={"chat": {"history": {"currentId": "4", "messages": messages}}},
+            )
+        assert response.status_code == 200
+
+        rows = Session.query(ChatMessage.id, ChatMessage.message).filter_by(
+            chat_id=chat_id
+        )
+        assert dict(rows.all()) == messages
+        Session.commit()
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url(f"/{chat_id}"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["title"] == "Stored chat"
+        assert data["chat"]["history"] == {"currentId": "4", "messages": messages}
+        assert data["chat"]["messages"] == [messages["1"], messages["2"], messages["4"]]
+
+    def test_search_chats(self):
+        def search(query):
+            with mock_webui_user(id="2"):
+                response = self.fast_api_client.get(
+                    self.create_url("/search"), params={"query": query}
+                )
+            assert response.status_code == 200
+            return [chat["id"] for chat in response.json()]
+
+        def create_chat(title, content):
+            with mock_webui_user(id="2"):
+                response = self.fast_api_client.post(
+                    self.create_url("/new"),
+                    json={
+                        "chat": {
+                            "title": title,
+                            "history": {
+                                "currentId": "1",
+                                "messages": {
+                                    "1": {
+                                        "id": "1",
+                                        "parentId": None,
+                                        "content": content,
+                                    }
+                                },
+                            },
+                        }
+                    },
+                )
+            assert response.status_code == 200
+            return response.json()["id"]
+
+        chat_id = create_chat("Trip notes", "pack the tent")
+        assert search("zebra") == []
+
+        # The index follows the messages when the chat is updated
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url(f"/{chat_id}"),
+                json={
+                    "chat": {
+                        "history": {
+                            "currentId": "1",
+                            "messages": {
+                                "1": {
+                                    "id": "1",
+                                    "parentId": None,
+                                    "content": "we saw a zebra",
+                                }
+                            },
+                        }
+                    }
+                },
+            )
+        assert response.status_code == 200
+        assert search("zebra") == [chat_id]
+
+        # A match in the title ranks above a match in the messages
+        title_chat_id = create_chat("Zebra facts", "stripes")
+        assert search("zebra") == [title_chat_id, chat_id]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.delete(self.create_url(f"/{chat_id}"))
+        assert response.status_code == 200
+        assert search("zebra") == [title_chat_id]
+
+    def test_search_chats_by_title(self, monkeypatch):
+        import apps.webui.models.chats as chats_model
+        from apps.webui.models.chats import ChatForm
+
+        # Without a full-text index only titles are matched, wildcards literally
+        monkeypatch.setattr(chats_model, "get_chat_search_dialect", lambda: None)
+        for title in ["50% off", "500 off", "Notes_1", "Notes 1"]:
+            self.chats.insert_new_chat("2", ChatForm(chat={"title": title}))
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search"), params={"query": "50%"}
+            )
+        assert response.status_code == 200
+        assert [chat["title"] for chat in response.json()] == ["50% off"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search"), params={"query": "notes_"}
+            )
+        assert response.status_code == 200
+        assert [chat["title"] for chat in response.json()] == ["Notes_1"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search"), params={"query": "off", "limit": 0}
+            )
+        assert response.status_code == 422
+
+    def test_get_chat_messages_by_id(self, monkeypatch):
+        import apps.webui.models.chats as chats_model
+        from apps.webui.models.chats import ChatForm
+
+        # A branch of five messages, with a sixth branching off the second
+        messages = {
+            str(i): {"id": str(i), "parentId": str(i - 1) if i > 1 else None}
+            for i in range(1, 6)
+        }
+        messages["6"] = {"id": "6", "parentId": "2"}
+
+        for mode in ["blob", "message"]:
+            monkeypatch.setattr(chats_model, "CHAT_STORAGE_MODE", mode)
+            chat_id = self.chats.insert_new_chat(
+                "2",
+                ChatForm(chat={"history": {"currentId": "5", "messages": messages}}),
+            ).id
+
+            def get_messages(**params):
+                with mock_webui_user(id="2"):
+                    return self.fast_api_client.get(
+                        self.create_url(f"/{chat_id}/messages"), params=params
+                    )
+
+            response = get_messages(limit=2)
+            assert response.status_code == 200
+            data = response.json()
+            assert [message["id"] for message in data["messages"]] == ["4", "5"]
+            assert data["total"] == 5
+            assert data["has_more"] is True
+            assert "messages" not in data["chat"]["history"]
+
+            data = get_messages(limit=2, before="4").json()
+            assert [message["id"] for message in data["messages"]] == ["2", "3"]
+            assert data["has_more"] is True
+
+            data = get_messages(limit=2, before="2").json()
+            assert [message["id"] for message in data["messages"]] == ["1"]
+            assert data["has_more"] is False
+
+            # Only messages on the active branch can be paged from
+            assert get_messages(limit=2, before="6").status_code == 400
+            assert get_messages(limit=-1).status_code == 422
+
+    def test_get_chat_list_by_cursor(self):
+        from apps.webui.models.chats import ChatForm
+
+        for i in range(4):
+            self.chats.insert_new_chat("2", ChatForm(chat={"title": f"Chat {i}"}))
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/list"))
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+        chat_ids = [chat["id"] for chat in response.json()]
+        assert len(chat_ids) == 5
+
+        # Following the cursors lists every chat once, in the same order
+        pages = []
+        params = {"limit": 2}
+        while True:
+            with mock_webui_user(id="2"):
+                response = self.fast_api_client.get(
+                    self.create_url("/list"), params=params
+                )
+            assert response.status_code == 200
+            pages.append([chat["id"] for chat in response.json()])
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params = {"limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert sum(pages, []) == chat_ids
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/list"), params={"cursor": "not-a-cursor"}
+            )
+        assert response.status_code == 400
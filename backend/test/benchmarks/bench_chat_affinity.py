@@ -0,0 +1,120 @@
+"""
+Measures the time to first token of multi-turn chats spread over several
+Ollama nodes, with every turn sent to a random node and then with the turns
+of a chat kept on one node by chat affinity.
+
+Each chat grows by one question and the model's answer per turn, so a node
+that already processed the previous turns can reuse its prompt cache while
+another node has to process the whole history again. Chats of both runs use
+different system prompts so that they don't share cached prefixes.
+
+Run from the backend directory against nodes that all have the model pulled:
+
+    python -m test.benchmarks.bench_chat_affinity --model llama3.1:8b \\
+        --urls http://gpu-1:11434 http://gpu-2:11434 --chats 8 --turns 6
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from utils.balancer import Balancer
+from utils.http import HTTP_CLIENT
+
+QUESTIONS = [
+    "Summarize the history of the printing press in a paragraph.",
+    "What were its effects on literacy?",
+    "Which other inventions had a comparable impact?",
+    "Compare two of them in detail.",
+    "What would the modern equivalent be?",
+    "Write a short conclusion to this conversation.",
+]
+
+
+async def chat_turn(url: str, model: str, messages: list[dict]) -> tuple[float, str]:
+    """Stream one answer, returning the time to its first token and its text."""
+    start = time.perf_counter()
+    ttft = None
+    content = []
+
+    async with HTTP_CLIENT.session.post(
+        f"{url}/api/chat",
+        json={"model": model, "messages": messages, "stream": True},
+        timeout=HTTP_CLIENT.timeout(600),
+    ) as response:
+        response.raise_for_status()
+        async for line in response.content:
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            token = chunk.get("message", {}).get("content", "")
+            if token and ttft is None:
+                ttft = time.perf_counter() - start
+            content.append(token)
+
+    return ttft or time.perf_counter() - start, "".join(content)
+
+
+async def run_chat(balancer: Balancer, args, affinity: bool, run_id: str) -> list:
+    chat_id = str(uuid.uuid4())
+    messages = [
+        {
+            "role": "system",
+            "content": f"You are a concise assistant. Conversation {run_id}-{chat_id}.",
+        }
+    ]
+
+    ttfts = []
+    for question in (QUESTIONS * args.turns)[: args.turns]:
+        messages.append({"role": "user", "content": question})
+        url = args.urls[balancer.select(args.urls, key=chat_id if affinity else None)]
+
+        request = balancer.track(url)
+        try:
+            ttft, answer = await chat_turn(url, args.model, messages)
+            request.finish()
+        except Exception as e:
+            request.finish(str(e))
+            raise
+
+        messages.append({"role": "assistant", "content": answer})
+        ttfts.append(ttft)
+    return ttfts
+
+
+def summarize(ttfts: list[list[float]]) -> dict:
+    # The first turn can't hit a cache in either run, so only later ones count
+    later = sorted(ttft for chat in ttfts for ttft in chat[1:])
+    return {
+        "mean_ms": round(statistics.fmean(later) * 1000, 1),
+        "p50_ms": round(later[len(later) // 2] * 1000, 1),
+        "p95_ms": round(later[int(len(later) * 0.95)] * 1000, 1),
+    }
+
+
+async def main(args):
+    run_id = str(uuid.uuid4())[:8]
+    try:
+        for name, affinity in [("random", False), ("affinity", True)]:
+            balancer = Balancer("random")
+            ttfts = await asyncio.gather(
+                *[
+                    run_chat(balancer, args, affinity, f"{run_id}-{name}")
+                    for _ in range(args.chats)
+                ]
+            )
+            print(name, summarize(ttfts), balancer.stats()["affinity"])
+    finally:
+        await HTTP_CLIENT.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--urls", nargs="+", required=True)
+    parser.add_argument("--chats", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=6)
+    asyncio.run(main(parser.parse_args()))
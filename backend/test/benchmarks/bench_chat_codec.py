@@ -0,0 +1,101 @@
+"""
+Measures the cost of encoding and decoding large chats.
+
+First the raw codecs are compared on a synthetic conversation (stdlib json
+against orjson, if installed), then a chat of the same size is saved and
+loaded through ChatTable using the codec selected by JSON_CODEC, which is
+what every chat request pays.
+
+Run from the backend directory against the configured DATABASE_URL:
+
+    python -m test.benchmarks.bench_chat_codec --messages 2000 --size 2000
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from apps.webui.models.chats import Chats, ChatForm
+from utils import codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_chat(messages: int, size: int) -> dict:
+    history = {}
+    parent_id = None
+    for i in range(messages):
+        id = str(uuid.uuid4())
+        history[id] = {
+            "id": id,
+            "parentId": parent_id,
+            "childrenIds": [],
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i} " + "lorem ipsum dolor sit amet ✓ " * (size // 29),
+            "timestamp": int(time.time()),
+            "info": {"eval_count": i, "total_duration": i * 1000},
+        }
+        if parent_id:
+            history[parent_id]["childrenIds"].append(id)
+        parent_id = id
+
+    return {
+        "title": "bench",
+        "models": ["bench"],
+        "history": {"messages": history, "currentId": parent_id},
+        "messages": list(history.values()),
+    }
+
+
+def timeit(func, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "mean_ms": round(statistics.fmean(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+    }
+
+
+def main(args):
+    chat = make_chat(args.messages, args.size)
+    encoded = json.dumps(chat)
+    print(f"chat size: {len(encoded) / 1024 / 1024:.2f} MiB, codec: {codec.CODEC}")
+
+    codecs = [("json", json.dumps, json.loads)]
+    if orjson is not None:
+        codecs.append(("orjson", orjson.dumps, orjson.loads))
+
+    for name, dumps, loads in codecs:
+        print(name, "dumps", timeit(lambda: dumps(chat), args.repeat))
+        print(name, "loads", timeit(lambda: loads(encoded), args.repeat))
+
+    user_id = f"bench-{uuid.uuid4()}"
+    try:
+        saved = Chats.insert_new_chat(user_id, ChatForm(chat=chat))
+        print(
+            "save", timeit(lambda: Chats.update_chat_by_id(saved.id, chat), args.repeat)
+        )
+        print(
+            "load",
+            timeit(
+                lambda: codec.loads(Chats.get_chat_by_id(saved.id).chat), args.repeat
+            ),
+        )
+    finally:
+        Chats.delete_chats_by_user_id(user_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    main(parser.parse_args())
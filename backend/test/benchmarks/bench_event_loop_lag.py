@@ -0,0 +1,104 @@
+"""
+Measures how much database access on the request path stalls the event loop.
+
+A set of coroutines emulates token streams (one chunk every few milliseconds)
+while other coroutines issue chat and user lookups, first through the sync
+table methods called directly from the loop, as the async routers used to do,
+and then through their `_async` variants. A monitor task records how late the
+loop wakes it up, which is the latency every concurrent stream sees.
+
+Run from the backend directory against the configured DATABASE_URL:
+
+    python -m test.benchmarks.bench_event_loop_lag --streams 50 --lookups 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from apps.webui.internal.db import async_engine
+from apps.webui.models.chats import Chats, ChatForm
+from apps.webui.models.users import Users
+
+
+async def monitor_loop_lag(stop: asyncio.Event, interval: float = 0.005):
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+    return lags
+
+
+async def stream(stop: asyncio.Event, interval: float = 0.01):
+    chunks = 0
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        chunks += 1
+    return chunks
+
+
+async def sync_lookups(user_id: str, chat_id: str, count: int):
+    for _ in range(count):
+        Chats.get_chat_by_id_and_user_id(chat_id, user_id)
+        Users.get_user_by_id(user_id)
+        await asyncio.sleep(0)
+
+
+async def async_lookups(user_id: str, chat_id: str, count: int):
+    for _ in range(count):
+        await Chats.get_chat_by_id_and_user_id_async(chat_id, user_id)
+        await Users.get_user_by_id_async(user_id)
+
+
+async def run(lookups, user_id: str, chat_id: str, args) -> dict:
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(stop))
+    streams = [asyncio.create_task(stream(stop)) for _ in range(args.streams)]
+
+    start = time.perf_counter()
+    per_worker = args.lookups // args.workers
+    await asyncio.gather(
+        *[lookups(user_id, chat_id, per_worker) for _ in range(args.workers)]
+    )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    lags = await monitor
+    chunks = sum(await asyncio.gather(*streams))
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "lookups_per_s": round(per_worker * args.workers / elapsed, 1),
+        "stream_chunks": chunks,
+        "lag_mean_ms": round(statistics.fmean(lags_ms), 3),
+        "lag_p99_ms": round(lags_ms[int(len(lags_ms) * 0.99) - 1], 3),
+        "lag_max_ms": round(lags_ms[-1], 3),
+    }
+
+
+async def main(args):
+    user_id = f"bench-{uuid.uuid4()}"
+    user = Users.insert_new_user(user_id, "bench", f"{user_id}@example.com")
+    chat = Chats.insert_new_chat(
+        user.id, ChatForm(chat={"title": "bench", "messages": []})
+    )
+
+    try:
+        print(f"async engine: {async_engine.url if async_engine else None}")
+        for name, lookups in [("sync", sync_lookups), ("async", async_lookups)]:
+            print(name, await run(lookups, user.id, chat.id, args))
+    finally:
+        Chats.delete_chats_by_user_id(user.id)
+        Users.delete_user_by_id(user.id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--lookups", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""
+Measures merging the custom models saved in the webui into a large catalog of
+upstream models.
+
+A synthetic catalog of tagged base models is merged with overrides and
+presets, first by the nested loop get_all_models used to run (kept below as
+a reference) and then by merge_custom_models, and both results are checked
+to be identical. No upstream or database is needed:
+
+    python -m test.benchmarks.bench_model_merge --models 300 --presets 100
+"""
+
+import argparse
+import copy
+import random
+import statistics
+import time
+
+from apps.webui.models.models import ModelModel
+from utils.registry import merge_custom_models
+
+
+def make_catalog(models: int, overrides: int, presets: int, seed: int = 0):
+    rng = random.Random(seed)
+
+    catalog = []
+    for i in range(models):
+        owned_by = rng.choice(["ollama", "openai"])
+        id = f"model-{i}:{rng.choice(['latest', '8b', '70b'])}"
+        catalog.append(
+            {
+                "id": id if owned_by == "ollama" else id.split(":")[0],
+                "name": id,
+                "object": "model",
+                "created": 0,
+                "owned_by": owned_by,
+            }
+        )
+
+    def custom_model(id, base_model_id=None):
+        return ModelModel(
+            id=id,
+            user_id="bench",
+            base_model_id=base_model_id,
+            name=f"custom {id}",
+            params={},
+            meta={"actionIds": [f"action-{rng.randrange(12)}"]},
+            updated_at=0,
+            created_at=0,
+        )
+
+    custom_models = [
+        custom_model(rng.choice(catalog)["id"].split(":")[0]) for _ in range(overrides)
+    ] + [custom_model(f"preset-{i}", rng.choice(catalog)["id"]) for i in range(presets)]
+    rng.shuffle(custom_models)
+    return catalog, custom_models
+
+
+def merge_custom_models_nested(models: list[dict], custom_models: list) -> list[dict]:
+    """The merge as get_all_models used to do it, one scan of models per custom model."""
+    for custom_model in custom_models:
+        if custom_model.base_model_id is None:
+            for model in models:
+                if (
+                    custom_model.id == model["id"]
+                    or custom_model.id == model["id"].split(":")[0]
+                ):
+                    model["name"] = custom_model.name
+                    model["info"] = custom_model.model_dump()
+
+                    action_ids = []
+                    if "info" in model and "meta" in model["info"]:
+                        action_ids.extend(model["info"]["meta"].get("actionIds", []))
+
+                    model["action_ids"] = action_ids
+        else:
+            owned_by = "openai"
+            pipe = None
+            action_ids = []
+
+            for model in models:
+                if (
+                    custom_model.base_model_id == model["id"]
+                    or custom_model.base_model_id == model["id"].split(":")[0]
+                ):
+                    owned_by = model["owned_by"]
+                    if "pipe" in model:
+                        pipe = model["pipe"]
+
+                    if "info" in model and "meta" in model["info"]:
+                        action_ids.extend(model["info"]["meta"].get("actionIds", []))
+                    break
+
+            models.append(
+                {
+                    "id": custom_model.id,
+                    "name": custom_model.name,
+                    "object": "model",
+                    "created": custom_model.created_at,
+                    "owned_by": owned_by,
+                    "info": custom_model.model_dump(),
+                    "preset": True,
+                    **({"pipe": pipe} if pipe is not None else {}),
+                    "action_ids": action_ids,
+                }
+            )
+    return models
+
+
+def timeit(func, catalog, custom_models, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        models = copy.deepcopy(catalog)
+        start = time.perf_counter()
+        func(models, custom_models)
+        times.append(time.perf_counter() - start)
+    return {
+        "mean_ms": round(statistics.fmean(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+    }
+
+
+def main(args):
+    catalog, custom_models = make_catalog(args.models, args.overrides, args.presets)
+    print(
+        f"models: {len(catalog)}, overrides: {args.overrides}, presets: {args.presets}"
+    )
+
+    expected = merge_custom_models_nested(copy.deepcopy(catalog), custom_models)
+    actual = merge_custom_models(copy.deepcopy(catalog), custom_models)
+    assert actual == expected, "merge_custom_models differs from the nested merge"
+
+    for name, func in [
+        ("nested", merge_custom_models_nested),
+        ("indexed", merge_custom_models),
+    ]:
+        print(name, timeit(func, catalog, custom_models, args.repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", type=int, default=300)
+    parser.add_argument("--overrides", type=int, default=50)
+    parser.add_argument("--presets", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
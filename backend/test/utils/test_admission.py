@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from utils.admission import AdmissionController, AdmissionRejected
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAdmissionController:
+    def test_admits_up_to_the_limits(self):
+        async def main():
+            controller = AdmissionController(max_per_model=2, max_per_backend=3)
+            tickets = [
+                await controller.admit("a", "llama", "ollama"),
+                await controller.admit("a", "llama", "ollama"),
+                await controller.admit("a", "mistral", "ollama"),
+            ]
+            assert controller.stats()["active_models"] == {"llama": 2, "mistral": 1}
+
+            # The backend is full even though mistral has room
+            waiting = asyncio.create_task(controller.admit("b", "mistral", "ollama"))
+            await asyncio.sleep(0.01)
+            assert not waiting.done()
+
+            tickets[0].release()
+            tickets[0].release()
+            ticket = await waiting
+            assert ticket.waited > 0
+            assert controller.stats()["active_backends"] == {"ollama": 3}
+
+        run(main())
+
+    def test_does_not_wait_behind_other_slots(self):
+        async def main():
+            controller = AdmissionController(max_per_model=1, queue_timeout=0.2)
+            ticket = await controller.admit("a", "llama", "ollama")
+            waiting = asyncio.create_task(controller.admit("a", "llama", "ollama"))
+            await asyncio.sleep(0.01)
+
+            # mistral has a free slot on the same backend
+            other = await asyncio.wait_for(
+                controller.admit("b", "mistral", "ollama"), 0.1
+            )
+            assert other.waited == 0
+            assert not waiting.done()
+
+            other.release()
+            ticket.release()
+            (await waiting).release()
+
+            # Also when it queues behind a request for the same backend
+            controller = AdmissionController(
+                max_per_model=1, max_per_backend=3, queue_timeout=0.2
+            )
+            await controller.admit("a", "llama", "ollama")
+            waiting = asyncio.create_task(controller.admit("a", "llama", "ollama"))
+            await asyncio.sleep(0.01)
+            await asyncio.wait_for(controller.admit("b", "mistral", "ollama"), 0.1)
+            assert not waiting.done()
+            waiting.cancel()
+
+        run(main())
+
+    def test_users_take_turns(self):
+        async def main():
+            controller = AdmissionController(max_per_model=1)
+            ticket = await controller.admit("a", "llama", "ollama")
+
+            order = []
+
+            async def request(user_id):
+                ticket = await controller.admit(user_id, "llama", "ollama")
+                order.append(user_id)
+                await asyncio.sleep(0)
+                ticket.release()
+
+            tasks = [asyncio.create_task(request(u)) for u in ["a", "a", "a", "b"]]
+            await asyncio.sleep(0.01)
+            ticket.release()
+            await asyncio.gather(*tasks)
+
+            assert order == ["a", "b", "a", "a"]
+
+        run(main())
+
+    def test_reports_position_and_rejects_after_deadline(self):
+        async def main():
+            controller = AdmissionController(
+                max_per_model=1, queue_timeout=0.1, update_interval=0.02
+            )
+            ticket = await controller.admit("a", "llama", "ollama")
+
+            updates = []
+
+            async def on_wait(position, eta):
+                updates.append((position, eta))
+
+            await controller.admit("b", "mistral", "ollama")
+            first = asyncio.create_task(controller.admit("b", "llama", "ollama"))
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected) as e:
+                await controller.admit("c", "llama", "ollama", on_wait=on_wait)
+
+            assert updates == [(2, None)]
+            assert e.value.retry_after >= 1
+            assert controller.stats()["timed_out"] >= 1
+            ticket.release()
+            with pytest.raises(AdmissionRejected):
+                await first
+
+        run(main())
+
+    def test_rejects_when_queue_is_full(self):
+        async def main():
+            controller = AdmissionController(max_per_model=1, max_queue=1)
+            ticket = await controller.admit("a", "llama", "ollama")
+            waiting = asyncio.create_task(controller.admit("b", "llama", "ollama"))
+            await asyncio.sleep(0.01)
+
+            with pytest.raises(AdmissionRejected):
+                await controller.admit("c", "llama", "ollama")
+            assert controller.stats()["rejected"] == 1
+
+            waiting.cancel()
+            await asyncio.sleep(0.01)
+            assert controller.stats()["queued_users"] == 0
+            ticket.release()
+            assert controller.stats()["active_models"] == {}
+
+        run(main())
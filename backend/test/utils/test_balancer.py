@@ -0,0 +1,131 @@
+import time
+
+from utils.balancer import Balancer, parse_weights
+
+URLS = ["http://a:11434", "http://b:11434", "http://c:11434"]
+
+
+class TestBalancer:
+    def test_least_outstanding_avoids_busy_nodes(self):
+        balancer = Balancer("least_outstanding")
+        busy = [balancer.track(URLS[0]), balancer.track(URLS[1])]
+
+        assert {balancer.select(URLS) for _ in range(20)} == {2}
+
+        busy[1].finish()
+        assert {balancer.select(URLS) for _ in range(20)} <= {1, 2}
+
+    def test_ewma_prefers_fast_nodes(self):
+        balancer = Balancer("ewma")
+        for url, latency in zip(URLS, [0.5, 0.1, 0.3]):
+            request = balancer.track(url)
+            balancer._record_latency(url, latency)
+            request.finish()
+
+        assert balancer.select(URLS) == 1
+
+        # Queued requests make the fast node more expensive than the others
+        busy = [balancer.track(URLS[1]) for _ in range(5)]
+        assert balancer.select(URLS) == 2
+        for request in busy:
+            request.finish()
+
+    def test_weighted(self):
+        balancer = Balancer("weighted", weights=parse_weights(f"{URLS[1]}/=1"))
+        balancer.weights[URLS[0]] = 0
+        balancer.weights[URLS[2]] = 0
+
+        assert {balancer.select(URLS) for _ in range(20)} == {1}
+
+    def test_ejects_failing_nodes(self):
+        balancer = Balancer("random", eject_failures=2, eject_seconds=0.05)
+        for _ in range(2):
+            balancer.track(URLS[0]).finish("Server Connection Error")
+            balancer.track(URLS[1]).finish("Server Connection Error")
+
+        assert balancer.is_ejected(URLS[0])
+        assert {balancer.select(URLS) for _ in range(50)} == {2}
+        # With every candidate ejected they are all used anyway
+        assert {balancer.select(URLS[:2]) for _ in range(50)} == {0, 1}
+
+        time.sleep(0.06)
+        assert not balancer.is_ejected(URLS[0])
+
+        # Back from ejection, a single failure is enough to eject it again
+        balancer.track(URLS[0]).finish("Server Connection Error")
+        assert balancer.is_ejected(URLS[0])
+
+    def test_stats(self):
+        balancer = Balancer()
+        request = balancer.track(URLS[0])
+        request.finish()
+        request.finish()
+        balancer.track(URLS[0])
+
+        (node,) = balancer.stats(URLS[:1])["nodes"]
+        assert node["in_flight"] == 1
+        assert node["requests"] == 2
+        assert node["failures"] == 0
+
+
+class TestChatAffinity:
+    def test_same_key_same_node(self):
+        balancer = Balancer("random")
+        chosen = {balancer.select(URLS, key="chat-1") for _ in range(20)}
+
+        assert len(chosen) == 1
+        assert balancer.stats()["affinity"]["preferred"] == 20
+
+    def test_keys_spread_over_nodes(self):
+        balancer = Balancer()
+        chosen = {balancer.select(URLS, key=f"chat-{i}") for i in range(100)}
+
+        assert chosen == {0, 1, 2}
+
+    def test_removing_a_node_only_moves_its_keys(self):
+        balancer = Balancer()
+        keys = [f"chat-{i}" for i in range(100)]
+        before = {key: URLS[balancer.select(URLS, key=key)] for key in keys}
+        after = {key: URLS[balancer.select(URLS[:2], key=key)] for key in keys}
+
+        assert all(after[key] == before[key] for key in keys if before[key] != URLS[2])
+
+    def test_falls_back_when_preferred_is_ejected_or_overloaded(self):
+        balancer = Balancer(eject_failures=1, eject_seconds=60)
+        preferred = balancer.select(URLS, key="chat-1")
+
+        busy = [balancer.track(URLS[preferred]) for _ in range(3)]
+        fallback = balancer.select(URLS, key="chat-1")
+        assert fallback != preferred
+        assert balancer.stats()["affinity"]["overflowed"] == 1
+        for request in busy:
+            request.finish()
+
+        assert balancer.select(URLS, key="chat-1") == preferred
+        balancer.track(URLS[preferred]).finish("Server Connection Error")
+        assert balancer.select(URLS, key="chat-1") != preferred
+
+    def test_load_factor_below_one(self):
+        balancer = Balancer(affinity_load_factor=0.5)
+        busy = [balancer.track(url) for url in URLS]
+
+        assert balancer.select(URLS, key="chat-1") in range(len(URLS))
+        for request in busy:
+            request.finish()
+
+    def test_keys_follow_weights(self):
+        balancer = Balancer(weights={URLS[0]: 3, URLS[1]: 1, URLS[2]: 0.0001})
+        chosen = [balancer.select(URLS, key=f"chat-{i}") for i in range(400)]
+
+        assert 240 < chosen.count(0) < 360
+        assert chosen.count(2) == 0
+
+    def test_zero_weights(self):
+        balancer = Balancer(weights={URLS[0]: 1, URLS[1]: 0, URLS[2]: 0})
+        chosen = {balancer.select(URLS, key=f"chat-{i}") for i in range(50)}
+        assert chosen == {0}
+
+        # Without any weight, chats are spread as if all weights were equal
+        balancer = Balancer(weights={url: 0 for url in URLS})
+        chosen = {balancer.select(URLS, key=f"chat-{i}") for i in range(100)}
+        assert chosen == {0, 1, 2}
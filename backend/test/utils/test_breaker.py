@@ -0,0 +1,47 @@
+import time
+
+from utils.breaker import CircuitBreaker, CircuitBreakers
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("a", failure_threshold=2, recovery_seconds=60)
+        breaker.record_failure("down")
+        breaker.record_success()
+        breaker.record_failure("down")
+
+        assert breaker.allow()
+        breaker.record_failure("down")
+
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.stats()["rejected"] == 1
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker("a", failure_threshold=1, recovery_seconds=0.05)
+        breaker.record_failure("down")
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        assert breaker.state == "half_open"
+        assert not breaker.allow()
+
+        breaker.record_failure("still down")
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow()
+
+    def test_breakers_by_name(self):
+        breakers = CircuitBreakers(failure_threshold=1)
+        breakers.get("a").record_failure("down")
+
+        assert breakers.get("a") is breakers.get("a")
+        assert [stats["state"] for stats in breakers.stats(["a", "b"])] == [
+            "open",
+            "closed",
+        ]
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import time
+
+from utils.cache import AsyncRefreshCache, DiskCache, TTLCache
+
+
+class TestTTLCache:
+    def test_get_and_set(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_expires_entries(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        assert cache.invalidate(lambda _, value: value == 1) == 1
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_disabled(self):
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+
+
+class TestDiskCache:
+    def test_get_and_set(self, tmp_path):
+        cache = DiskCache(tmp_path / "cache", max_bytes=1024 * 1024, ttl=60)
+        cache.set("a", {"title": "Hello ✓"})
+
+        assert cache.get("a") == {"title": "Hello ✓"}
+        assert cache.get("b") is None
+        # Another process sees the same entries
+        assert DiskCache(tmp_path / "cache", max_bytes=1024).get("a") is not None
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_expires_entries(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1024 * 1024, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.get("a") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=300, ttl=60)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.set(key, "x" * 50)
+            os.utime(tmp_path / f"{key}.json", (i, i))
+        cache.get("a")
+        cache.set("d", "x" * 50)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("d") is not None
+        assert cache.stats()["size"] <= 300
+        assert cache.stats()["evictions"] >= 1
+
+    def test_ignores_corrupt_entries(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1024, ttl=60)
+        (tmp_path / "a.json").write_text("{")
+
+        assert cache.get("a") is None
+        assert not (tmp_path / "a.json").exists()
+
+    def test_clear(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1024, ttl=60)
+        cache.set("a", 1)
+        cache.clear()
+
+        assert cache.get("a") is None
+        assert cache.stats()["size"] == 0
+
+
+class TestAsyncRefreshCache:
+    def test_serves_fresh_and_stale_values(self):
+        async def run():
+            cache = AsyncRefreshCache(ttl=0.05, max_stale=60)
+            calls = []
+
+            async def loader():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return len(calls)
+
+            assert await cache.get(loader) == 1
+            assert await cache.get(loader) == 1
+
+            await asyncio.sleep(0.06)
+            # Stale: served immediately while the refresh runs
+            assert await cache.get(loader) == 1
+            await asyncio.sleep(0.02)
+            assert await cache.get(loader) == 2
+            return cache.stats()
+
+        stats = asyncio.run(run())
+        assert stats["refreshes"] == 2
+        assert stats["stale_hits"] == 1
+
+    def test_concurrent_misses_share_one_refresh(self):
+        async def run():
+            cache = AsyncRefreshCache(ttl=60, max_stale=60)
+            calls = []
+
+            async def loader():
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return "models"
+
+            results = await asyncio.gather(*[cache.get(loader) for _ in range(10)])
+            return results, len(calls)
+
+        results, calls = asyncio.run(run())
+        assert results == ["models"] * 10
+        assert calls == 1
+
+    def test_invalidate_waits_for_a_fresh_value(self):
+        async def run():
+            cache = AsyncRefreshCache(ttl=60, max_stale=60)
+            values = iter(["old", "new"])
+
+            async def loader():
+                return next(values)
+
+            assert await cache.get(loader) == "old"
+            cache.invalidate()
+            return await cache.get(loader)
+
+        assert asyncio.run(run()) == "new"
+
+    def test_serves_stale_value_when_refresh_fails(self):
+        async def run():
+            cache = AsyncRefreshCache(ttl=60, max_stale=60)
+
+            async def loader():
+                return "models"
+
+            async def failing_loader():
+                raise RuntimeError("upstream down")
+
+            await cache.get(loader)
+            cache.invalidate()
+            return await cache.get(failing_loader), cache.stats()
+
+        value, stats = asyncio.run(run())
+        assert value == "models"
+        assert stats["failures"] == 1
+        assert stats["last_error"] == "upstream down"
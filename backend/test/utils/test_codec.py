@@ -0,0 +1,49 @@
+import math
+
+from utils import codec
+
+
+class TestCodec:
+    def test_round_trip(self):
+        value = {"title": "Grüße ✓", "messages": [{"id": "a", "n": 1.5, "ok": True}]}
+
+        assert codec.loads(codec.dumps(value)) == value
+        assert codec.loads(codec.dumpb(value)) == value
+        assert "✓" in codec.dumps(value)
+
+    def test_accepts_values_outside_strict_json(self):
+        value = {"big": 2**70, 1: None}
+
+        assert codec.loads(codec.dumps(value)) == {"big": 2**70, "1": None}
+        assert math.isnan(codec.loads('{"x": NaN}')["x"])
+
+    def test_loads_bytes(self):
+        assert codec.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+        assert codec.loads(memoryview(b"[]")) == []
+
+    def test_json_response(self):
+        response = codec.JSONResponse({"a": "é"})
+
+        assert codec.loads(response.body) == {"a": "é"}
+        assert response.headers["content-type"] == "application/json"
+
+    def test_compress_round_trip(self, monkeypatch):
+        monkeypatch.setattr(codec, "COMPRESSION_METHOD", "z")
+        value = codec.dumps({"content": "lorem ipsum ✓ " * 500})
+        compressed = codec.compress(value, threshold=1024)
+
+        assert codec.is_compressed(compressed)
+        assert len(compressed) < len(value)
+        assert codec.decompress(compressed) == value
+        assert codec.get_uncompressed_length(compressed[:32]) == len(value)
+
+    def test_compress_disabled(self, monkeypatch):
+        monkeypatch.setattr(codec, "COMPRESSION_METHOD", None)
+        value = codec.dumps({"content": "lorem ipsum ✓ " * 500})
+
+        assert codec.compress(value, threshold=1024) == value
+
+    def test_compress_leaves_small_and_plain_values(self):
+        assert codec.compress('{"title": "a"}', threshold=1024) == '{"title": "a"}'
+        assert codec.compress(None) is None
+        assert codec.decompress('{"title": "a"}') == '{"title": "a"}'
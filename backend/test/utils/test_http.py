@@ -0,0 +1,59 @@
+import asyncio
+
+from aiohttp import web
+
+from utils.http import HTTPClientManager
+
+
+async def start_server():
+    async def handler(request):
+        response = web.json_response({"cookie": request.headers.get("Cookie")})
+        response.set_cookie("session", "secret")
+        return response
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+class TestHTTPClientManager:
+    def test_reuses_connections_without_cookies(self):
+        async def run():
+            runner, url = await start_server()
+            client = HTTPClientManager()
+            try:
+                await client.start()
+                for _ in range(3):
+                    async with client.session.get(url) as response:
+                        assert (await response.json()) == {"cookie": None}
+
+                stats = client.stats()
+                assert stats["requests"] == 3
+                assert stats["connections_created"] == 1
+                assert stats["connections_reused"] == 2
+                assert stats["pool"]["in_use"] == 0
+                assert stats["pool"]["idle"] == 1
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        asyncio.run(run())
+
+    def test_sync_session_ignores_cookies(self):
+        async def run():
+            runner, url = await start_server()
+            client = HTTPClientManager()
+            try:
+                for _ in range(2):
+                    response = await asyncio.to_thread(client.sync_session.get, url)
+                    assert response.json() == {"cookie": None}
+            finally:
+                await client.close()
+                await runner.cleanup()
+
+        asyncio.run(run())
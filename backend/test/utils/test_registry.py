@@ -0,0 +1,78 @@
+from apps.webui.models.models import ModelModel
+from utils.registry import merge_custom_models
+
+
+def make_custom_model(id, base_model_id=None, **meta):
+    return ModelModel(
+        id=id,
+        user_id="admin",
+        base_model_id=base_model_id,
+        name=f"custom {id}",
+        params={},
+        meta=meta,
+        updated_at=0,
+        created_at=0,
+    )
+
+
+def make_models():
+    return [
+        {"id": "llama3:8b", "name": "llama3:8b", "owned_by": "ollama"},
+        {"id": "llama3:70b", "name": "llama3:70b", "owned_by": "ollama"},
+        {"id": "gpt-4o", "name": "gpt-4o", "owned_by": "openai"},
+        {"id": "pipe", "name": "pipe", "owned_by": "openai", "pipe": {"type": "pipe"}},
+    ]
+
+
+class TestMergeCustomModels:
+    def test_overrides_every_tag_of_a_model(self):
+        models = merge_custom_models(
+            make_models(), [make_custom_model("llama3", actionIds=["a"])]
+        )
+
+        assert [model["name"] for model in models[:2]] == ["custom llama3"] * 2
+        assert models[0]["action_ids"] == ["a"]
+        assert models[2]["name"] == "gpt-4o"
+        assert "action_ids" not in models[2]
+
+    def test_overrides_exact_id(self):
+        models = merge_custom_models(make_models(), [make_custom_model("llama3:70b")])
+
+        assert models[0]["name"] == "llama3:8b"
+        assert models[1]["name"] == "custom llama3:70b"
+
+    def test_appends_presets(self):
+        models = merge_custom_models(
+            make_models(),
+            [
+                make_custom_model("gpt-4o", actionIds=["a"]),
+                make_custom_model("writer", base_model_id="gpt-4o"),
+                make_custom_model("piper", base_model_id="pipe"),
+                make_custom_model("ollama", base_model_id="llama3"),
+                make_custom_model("unknown", base_model_id="missing"),
+            ],
+        )
+        presets = {model["id"]: model for model in models if model.get("preset")}
+
+        assert presets["writer"]["owned_by"] == "openai"
+        assert presets["writer"]["action_ids"] == ["a"]
+        assert presets["piper"]["pipe"] == {"type": "pipe"}
+        assert presets["ollama"]["owned_by"] == "ollama"
+        assert presets["unknown"]["owned_by"] == "openai"
+        assert presets["unknown"]["action_ids"] == []
+
+    def test_presets_can_be_based_on_presets(self):
+        models = merge_custom_models(
+            make_models(),
+            [
+                make_custom_model("writer", base_model_id="llama3:8b"),
+                make_custom_model("editor", base_model_id="writer"),
+                make_custom_model("writer", actionIds=["b"]),
+            ],
+        )
+
+        assert models[-1]["id"] == "editor"
+        assert models[-1]["owned_by"] == "ollama"
+        # The override is applied after the editor preset was created
+        assert models[-1]["action_ids"] == []
+        assert models[-2]["action_ids"] == ["b"]
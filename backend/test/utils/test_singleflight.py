@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight, make_key
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestMakeKey:
+    def test_ignores_key_order(self):
+        assert make_key("task", {"a": 1, "b": [1, {"c": 2, "d": 3}]}) == make_key(
+            "task", {"b": [1, {"d": 3, "c": 2}], "a": 1}
+        )
+
+    def test_depends_on_group_and_payload(self):
+        assert make_key("task", {"a": 1}) != make_key("task", {"a": 2})
+        assert make_key("task", {"a": 1}) != make_key("ollama", {"a": 1})
+
+
+class TestSingleFlight:
+    def test_shares_concurrent_identical_calls(self):
+        async def main():
+            flights = SingleFlight()
+            calls = []
+
+            async def fetch(payload):
+                calls.append(payload)
+                await asyncio.sleep(0.01)
+                return {"payload": payload}
+
+            results = await asyncio.gather(
+                *[
+                    flights.do("task", payload, lambda payload=payload: fetch(payload))
+                    for payload in ["a", "a", "a", "b"]
+                ]
+            )
+
+            assert calls == ["a", "b"]
+            assert results == [{"payload": p} for p in ["a", "a", "a", "b"]]
+            # Every caller gets its own copy
+            assert results[0] is not results[1]
+
+            stats = flights.stats()
+            assert stats["in_flight"] == 0
+            assert stats["groups"]["task"]["calls"] == 4
+            assert stats["groups"]["task"]["executions"] == 2
+            assert stats["groups"]["task"]["coalesced"] == 2
+
+            # Nothing is kept once the call is done
+            await flights.do("task", "a", lambda: fetch("a"))
+            assert calls == ["a", "b", "a"]
+
+        run(main())
+
+    def test_shares_failures(self):
+        async def main():
+            flights = SingleFlight()
+            calls = 0
+
+            async def fail():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.01)
+                raise ValueError("upstream down")
+
+            results = await asyncio.gather(
+                flights.do("task", "a", fail),
+                flights.do("task", "a", fail),
+                return_exceptions=True,
+            )
+
+            assert calls == 1
+            assert all(isinstance(result, ValueError) for result in results)
+            assert flights.stats()["groups"]["task"]["failures"] == 1
+
+        run(main())
+
+    def test_unshareable_results_are_fetched_again(self):
+        async def main():
+            flights = SingleFlight()
+            calls = 0
+
+            async def fetch():
+                nonlocal calls
+                calls += 1
+                call = calls
+                await asyncio.sleep(0.01)
+                return call
+
+            results = await asyncio.gather(
+                *[
+                    flights.do("task", "a", fetch, shareable=lambda result: False)
+                    for _ in range(3)
+                ]
+            )
+
+            assert sorted(results) == [1, 2, 3]
+            assert flights.stats()["groups"]["task"]["unshared"] == 2
+            assert flights.stats()["groups"]["task"]["coalesced"] == 0
+
+        run(main())
+
+    def test_call_outlives_the_first_caller(self):
+        async def main():
+            flights = SingleFlight()
+            started = asyncio.Event()
+
+            async def fetch():
+                started.set()
+                await asyncio.sleep(0.05)
+                return "done"
+
+            first = asyncio.create_task(flights.do("task", "a", fetch))
+            await started.wait()
+            second = asyncio.create_task(flights.do("task", "a", fetch))
+            await asyncio.sleep(0)
+
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            assert await second == "done"
+
+        run(main())
+
+    def test_call_is_cancelled_without_callers(self):
+        async def main():
+            flights = SingleFlight()
+            cancelled = asyncio.Event()
+
+            async def fetch():
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+
+            task = asyncio.create_task(flights.do("task", "a", fetch))
+            await asyncio.sleep(0.01)
+            task.cancel()
+
+            await asyncio.wait_for(cancelled.wait(), 1)
+            await asyncio.sleep(0)
+            assert flights.stats()["in_flight"] == 0
+
+        run(main())
+
+    def test_disabled(self):
+        async def main():
+            flights = SingleFlight(enabled=False)
+            calls = 0
+
+            async def fetch():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.01)
+
+            await asyncio.gather(*[flights.do("task", "a", fetch) for _ in range(3)])
+            assert calls == 3
+
+        run(main())
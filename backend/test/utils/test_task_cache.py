@@ -0,0 +1,56 @@
+import asyncio
+
+from utils import task_cache
+from utils.task_cache import (
+    cache_task_response,
+    get_cached_task_response,
+    get_task_cache_key,
+)
+
+
+def make_payload(task="title_generation", content="Hello", **kwargs):
+    return {
+        "model": "llama3",
+        "messages": [{"role": "user", "content": content}],
+        "stream": False,
+        "metadata": {"task": task},
+        **kwargs,
+    }
+
+
+class TestTaskCacheKey:
+    def test_depends_on_task_model_and_messages(self):
+        key = get_task_cache_key(make_payload())
+
+        assert key == get_task_cache_key(make_payload())
+        assert key != get_task_cache_key(make_payload(content="Hi"))
+        assert key != get_task_cache_key(make_payload(task="emoji_generation"))
+        assert key != get_task_cache_key({**make_payload(), "model": "mistral"})
+
+    def test_only_cached_tasks(self):
+        assert get_task_cache_key(make_payload(task="function_calling")) is None
+        assert get_task_cache_key(make_payload(stream=True)) is None
+        assert get_task_cache_key({"model": "llama3", "messages": []}) is None
+
+
+class TestTaskCache:
+    def test_caches_successful_responses(self):
+        async def main():
+            task_cache.clear_task_cache()
+            key = get_task_cache_key(make_payload(content="cached"))
+            assert await get_cached_task_response(key) is None
+
+            await cache_task_response(key, {"choices": [{"message": {}}]})
+            response = await get_cached_task_response(key)
+            assert response == {"choices": [{"message": {}}]}
+
+            response["choices"].clear()
+            assert await get_cached_task_response(key) == {"choices": [{"message": {}}]}
+
+            error_key = get_task_cache_key(make_payload(content="error"))
+            await cache_task_response(error_key, {"error": "upstream down"})
+            assert await get_cached_task_response(error_key) is None
+
+            assert task_cache.get_task_cache_stats()["hits"] == 2
+
+        asyncio.run(main())
@@ -0,0 +1,308 @@
+"""
+Admission control for chat completions.
+
+At most `max_per_model` requests run at once for a model and `max_per_backend`
+for a backend (0 for no limit). Requests over the limits wait in a queue that
+is fair between users: whenever a slot frees up, users with waiting requests
+take turns, so one user sending many requests can't starve the others. A
+request that can't start before its deadline, or finds the queue full, is
+rejected with the time after which it is worth retrying.
+
+Slots are counted per worker process.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Optional
+
+from env import (
+    ADMISSION_MAX_PER_BACKEND,
+    ADMISSION_MAX_PER_MODEL,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A running request's slots, released once its response is complete."""
+
+    def __init__(self, controller: "AdmissionController", model: str, backend: str):
+        self.controller = controller
+        self.model = model
+        self.backend = backend
+        self.admitted_at = time.monotonic()
+        self.waited = 0.0
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.controller._release(self)
+
+
+class Waiter:
+    def __init__(self, user_id: str, model: str, backend: str):
+        self.user_id = user_id
+        self.model = model
+        self.backend = backend
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_per_model: int = 0,
+        max_per_backend: int = 0,
+        queue_timeout: float = 60,
+        max_queue: int = 200,
+        update_interval: float = 1,
+    ):
+        self.max_per_model = max_per_model
+        self.max_per_backend = max_per_backend
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.update_interval = update_interval
+
+        self._active_models: dict[str, int] = {}
+        self._active_backends: dict[str, int] = {}
+        # Waiting requests by user, in the order users get their next turn
+        self._queues: OrderedDict[str, deque[Waiter]] = OrderedDict()
+        # Moving average of how long requests for a model hold their slot
+        self._durations: dict[str, float] = {}
+
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "total_wait": 0.0,
+        }
+
+    ####################
+    # Slots
+    ####################
+
+    def _has_slot(self, model: str, backend: str) -> bool:
+        return (
+            not self.max_per_model
+            or self._active_models.get(model, 0) < self.max_per_model
+        ) and (
+            not self.max_per_backend
+            or self._active_backends.get(backend, 0) < self.max_per_backend
+        )
+
+    def _admit(self, model: str, backend: str) -> AdmissionTicket:
+        self._active_models[model] = self._active_models.get(model, 0) + 1
+        self._active_backends[backend] = self._active_backends.get(backend, 0) + 1
+        self._stats["admitted"] += 1
+        return AdmissionTicket(self, model, backend)
+
+    def _release(self, ticket: AdmissionTicket):
+        for active, key in [
+            (self._active_models, ticket.model),
+            (self._active_backends, ticket.backend),
+        ]:
+            active[key] -= 1
+            if active[key] <= 0:
+                del active[key]
+
+        duration = time.monotonic() - ticket.admitted_at
+        average = self._durations.get(ticket.model)
+        self._durations[ticket.model] = (
+            duration if average is None else average + 0.2 * (duration - average)
+        )
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit waiting requests while there are slots, one per user per turn."""
+        admitted = True
+        while admitted:
+            admitted = False
+            for user_id in list(self._queues):
+                queue = self._queues[user_id]
+                waiter = next(
+                    (w for w in queue if self._has_slot(w.model, w.backend)), None
+                )
+                if waiter is None:
+                    continue
+
+                queue.remove(waiter)
+                if queue:
+                    self._queues.move_to_end(user_id)
+                else:
+                    del self._queues[user_id]
+
+                if not waiter.future.done():
+                    waiter.future.set_result(self._admit(waiter.model, waiter.backend))
+                    admitted = True
+
+    ####################
+    # Queue
+    ####################
+
+    def _waiters(self):
+        for queue in self._queues.values():
+            yield from queue
+
+    def _remove(self, waiter: Waiter):
+        queue = self._queues.get(waiter.user_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.user_id]
+
+    def get_position(self, waiter: Waiter) -> int:
+        """
+        Roughly how many requests for the same model start before this one,
+        plus one: the user's own earlier requests, and from every other user
+        as many as the turns this one has to wait for.
+        """
+        own = [
+            w for w in self._queues.get(waiter.user_id, ()) if w.model == waiter.model
+        ]
+        turns = own.index(waiter) + 1 if waiter in own else 1
+
+        ahead = turns - 1
+        for user_id, queue in self._queues.items():
+            if user_id != waiter.user_id:
+                ahead += min(sum(w.model == waiter.model for w in queue), turns)
+        return ahead + 1
+
+    def get_eta(self, model: str, position: int) -> Optional[int]:
+        """Seconds until the request at `position` starts, if it can be told."""
+        duration = self._durations.get(model)
+        if duration is None:
+            return None
+        slots = min(
+            limit
+            for limit in [self.max_per_model, self.max_per_backend, math.inf]
+            if limit
+        )
+        return math.ceil(math.ceil(position / slots) * duration)
+
+    def _get_retry_after(self, model: str, position: int) -> int:
+        eta = self.get_eta(model, position)
+        return max(
+            1, math.ceil(min(eta if eta is not None else math.inf, self.queue_timeout))
+        )
+
+    async def admit(
+        self,
+        user_id: str,
+        model: str,
+        backend: str,
+        on_wait: Optional[Callable[[int, Optional[int]], Awaitable]] = None,
+    ) -> AdmissionTicket:
+        """
+        Wait for a slot for `model` on `backend` and return its ticket. While
+        the request is queued, `on_wait(position, eta)` is awaited whenever
+        either changes. Raises AdmissionRejected when the queue is full or the
+        deadline passes.
+        """
+        # Earlier requests waiting for the same model or backend slot go first
+        waiting = [
+            w
+            for w in self._waiters()
+            if (self.max_per_model and w.model == model)
+            or (self.max_per_backend and w.backend == backend)
+        ]
+        if not waiting and self._has_slot(model, backend):
+            return self._admit(model, backend)
+
+        if sum(len(queue) for queue in self._queues.values()) >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise AdmissionRejected(
+                "queue full", self._get_retry_after(model, len(waiting) + 1)
+            )
+
+        waiter = Waiter(user_id, model, backend)
+        self._queues.setdefault(user_id, deque()).append(waiter)
+        self._stats["queued"] += 1
+        # Starts right away if the waiting requests are blocked on other slots
+        self._dispatch()
+
+        deadline = waiter.enqueued_at + self.queue_timeout
+        last_update = None
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and not waiter.future.done():
+                    self._stats["timed_out"] += 1
+                    raise AdmissionRejected(
+                        "queue timeout",
+                        self._get_retry_after(model, self.get_position(waiter)),
+                    )
+
+                if on_wait is not None and not waiter.future.done():
+                    position = self.get_position(waiter)
+                    update = (position, self.get_eta(model, position))
+                    if update != last_update:
+                        last_update = update
+                        try:
+                            await on_wait(*update)
+                        except Exception as e:
+                            log.debug(f"on_wait failed: {e}")
+
+                try:
+                    ticket = await asyncio.wait_for(
+                        asyncio.shield(waiter.future),
+                        max(min(remaining, self.update_interval), 0),
+                    )
+                    ticket.waited = time.monotonic() - waiter.enqueued_at
+                    self._stats["total_wait"] += ticket.waited
+                    return ticket
+                except asyncio.TimeoutError:
+                    continue
+        except BaseException:
+            # Cancelled or rejected, possibly right after being admitted
+            if waiter.future.done() and not waiter.future.cancelled():
+                waiter.future.result().release()
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+            raise
+
+    def stats(self) -> dict:
+        queued = {}
+        for waiter in self._waiters():
+            queued[waiter.model] = queued.get(waiter.model, 0) + 1
+
+        admitted_from_queue = self._stats["queued"] - self._stats["timed_out"]
+        return {
+            "max_per_model": self.max_per_model,
+            "max_per_backend": self.max_per_backend,
+            "active_models": dict(self._active_models),
+            "active_backends": dict(self._active_backends),
+            "queued_models": queued,
+            "queued_users": len(self._queues),
+            "mean_durations": dict(self._durations),
+            **{k: v for k, v in self._stats.items() if k != "total_wait"},
+            "mean_wait": (
+                self._stats["total_wait"] / admitted_from_queue
+                if admitted_from_queue > 0
+                else 0
+            ),
+        }
+
+
+ADMISSION = AdmissionController(
+    max_per_model=ADMISSION_MAX_PER_MODEL,
+    max_per_backend=ADMISSION_MAX_PER_BACKEND,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    max_queue=ADMISSION_MAX_QUEUE,
+)
@@ -0,0 +1,290 @@
+"""
+Choosing which upstream serves a request when a model is available on
+several, from what the requests already sent to each of them showed.
+
+Every request is tracked from the moment it is sent until its response has
+been fully read, so the balancer knows how many are in flight on each node
+and how long nodes take to start answering. Nodes that keep failing are
+ejected for a while and tried again afterwards.
+
+Requests can also carry a key, such as a chat id, so that requests with the
+same key keep going to the same node and reuse the prompt cache it holds.
+"""
+
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class NodeStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ewma_latency: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+def select_random(nodes: list[NodeStats], weights: list[float]) -> int:
+    return random.randrange(len(nodes))
+
+
+def select_least_outstanding(nodes: list[NodeStats], weights: list[float]) -> int:
+    least = min(node.in_flight for node in nodes)
+    return random.choice([i for i, node in enumerate(nodes) if node.in_flight == least])
+
+
+def select_ewma(nodes: list[NodeStats], weights: list[float]) -> int:
+    # Nodes without a latency yet are tried first, then the expected wait is
+    # the latency scaled by the requests already queued on the node
+    def cost(i: int) -> float:
+        latency = nodes[i].ewma_latency or 0.0
+        return latency * (nodes[i].in_flight + 1)
+
+    least = min(cost(i) for i in range(len(nodes)))
+    return random.choice([i for i in range(len(nodes)) if cost(i) == least])
+
+
+def select_weighted(nodes: list[NodeStats], weights: list[float]) -> int:
+    if not any(weight > 0 for weight in weights):
+        return random.randrange(len(nodes))
+    return random.choices(range(len(nodes)), weights=weights)[0]
+
+
+# Strategies take the stats and weights of the candidate nodes and return the
+# position of the one to use
+STRATEGIES: dict[str, Callable[[list[NodeStats], list[float]], int]] = {
+    "random": select_random,
+    "least_outstanding": select_least_outstanding,
+    "ewma": select_ewma,
+    "weighted": select_weighted,
+}
+
+
+def parse_weights(value: str) -> dict[str, float]:
+    """Parse "url=weight;url=weight" into a dict, ignoring malformed entries."""
+    weights = {}
+    for entry in value.split(";"):
+        url, _, weight = entry.strip().rpartition("=")
+        try:
+            weights[url.rstrip("/")] = float(weight)
+        except ValueError:
+            if entry.strip():
+                log.warning(f"Ignoring invalid weight: {entry}")
+    return weights
+
+
+def rank_by_key(
+    key: str, urls: list[str], weights: Optional[list[float]] = None
+) -> list[int]:
+    """
+    Positions of `urls`, the node `key` prefers first (weighted rendezvous
+    hashing): each node is preferred by a share of the keys proportional to
+    its weight. Adding or removing a node only moves the keys that preferred it.
+    """
+
+    def score(i: int) -> float:
+        digest = hashlib.blake2b(f"{key}\0{urls[i]}".encode(), digest_size=8).digest()
+        # Uniform in (0, 1)
+        hash = (int.from_bytes(digest, "big") + 1) / (2**64 + 1)
+        return -(weights[i] if weights else 1.0) / math.log(hash)
+
+    return sorted(range(len(urls)), key=score, reverse=True)
+
+
+class NodeRequest:
+    """A request sent to a node, finished once its response has been read."""
+
+    def __init__(self, balancer: "Balancer", url: str):
+        self.balancer = balancer
+        self.url = url
+        self.started_at = time.perf_counter()
+        self.finished = False
+
+    def responded(self):
+        """Record the time the node took to start answering."""
+        self.balancer._record_latency(self.url, time.perf_counter() - self.started_at)
+
+    def finish(self, error: Optional[str] = None):
+        if not self.finished:
+            self.finished = True
+            self.balancer._finish(self.url, error)
+
+
+class Balancer:
+    def __init__(
+        self,
+        strategy: str = "least_outstanding",
+        weights: Optional[dict[str, float]] = None,
+        eject_failures: int = 3,
+        eject_seconds: float = 30,
+        ewma_alpha: float = 0.3,
+        affinity_load_factor: float = 1.25,
+    ):
+        if strategy not in STRATEGIES:
+            log.warning(
+                f"Unknown balancer strategy {strategy}, using least_outstanding"
+            )
+            strategy = "least_outstanding"
+
+        self.strategy = strategy
+        self.weights = weights or {}
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.ewma_alpha = ewma_alpha
+        # Below 1 not even the least loaded node would be within the bound
+        self.affinity_load_factor = max(affinity_load_factor, 1.0)
+
+        self.affinity = {"requests": 0, "preferred": 0, "overflowed": 0}
+
+        self._nodes: dict[str, NodeStats] = {}
+        self._lock = threading.Lock()
+
+    def _node(self, url: str) -> NodeStats:
+        node = self._nodes.get(url)
+        if node is None:
+            node = self._nodes[url] = NodeStats()
+        return node
+
+    def is_ejected(self, url: str) -> bool:
+        with self._lock:
+            return self._node(url).ejected_until > time.monotonic()
+
+    def select(self, urls: list[str], key: Optional[str] = None) -> int:
+        """
+        The position in `urls` of the node to send the next request to. Ejected
+        nodes are skipped unless all of them are.
+
+        With a `key`, the strategy is not used: the node the key hashes to,
+        by weight, is used unless it has more than `affinity_load_factor`
+        times its weighted share of the requests in flight, in which case the
+        next node in the key's order is tried (consistent hashing with bounded
+        loads).
+        """
+        if len(urls) == 1:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                i for i, url in enumerate(urls) if self._node(url).ejected_until <= now
+            ] or list(range(len(urls)))
+
+            nodes = [self._node(urls[i]) for i in candidates]
+            weights = [self.weights.get(urls[i].rstrip("/"), 1.0) for i in candidates]
+            if key is not None:
+                return candidates[
+                    self._select_by_key(key, urls, candidates, nodes, weights)
+                ]
+
+            return candidates[STRATEGIES[self.strategy](nodes, weights)]
+
+    def _select_by_key(
+        self,
+        key: str,
+        urls: list[str],
+        candidates: list[int],
+        nodes: list[NodeStats],
+        weights: list[float],
+    ) -> int:
+        # Nodes without weight only get chats when no node has any
+        positions = [i for i in range(len(nodes)) if weights[i] > 0]
+        if not positions:
+            positions = list(range(len(nodes)))
+            weights = [1.0] * len(nodes)
+
+        in_flight = sum(nodes[i].in_flight for i in positions) + 1
+        total_weight = sum(weights[i] for i in positions)
+
+        def within_bound(i: int) -> bool:
+            share = in_flight * weights[i] / total_weight
+            return nodes[i].in_flight + 1 <= math.ceil(
+                self.affinity_load_factor * share
+            )
+
+        ranked = [
+            positions[i]
+            for i in rank_by_key(
+                key,
+                [urls[candidates[i]] for i in positions],
+                [weights[i] for i in positions],
+            )
+        ]
+        position = next((i for i in ranked if within_bound(i)), None)
+        if position is None:
+            # None within the bound, use the least loaded node for its weight
+            position = min(ranked, key=lambda i: (nodes[i].in_flight + 1) / weights[i])
+
+        self.affinity["requests"] += 1
+        if position == ranked[0]:
+            self.affinity["preferred"] += 1
+        else:
+            self.affinity["overflowed"] += 1
+        return position
+
+    def track(self, url: str) -> NodeRequest:
+        with self._lock:
+            node = self._node(url)
+            node.in_flight += 1
+            node.requests += 1
+        return NodeRequest(self, url)
+
+    def _record_latency(self, url: str, latency: float):
+        with self._lock:
+            node = self._node(url)
+            if node.ewma_latency is None:
+                node.ewma_latency = latency
+            else:
+                node.ewma_latency += self.ewma_alpha * (latency - node.ewma_latency)
+
+    def _finish(self, url: str, error: Optional[str]):
+        with self._lock:
+            node = self._node(url)
+            node.in_flight = max(node.in_flight - 1, 0)
+            if error is None:
+                node.consecutive_failures = 0
+                return
+
+            node.failures += 1
+            node.consecutive_failures += 1
+            node.last_error = error
+            # Once ejected, a single failure after the node is back ejects it again
+            if node.consecutive_failures >= self.eject_failures:
+                node.ejected_until = time.monotonic() + self.eject_seconds
+                log.warning(f"Ejecting {url} for {self.eject_seconds}s: {error}")
+
+    def stats(self, urls: Optional[list[str]] = None) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            nodes = []
+            for url in urls if urls is not None else list(self._nodes):
+                node = self._node(url)
+                nodes.append(
+                    {
+                        "url": url,
+                        "weight": self.weights.get(url.rstrip("/"), 1.0),
+                        "in_flight": node.in_flight,
+                        "requests": node.requests,
+                        "failures": node.failures,
+                        "ewma_latency": node.ewma_latency,
+                        "ejected": node.ejected_until > now,
+                        "ejected_for": max(node.ejected_until - now, 0),
+                        "last_error": node.last_error,
+                    }
+                )
+            return {
+                "strategy": self.strategy,
+                "affinity": dict(self.affinity),
+                "nodes": nodes,
+            }
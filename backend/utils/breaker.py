@@ -0,0 +1,132 @@
+"""
+Circuit breakers for upstream connections.
+
+A breaker is closed while its upstream answers. After `failure_threshold`
+failures in a row it opens and requests fail fast instead of waiting for a
+timeout. After `recovery_seconds` it is half-open and lets one trial request
+through: a success closes it again, a failure opens it for another period.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class CircuitBreaker:
+    def __init__(
+        self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.opened = 0
+
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent. Every allowed request must be recorded."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= self.recovery_seconds:
+                self.state = "half_open"
+                self.trial_started_at = None
+
+            if self.state == "half_open":
+                # One trial at a time, and another if the trial was never recorded
+                if (
+                    self.trial_started_at is None
+                    or now - self.trial_started_at >= self.recovery_seconds
+                ):
+                    self.trial_started_at = now
+                    return True
+
+            if self.state == "closed":
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state != "closed":
+                log.info(f"Circuit for {self.name} closed")
+            self.state = "closed"
+            self.trial_started_at = None
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            if (
+                self.state == "half_open"
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != "open":
+                    log.warning(f"Circuit for {self.name} opened: {error}")
+                    self.opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trial_started_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "opened": self.opened,
+                "last_error": self.last_error,
+                "retry_in": (
+                    max(self.opened_at + self.recovery_seconds - time.monotonic(), 0)
+                    if self.state == "open"
+                    else 0
+                ),
+            }
+
+
+class CircuitBreakers:
+    """A breaker per upstream, created on first use."""
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(
+                    name, self.failure_threshold, self.recovery_seconds
+                )
+            return breaker
+
+    def stats(self, names: Optional[list[str]] = None) -> list[dict]:
+        return [
+            self.get(name).stats()
+            for name in (names if names is not None else list(self._breakers))
+        ]
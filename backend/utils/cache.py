@@ -0,0 +1,342 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from utils import codec
+
+
+class TTLCache:
+    """
+    A bounded, thread-safe LRU cache whose entries expire after a TTL.
+
+    A `maxsize` of 0 disables the cache: nothing is stored and every lookup
+    is a miss.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[1] if item is not None else default
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which `predicate(key, value)` is true."""
+        with self._lock:
+            keys = [
+                key for key, (_, value) in self._data.items() if predicate(key, value)
+            ]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class DiskCache:
+    """
+    A cache of JSON values stored as one file per key in `directory`, which
+    can be shared between processes and survives restarts. Entries expire
+    after a TTL; once the files take more than `max_bytes`, the least
+    recently used are removed. Keys are used as file names, so they must be
+    safe ones, e.g. hex digests.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int, ttl: float = 3600):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        """The modification time, size and path of every entry."""
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return files
+
+        for entry in entries:
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process in the meantime
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            item = codec.loads(path.read_bytes())
+            if item["expires_at"] > time.time():
+                # The modification time orders entries for eviction
+                os.utime(path)
+                self.hits += 1
+                return item["value"]
+            self._remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Truncated or foreign file
+            self._remove(path)
+
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if self.max_bytes <= 0 or ttl <= 0:
+            return
+
+        data = codec.dumpb({"expires_at": time.time() + ttl, "value": value})
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            size = self._get_size()
+            try:
+                size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+            self._size = size + len(data)
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _get_size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._files())
+        return self._size
+
+    def _evict(self):
+        # Down to 90% of the limit, so that eviction doesn't run on every set
+        target = self.max_bytes * 0.9
+        files = sorted(self._files())
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in files:
+            if size <= target:
+                break
+            size -= file_size
+            self._remove(Path(path))
+            self.evictions += 1
+        self._size = size
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._files():
+                self._remove(Path(path))
+            self._size = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        files = self._files()
+        return {
+            "entries": len(files),
+            "size": sum(size for _, size, _ in files),
+            "max_size": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class AsyncRefreshCache:
+    """
+    Caches the result of an async loader with stale-while-revalidate.
+
+    A value younger than `ttl` is served as is. Up to `max_stale` seconds
+    after that it is still served, while a single refresh runs in the
+    background. Beyond that, or after `invalidate()`, callers wait for the
+    refresh, and concurrent callers share it. If a refresh fails, the stale
+    value keeps being served; the failure is only raised when there is
+    nothing to serve.
+    """
+
+    def __init__(self, ttl: float = 60, max_stale: float = 300):
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._generation = 0
+        self._refresh: Optional[asyncio.Task] = None
+        self._refresh_generation = 0
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self.total_duration = 0.0
+
+    async def get(self, loader: Callable[[], Awaitable[Any]], force: bool = False):
+        age = (
+            time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+        )
+
+        if not force and age is not None and age < self.ttl:
+            self.hits += 1
+            return self._value
+
+        if not force and age is not None and age < self.ttl + self.max_stale:
+            self.stale_hits += 1
+            self._start_refresh(loader)
+            return self._value
+
+        self.misses += 1
+        try:
+            return await asyncio.shield(self._start_refresh(loader))
+        except Exception:
+            if self._loaded_at is None:
+                raise
+            return self._value
+
+    def _start_refresh(self, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        # A refresh started before the last invalidation can't be joined
+        if (
+            self._refresh is None
+            or self._refresh.done()
+            or self._refresh_generation != self._generation
+        ):
+            self._refresh_generation = self._generation
+            self._refresh = asyncio.create_task(
+                self._run_refresh(loader, self._generation)
+            )
+            # Background refreshes may fail with nobody awaiting them
+            self._refresh.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+        return self._refresh
+
+    async def _run_refresh(self, loader: Callable[[], Awaitable[Any]], generation: int):
+        start = time.monotonic()
+        try:
+            value = await loader()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            raise
+        finally:
+            self.refreshes += 1
+            self.last_duration = time.monotonic() - start
+            self.total_duration += self.last_duration
+
+        if generation == self._generation:
+            self._value = value
+            self._loaded_at = time.monotonic()
+        elif self._loaded_at is None:
+            # Invalidated during the first load: keep it, but refresh on next use
+            self._value = value
+            self._loaded_at = -math.inf
+        return value
+
+    def invalidate(self):
+        """Make the next `get` wait for a fresh value."""
+        self._generation += 1
+        if self._loaded_at is not None:
+            self._loaded_at = -math.inf
+
+    def stats(self) -> dict:
+        return {
+            "ttl": self.ttl,
+            "max_stale": self.max_stale,
+            "age": (
+                time.monotonic() - self._loaded_at
+                if self._loaded_at is not None and math.isfinite(self._loaded_at)
+                else None
+            ),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_duration": self.last_duration,
+            "mean_duration": (
+                self.total_duration / self.refreshes if self.refreshes else None
+            ),
+        }
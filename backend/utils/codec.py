@@ -0,0 +1,155 @@
+"""
+JSON encoding for chat blobs, JSON columns and API responses, and the
+compression of large stored text.
+
+orjson is used when it is installed and JSON_CODEC is not "json". Values
+orjson can't represent (integers beyond 64 bits, non-standard NaN/Infinity
+literals) are passed to the stdlib, so both codecs accept the same input.
+"""
+
+import base64
+import json
+import logging
+import zlib
+from typing import Any, Optional, Union
+
+from fastapi.responses import JSONResponse as _JSONResponse
+
+from env import CHAT_COMPRESSION, CHAT_COMPRESSION_THRESHOLD, JSON_CODEC, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if JSON_CODEC == "orjson" and orjson is None:
+    log.warning("JSON_CODEC is orjson but orjson is not installed, using json")
+
+CODEC = "orjson" if orjson is not None and JSON_CODEC != "json" else "json"
+
+
+if CODEC == "orjson":
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumpb(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=ORJSON_OPTIONS)
+        except TypeError:
+            return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def dumps(obj: Any) -> str:
+        return dumpb(obj).decode("utf-8")
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            if isinstance(data, memoryview):
+                data = bytes(data)
+            return json.loads(data)
+
+else:
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def dumpb(obj: Any) -> bytes:
+        return dumps(obj).encode("utf-8")
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+
+class JSONResponse(_JSONResponse):
+    """A drop-in JSONResponse that renders with the configured codec."""
+
+    def render(self, content: Any) -> bytes:
+        return dumpb(content)
+
+
+####################
+# Compression
+####################
+
+# Compressed text starts with a control character that can't open a JSON
+# document, followed by the method, the uncompressed length in characters and
+# the base64-encoded payload: "\x1fz1234:eJy...". Anything else is stored as is.
+COMPRESSION_HEADER = "\x1f"
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if CHAT_COMPRESSION == "zstd" and zstandard is None:
+    log.warning("CHAT_COMPRESSION is zstd but zstandard is not installed, using zlib")
+
+COMPRESSION_METHOD = {
+    "zlib": "z",
+    "zstd": "s" if zstandard is not None else "z",
+}.get(CHAT_COMPRESSION)
+
+
+def _compress(method: str, data: bytes) -> bytes:
+    if method == "s":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(method: str, data: bytes) -> bytes:
+    if method == "s":
+        if zstandard is None:
+            raise ValueError("zstd compressed data requires zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def is_compressed(value: Optional[str]) -> bool:
+    return value is not None and value.startswith(COMPRESSION_HEADER)
+
+
+def compress(
+    value: Optional[str], threshold: int = CHAT_COMPRESSION_THRESHOLD
+) -> Optional[str]:
+    """
+    Compress `value` with the configured method if it is at least `threshold`
+    characters long and compression actually makes it smaller.
+    """
+    if (
+        value is None
+        or COMPRESSION_METHOD is None
+        or len(value) < threshold
+        or is_compressed(value)
+    ):
+        return value
+
+    data = value.encode("utf-8")
+    payload = base64.b64encode(_compress(COMPRESSION_METHOD, data)).decode("ascii")
+    compressed = f"{COMPRESSION_HEADER}{COMPRESSION_METHOD}{len(value)}:{payload}"
+    return compressed if len(compressed) < len(value) else value
+
+
+def decompress(value: Optional[str]) -> Optional[str]:
+    if not is_compressed(value):
+        return value
+
+    method = value[1]
+    _, payload = value[2:].split(":", 1)
+    return _decompress(method, base64.b64decode(payload)).decode("utf-8")
+
+
+def get_uncompressed_length(value: Optional[str]) -> int:
+    """
+    The length of the stored text once decompressed. For compressed text only
+    the header is read, so a prefix of the stored value is enough.
+    """
+    if not value:
+        return 0
+    if is_compressed(value):
+        return int(value[2 : value.index(":")])
+    return len(value)
@@ -0,0 +1,143 @@
+"""
+The HTTP clients shared by every call to an upstream: Ollama, OpenAI
+compatible APIs, pipelines, and the audio, image and web search providers.
+
+Async code uses `HTTP_CLIENT.session`, one aiohttp session over a pool of
+keep-alive connections that lives as long as the application. Sync code
+uses `HTTP_CLIENT.sync_session`, a pooled requests session. It blocks, so
+async code must not call it directly but through `asyncio.to_thread`.
+Neither keeps cookies, as they are shared by all users.
+"""
+
+import http.cookiejar
+import logging
+import threading
+from typing import Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from env import (
+    AIOHTTP_CONNECT_TIMEOUT,
+    AIOHTTP_DNS_CACHE_TTL,
+    AIOHTTP_KEEPALIVE_TIMEOUT,
+    AIOHTTP_POOL_SIZE,
+    AIOHTTP_POOL_SIZE_PER_HOST,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class HTTPClientManager:
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._sync_session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "requests": 0,
+            "errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    def timeout(self, total: Optional[float] = None) -> aiohttp.ClientTimeout:
+        """A request timeout of `total` seconds, keeping the connect timeout."""
+        return aiohttp.ClientTimeout(total=total, sock_connect=AIOHTTP_CONNECT_TIMEOUT)
+
+    def _count(self, name: str):
+        async def on_event(session, context, params):
+            self._stats[name] += 1
+
+        return on_event
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The shared aiohttp session, created on first use. Responses must be
+        released, not closed, to return their connection to the pool.
+        """
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._count("requests"))
+            trace_config.on_request_exception.append(self._count("errors"))
+            trace_config.on_connection_create_end.append(
+                self._count("connections_created")
+            )
+            trace_config.on_connection_reuseconn.append(
+                self._count("connections_reused")
+            )
+            trace_config.on_dns_cache_hit.append(self._count("dns_cache_hits"))
+            trace_config.on_dns_cache_miss.append(self._count("dns_cache_misses"))
+
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=AIOHTTP_POOL_SIZE,
+                    limit_per_host=AIOHTTP_POOL_SIZE_PER_HOST,
+                    keepalive_timeout=AIOHTTP_KEEPALIVE_TIMEOUT,
+                    ttl_dns_cache=AIOHTTP_DNS_CACHE_TTL,
+                ),
+                timeout=self.timeout(300),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[trace_config],
+                trust_env=True,
+            )
+        return self._session
+
+    @property
+    def sync_session(self) -> requests.Session:
+        """The shared requests session, for calls made from worker threads."""
+        with self._lock:
+            if self._sync_session is None:
+                session = requests.Session()
+                session.cookies.set_policy(
+                    http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=AIOHTTP_POOL_SIZE,
+                    pool_maxsize=AIOHTTP_POOL_SIZE_PER_HOST or AIOHTTP_POOL_SIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sync_session = session
+            return self._sync_session
+
+    async def start(self):
+        self.session
+        log.info(
+            f"HTTP client pool started: {AIOHTTP_POOL_SIZE} connections, "
+            f"{AIOHTTP_POOL_SIZE_PER_HOST} per host"
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        with self._lock:
+            if self._sync_session is not None:
+                self._sync_session.close()
+                self._sync_session = None
+
+    def stats(self) -> dict:
+        pool = {
+            "limit": AIOHTTP_POOL_SIZE,
+            "limit_per_host": AIOHTTP_POOL_SIZE_PER_HOST,
+        }
+        if self._session is not None and not self._session.closed:
+            connector = self._session.connector
+            # aiohttp doesn't expose these counts, read them defensively
+            acquired = getattr(connector, "_acquired", ())
+            idle = getattr(connector, "_conns", {})
+            pool["in_use"] = len(acquired)
+            pool["idle"] = sum(len(conns) for conns in idle.values())
+            pool["hosts"] = len(idle)
+
+        return {**self._stats, "pool": pool}
+
+
+HTTP_CLIENT = HTTPClientManager()
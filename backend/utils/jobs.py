@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from pydantic import BaseModel
+
+from env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class JobModel(BaseModel):
+    id: str
+    name: str
+    status: str  # "running", "completed" or "failed"
+
+    done: int = 0
+    total: Optional[int] = None
+    error: Optional[str] = None
+
+    started_at: int
+    finished_at: Optional[int] = None
+
+
+class JobTable:
+    """
+    Long-running maintenance work executed in a worker thread, off the event
+    loop. Every job receives a `progress(done, total)` callback; the latest
+    state can be polled by id. Jobs only live in the memory of the worker
+    that started them, and only the `maxsize` most recent are kept.
+    """
+
+    def __init__(self, maxsize: int = 100):
+        self.maxsize = maxsize
+
+        self._jobs: OrderedDict[str, JobModel] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def start(self, name: str, func: Callable, *args, **kwargs) -> JobModel:
+        job = JobModel(
+            id=str(uuid.uuid4()),
+            name=name,
+            status="running",
+            started_at=int(time.time()),
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.maxsize:
+                self._jobs.popitem(last=False)
+
+        # Keep a reference, the loop only holds a weak one to running tasks
+        task = asyncio.create_task(self._run(job.id, func, *args, **kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, id: str, func: Callable, *args, **kwargs):
+        def progress(done: int, total: Optional[int] = None):
+            self._update(id, done=done, total=total)
+
+        try:
+            result = await asyncio.to_thread(func, *args, progress=progress, **kwargs)
+            if result is False:
+                raise RuntimeError("Job returned False")
+            self._update(id, status="completed", finished_at=int(time.time()))
+        except Exception as e:
+            log.exception(f"job {id} failed: {e}")
+            self._update(
+                id, status="failed", error=str(e), finished_at=int(time.time())
+            )
+
+    def _update(self, id: str, **updated):
+        with self._lock:
+            job = self._jobs.get(id)
+            if job is not None:
+                self._jobs[id] = job.model_copy(
+                    update={k: v for k, v in updated.items() if v is not None}
+                )
+
+    def get_job_by_id(self, id: str) -> Optional[JobModel]:
+        with self._lock:
+            return self._jobs.get(id)
+
+    def get_jobs(self) -> list[JobModel]:
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+
+Jobs = JobTable()
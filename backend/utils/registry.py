@@ -0,0 +1,109 @@
+"""
+The merged model list served by /api/models, and the health of the upstreams
+it is built from.
+"""
+
+import time
+from typing import Optional
+
+from utils.cache import AsyncRefreshCache
+
+from env import MODELS_CACHE_TTL, MODELS_CACHE_MAX_STALE
+
+MODELS_CACHE = AsyncRefreshCache(ttl=MODELS_CACHE_TTL, max_stale=MODELS_CACHE_MAX_STALE)
+
+# Model list requests to each upstream, by backend and url
+UPSTREAM_STATS: dict[tuple[str, str], dict] = {}
+
+
+def invalidate_models():
+    """Rebuild the model list on next use, after models, functions or urls changed."""
+    MODELS_CACHE.invalidate()
+
+
+def record_upstream_response(backend: str, url: str, error: Optional[str] = None):
+    stats = UPSTREAM_STATS.setdefault(
+        (backend, url),
+        {"requests": 0, "failures": 0, "last_error": None, "last_failure_at": None},
+    )
+    stats["requests"] += 1
+    if error is not None:
+        stats["failures"] += 1
+        stats["last_error"] = error
+        stats["last_failure_at"] = int(time.time())
+
+
+def get_registry_stats() -> dict:
+    return {
+        "cache": MODELS_CACHE.stats(),
+        "upstreams": [
+            {"backend": backend, "url": url, **stats}
+            for (backend, url), stats in UPSTREAM_STATS.items()
+        ],
+    }
+
+
+def merge_custom_models(models: list[dict], custom_models: list) -> list[dict]:
+    """
+    Apply the custom models saved in the webui to the upstream `models`, in
+    place. A custom model without a base model overrides the name and info of
+    every model with the same id, or the same id before the ":tag"; one with
+    a base model is appended as a preset of the first model its base matches.
+    Matching models also get the "action_ids" from the info they end up with.
+    """
+
+    # Positions in `models` by id and by id without its tag, in list order
+    index: dict[str, list[int]] = {}
+
+    def add_to_index(position: int, id: str):
+        index.setdefault(id, []).append(position)
+        base_id = id.split(":")[0]
+        if base_id != id:
+            index.setdefault(base_id, []).append(position)
+
+    for position, model in enumerate(models):
+        add_to_index(position, model["id"])
+
+    for custom_model in custom_models:
+        if custom_model.base_model_id is None:
+            for position in index.get(custom_model.id, []):
+                model = models[position]
+                model["name"] = custom_model.name
+                model["info"] = custom_model.model_dump()
+
+                action_ids = []
+                if "meta" in model["info"]:
+                    action_ids.extend(model["info"]["meta"].get("actionIds", []))
+
+                model["action_ids"] = action_ids
+        else:
+            owned_by = "openai"
+            pipe = None
+            action_ids = []
+
+            positions = index.get(custom_model.base_model_id)
+            if positions:
+                model = models[positions[0]]
+                owned_by = model["owned_by"]
+                if "pipe" in model:
+                    pipe = model["pipe"]
+
+                if "info" in model and "meta" in model["info"]:
+                    action_ids.extend(model["info"]["meta"].get("actionIds", []))
+
+            models.append(
+                {
+                    "id": custom_model.id,
+                    "name": custom_model.name,
+                    "object": "model",
+                    "created": custom_model.created_at,
+                    "owned_by": owned_by,
+                    "info": custom_model.model_dump(),
+                    "preset": True,
+                    **({"pipe": pipe} if pipe is not None else {}),
+                    "action_ids": action_ids,
+                }
+            )
+            add_to_index(len(models) - 1, custom_model.id)
+
+    return models
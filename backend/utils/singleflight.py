@@ -0,0 +1,127 @@
+"""
+Coalescing of identical in-flight upstream calls.
+
+The first caller for a payload starts the call; callers with the same payload
+that arrive while it is running wait for it and receive a copy of its result,
+or its exception. Nothing is kept once the call finishes, so this only saves
+duplicates that overlap in time, such as retries or several open tabs.
+
+Calls are coalesced per worker process.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from env import ENABLE_REQUEST_COALESCING, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def make_key(group: str, payload: Any) -> str:
+    """A canonical hash of `payload`: key order and whitespace don't matter."""
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{group}:{hashlib.sha256(data.encode('utf-8')).hexdigest()}"
+
+
+class Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+
+        self._flights: dict[str, Flight] = {}
+        self._stats: dict[str, dict] = {}
+
+    def _get_stats(self, group: str) -> dict:
+        return self._stats.setdefault(
+            group,
+            {"calls": 0, "executions": 0, "coalesced": 0, "unshared": 0, "failures": 0},
+        )
+
+    async def do(
+        self,
+        group: str,
+        payload: Any,
+        func: Callable[[], Awaitable[Any]],
+        shareable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Return the result of `func()`, sharing the call with concurrent callers
+        that pass the same `group` and `payload`. Results for which
+        `shareable(result)` is false, such as streaming responses, can only be
+        used once: the other callers then make their own call.
+        """
+        if not self.enabled:
+            return await func()
+
+        stats = self._get_stats(group)
+        stats["calls"] += 1
+
+        key = make_key(group, payload)
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = self._start(key, func, stats)
+        else:
+            stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            # Nobody is left to use the result, e.g. every client went away
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+        if leader:
+            return result
+        if shareable is not None and not shareable(result):
+            stats["coalesced"] -= 1
+            stats["unshared"] += 1
+            return await func()
+        # Callers may modify what they get back
+        return copy.deepcopy(result)
+
+    def _start(
+        self, key: str, func: Callable[[], Awaitable[Any]], stats: dict
+    ) -> Flight:
+        flight = Flight(asyncio.ensure_future(func()))
+        self._flights[key] = flight
+        stats["executions"] += 1
+
+        def done(task: asyncio.Task):
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if not task.cancelled() and task.exception() is not None:
+                stats["failures"] += 1
+
+        flight.task.add_done_callback(done)
+        return flight
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "groups": {
+                group: {
+                    **stats,
+                    "saved_rate": (
+                        stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+                    ),
+                }
+                for group, stats in self._stats.items()
+            },
+        }
+
+
+SINGLEFLIGHT = SingleFlight(enabled=ENABLE_REQUEST_COALESCING)
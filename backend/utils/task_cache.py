@@ -0,0 +1,114 @@
+"""
+Cached responses of task completions: titles, emojis and search queries,
+which many chats request for the same canned prompts.
+
+Responses are cached by task, task model and the messages sent to it, so the
+rendered template, in memory and optionally on disk under CACHE_DIR. Disk
+entries are named after a keyed hash, since CACHE_DIR is served as static
+files.
+"""
+
+import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from config import CACHE_DIR
+from constants import TASKS
+from utils.cache import DiskCache, TTLCache
+
+from env import (
+    SRC_LOG_LEVELS,
+    TASK_CACHE_DISK_SIZE_MB,
+    TASK_CACHE_SIZE,
+    TASK_CACHE_TTL,
+    WEBUI_SECRET_KEY,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+CACHED_TASKS = {
+    str(TASKS.TITLE_GENERATION),
+    str(TASKS.EMOJI_GENERATION),
+    str(TASKS.QUERY_GENERATION),
+}
+
+TASK_CACHE = TTLCache(maxsize=TASK_CACHE_SIZE, ttl=TASK_CACHE_TTL)
+TASK_DISK_CACHE = (
+    DiskCache(
+        Path(CACHE_DIR) / "tasks",
+        max_bytes=int(TASK_CACHE_DISK_SIZE_MB * 1024 * 1024),
+        ttl=TASK_CACHE_TTL,
+    )
+    if TASK_CACHE_DISK_SIZE_MB > 0
+    else None
+)
+
+
+def get_task_cache_key(payload: dict) -> Optional[str]:
+    """The cache key of a task completion payload, None if it isn't cached."""
+    task = payload.get("metadata", {}).get("task")
+    if task not in CACHED_TASKS or payload.get("stream", False):
+        return None
+
+    data = json.dumps(
+        [task, payload["model"], payload["messages"]],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hmac.new(
+        WEBUI_SECRET_KEY.encode("utf-8"), data.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+async def get_cached_task_response(key: str) -> Optional[Any]:
+    response = TASK_CACHE.get(key)
+    if response is not None:
+        # Callers may modify what they get back
+        return copy.deepcopy(response)
+
+    if TASK_DISK_CACHE is not None:
+        response = await asyncio.to_thread(TASK_DISK_CACHE.get, key)
+        if response is not None:
+            TASK_CACHE.set(key, copy.deepcopy(response))
+    return response
+
+
+async def cache_task_response(key: str, response: Any):
+    # Only successful completions, as plain JSON
+    if not isinstance(response, dict) or "error" in response:
+        return
+
+    TASK_CACHE.set(key, response)
+    if TASK_DISK_CACHE is not None:
+        try:
+            await asyncio.to_thread(TASK_DISK_CACHE.set, key, response)
+        except Exception as e:
+            log.warning(f"Failed to write task cache entry: {e}")
+
+
+def clear_task_cache():
+    TASK_CACHE.clear()
+    if TASK_DISK_CACHE is not None:
+        TASK_DISK_CACHE.clear()
+
+
+def get_task_cache_stats() -> dict:
+    memory = TASK_CACHE.stats()
+    disk = TASK_DISK_CACHE.stats() if TASK_DISK_CACHE is not None else None
+
+    # Every lookup goes to memory first, and to disk on a miss
+    lookups = memory["hits"] + memory["misses"]
+    hits = memory["hits"] + (disk["hits"] if disk else 0)
+    return {
+        "hits": hits,
+        "misses": lookups - hits,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "memory": memory,
+        "disk": disk,
+    }
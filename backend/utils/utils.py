@@ -1,7 +1,7 @@
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import HTTPException, status, Depends, Request
 
-from apps.webui.models.users import Users
+from apps.webui.models.users import Users, user_cache, invalid_api_key_cache
 
 from typing import Union, Optional
 from constants import ERROR_MESSAGES
@@ -9,6 +9,7 @@ from passlib.context import CryptContext
 from datetime import datetime, timedelta, UTC
 import jwt
 import uuid
+import time
 import logging
 from env import WEBUI_SECRET_KEY
 
@@ -94,15 +95,21 @@ def get_current_user(
     # auth by jwt token
     data = decode_token(token)
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = user_cache.get(token)
         if user is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=ERROR_MESSAGES.INVALID_TOKEN,
-            )
-        else:
-            Users.update_user_last_active_by_id(user.id)
-        return user
+            user = Users.get_user_by_id(data["id"])
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail=ERROR_MESSAGES.INVALID_TOKEN,
+                )
+
+            # Never keep a token cached past its own expiry
+            ttl = data["exp"] - time.time() if "exp" in data else None
+            user_cache.set(token, user, ttl=ttl)
+
+        Users.update_user_last_active_by_id(user.id)
+        return user.model_copy()
     else:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,17 +118,23 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = user_cache.get(api_key)
 
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=ERROR_MESSAGES.INVALID_TOKEN,
-        )
-    else:
-        Users.update_user_last_active_by_id(user.id)
+        if invalid_api_key_cache.get(api_key) is None:
+            user = Users.get_user_by_api_key(api_key)
 
-    return user
+        if user is None:
+            invalid_api_key_cache.set(api_key, True)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=ERROR_MESSAGES.INVALID_TOKEN,
+            )
+
+        user_cache.set(api_key, user)
+
+    Users.update_user_last_active_by_id(user.id)
+    return user.model_copy()
 
 
 def get_verified_user(user=Depends(get_current_user)):
@@ -1,8 +1,8 @@
 import json
-import requests
 import logging
 
 from config import SRC_LOG_LEVELS, VERSION, WEBUI_FAVICON_URL, WEBUI_NAME
+from utils.http import HTTP_CLIENT
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["WEBHOOK"])
@@ -45,7 +45,7 @@ def post_webhook(url: str, message: str, event_data: dict) -> bool:
             payload = {**event_data}
 
         log.debug(f"payload: {payload}")
-        r = requests.post(url, json=payload)
+        r = HTTP_CLIENT.sync_session.post(url, json=payload)
         r.raise_for_status()
         log.debug(f"r.text: {r.text}")
         return True